@@ -1,67 +1,47 @@
 import streamlit as st
 import pandas as pd
 import uuid
-from neo4j import GraphDatabase, basic_auth
-
-# Replace these with your Neo4j connection details
-uri = st.secrets['NEO4J_URI']
-user = st.secrets['NEO4J_USER']
-password = st.secrets['NEO4J_PASSWORD']
-
-driver = GraphDatabase.driver(uri, auth=basic_auth(user, password))
-
-def validate_lat_lon(lat, lon):
-    # Check if the values are floats
-    try:
-        lat = float(lat)
-        lon = float(lon)
-    except ValueError:
-        return False
-
-    # Check if the values are within valid ranges
-    if lat < -90 or lat > 90:
-        return False
-    if lon < -180 or lon > 180:
-        return False
-
-    return True
-
-def run_query(query, parameters=None):
-    with driver.session() as session:
-        return session.run(query, parameters).data()
-
-
-def delete_all_nodes():
-    query = "MATCH (n) DETACH DELETE n"
-    run_query(query)
+from db import run_query, get_setting
+from cache import get_cache, all_cache_stats
+from cordis import get_store
+from schema import ensure_schema
+import querybuilder as qb
+from casestudies import validate_lat_lon, normalize_case_study_info, write_case_studies, ProjectNotFoundError
+from reset_graph import delete_nodes
+from browse import iter_nodes, node_page_query, parse_node_page
+from async_db import run_queries, run_cached
+from export_graph import FORMATS, export_zip
+from search import FACETS, search_case_studies, search_load, facets_cache
+from factsheet import fetch_factsheet_data, render_factsheet
+from geo import MAX_ZOOM, get_clusters, clusters_cache
+from projects import write_project
+from submission_queue import enqueue, start_worker, queue_status
+import metrics
+import snapshot
+import typeahead
+import stats
+import network
+
+ensure_schema()
+start_worker()
+snapshot.start_refresher()
+typeahead.start_refresher()
+
+project_names_cache = get_cache('project_names', ttl=float(get_setting('PROJECT_LIST_CACHE_TTL', 300)))
+
+def delete_all_nodes(chunk_size=10000, progress=None, cancel=None):
+    delete_nodes(chunk_size=chunk_size, progress=progress, cancel=cancel)
+    project_names_cache.invalidate()
     return None
 def create_project_node(project_info, coord_info):
-    project_name = project_info['name']
-    if check_project_exists_with_same_name(project_name):
-        raise Exception('Project with the same name already exists in the database')
-
-    query = """
-    MERGE (coord:Institution {name: $coord_info.name})
-    ON CREATE SET coord += $coord_info, coord.id = apoc.create.uuid()
-    CREATE (project:Project $project_info)
-    MERGE (coord)-[r:WORKS_ON {role: 'Project Coordinator'}]->(project)
-    ON CREATE SET r.timestamp = timestamp()
-
-    """
-    run_query(query, {'coord_info': coord_info, 'project_info': project_info})
+    write_project(project_info, coord_info)
+    project_names_cache.invalidate()
 
     return None
 
-def check_project_exists_with_same_name(project_name):
-    query = f"MATCH (n:Project) WHERE n.name = '{project_name}' RETURN n LIMIT 1"
-    result = run_query(query)
-    return len(result) > 0
-
-
 def check_node_exists(label, properties):
-    where_clause = " AND ".join([f"n.{key} = '{value}'" for key, value in properties.items()])
-    query = f"MATCH (n:{label}) WHERE {where_clause} RETURN n LIMIT 1"
-    result = run_query(query)
+    query = qb.node_exists(label, properties.keys())
+    result = run_query(query, {'values': properties})
     return len(result) > 0
 
 def generate_unique_project_id():
@@ -69,41 +49,46 @@ def generate_unique_project_id():
     return str(uuid.uuid4())
 
 def get_all_nodes():
-    query = "MATCH (n) RETURN n"
-    return run_query(query)
+    return iter_nodes()
 
 def get_all_projects():
     query = "MATCH (n:Project) RETURN n"
     return run_query(query)
 
+def project_names_load():
+    # As an async_db.run_cached entry, to load alongside a page's other reads.
+    return (project_names_cache, 'all', "MATCH (n:Project) RETURN n.name AS name ORDER BY name", None,
+            lambda records: [x['name'] for x in records])
+
+def get_project_names():
+    if snapshot.active():
+        return snapshot.current().project_names
+    return run_cached({'projects': project_names_load()}, name='app.project_names')['projects']
+
 def submit_project_info(name, proj_type, proj_website, proj_funding, proj_start, proj_end, coord_host):
     project_dict = {'name': name, 'FundedBy': proj_type, 'Website': proj_website, 'FundingAmount': proj_funding, 'StartDate': proj_start, 'EndDate': proj_end}
     coord_dict = {'name': coord_host}
-    create_project_node(project_dict, coord_dict)
+    # Durably queued locally; the submission-queue worker writes it to Neo4j.
+    enqueue('project', {'project_info': project_dict, 'coord_info': coord_dict})
     return None
 
 def create_case_study_node(case_study_info, case_study_lead_info, project_name, case_study_leader_host_institution):
-    for key, value in case_study_info.items():
-        if value == "" or value == [] or value is None:
-            case_study_info[key] = "Not Available"
-    query = """
-    CREATE (case_study:CaseStudy)
-        SET case_study.id = apoc.create.uuid(), case_study += $case_study_info
-    MERGE (lead:Researcher {name: $case_study_lead_info.name})
-        ON CREATE SET lead.id = apoc.create.uuid(), lead += $case_study_lead_info
-    MERGE (institution:Institution {name: $case_study_leader_host_institution})
-        ON CREATE SET institution.id = apoc.create.uuid()
-    WITH case_study, lead, institution
-    MATCH (project:Project {name: $project_name})
-    MERGE (project)-[:HAS_CASE_STUDY]->(case_study)
-    MERGE (lead)-[r1:WORKS_ON {role: 'Case Study Leader'}]->(case_study)
-        ON CREATE SET r1.timestamp = timestamp()
-    MERGE (lead)-[r2:WORKS_ON {role: 'Case Study Leader'}]->(project)
-        ON CREATE SET r2.timestamp = timestamp()
-    MERGE (lead)-[:BELONGS_TO]->(institution)
-    """
+    normalize_case_study_info(case_study_info)
+    written = write_case_studies([{
+        'case_study_info': case_study_info,
+        'case_study_lead_info': case_study_lead_info,
+        'project_name': project_name,
+        'case_study_leader_host_institution': case_study_leader_host_institution
+    }])
+    if not written:
+        raise ProjectNotFoundError(f'Project {project_name!r} does not exist; the case study was not saved')
+    facets_cache.invalidate()
+    clusters_cache.invalidate()
+    stats.notify()
+    return None
 
-    run_query(query, {
+def submit_case_study_info(case_study_info, case_study_lead_info, project_name, case_study_leader_host_institution):
+    enqueue('case_study', {
         'case_study_info': case_study_info,
         'case_study_lead_info': case_study_lead_info,
         'project_name': project_name,
@@ -125,40 +110,126 @@ def get_all_node_labels():
     return labels
 
 def get_all_node_names_of_label(label):
-    query = f"""
-    MATCH (n:{label})
-    RETURN n.name
-    """
-    results = run_query(query)
+    results = run_query(qb.node_names(label))
     names = []
     for result in results:
-        names.append(result['n.name'])
+        names.append(result['name'])
     return names
 
 def get_node_info(label,name):
-    query=f"""
-    MATCH (n:{label} {{name: '{name}'}})
-    RETURN n
-    """
-    result = run_query(query)
+    result = run_query(qb.node_by_name(label), {'name': name})
     return list(result[0]['n'].keys())
 
 def modify_node_attribute(label,name,attribute,new_value):
-    query=f"""
-    MATCH (n:{label} {{name: '{name}'}})
-    SET n.{attribute} = '{new_value}'
-    """
-    run_query(query)
+    run_query(qb.set_node_property(label, attribute), {'name': name, 'value': new_value})
+    snapshot.notify()
     return None
 
 def fetch_project_data(project_name,project_type):
-    name = project_name.lower()
-    if project_type == 'HORIZON EUROPE':
-        df = pd.read_csv('data/horizon_europe_c.csv')
-    else:
-        df = pd.read_csv('data/horizon_2020_c.csv')
-    df = df[df['projectAcronym'].str.lower() == name]
-    return df
+    return get_store(project_type).lookup(project_name)
+
+CASE_STUDY_SECTIONS = [
+    "Section 1: Case Study Characteristics",
+    "Section 2: Nexus Components Information",
+    "Section 3: Modeling/Tools - Main simulation approaches and methodologies",
+    "Section 4: Stakeholder Engagement",
+    "Section 5: Governance and Policy",
+    "Section 6: Project Outputs",
+    "Section 7: Project After Life (Exploitation and Sustainability of the Solutions)",
+]
+
+# "Please specify" fields are always shown inside the section forms; each one
+# is only kept when its question has the matching answer.
+SPECIFY_FIELDS = {
+    'case_study_scale_other': ('case_study_scale', "Other (specify)"),
+    'nexus_sectors_other': ('nexus_sectors', "Other (please specify)"),
+    'layers_of_analysis_other': ('layers_of_analysis', "Other (please specify):"),
+    'systems_analysis_specify': ('systems_analysis', "Other (please specify)"),
+    'integrated_modeling_specify': ('integrated_modeling', "Other (please specify)"),
+    'environmental_management_specify': ('environmental_management', "Other (please specify)"),
+    'economics_specify': ('economics', "Other (please specify)"),
+    'statistics_specify': ('statistics', "Other (please specify)"),
+    'social_science_specify': ('social_science', "Other (please specify)"),
+    'climate_projections_specify': ('climate_projections', "Other (please specify)"),
+    'semantics_ontologies_specify': ('semantics_ontologies', "YES"),
+    'footprint_calculations_specify': ('footprint_calculations', "YES"),
+    'decision_support_system_details': ('decision_support_system', "YES"),
+    'data_types_specify': ('data_types', "Other (please specify)"),
+    'ai_methodology_other': ('ai_methodology', "Other (specify)"),
+    'nexus_indicators_specify': ('nexus_indicators', "YES"),
+    'monitoring_techniques_specify': ('monitoring_techniques', "Other (please specify)"),
+    'stakeholders_involved_other': ('stakeholders_involved', "Other (please specify)"),
+    'stakeholder_sectors_other': ('stakeholder_sectors', "Other (please specify)"),
+    'stakeholder_approach_other': ('stakeholder_approach', "Other (please specify)"),
+    'biggest_org_sector_other': ('biggest_org_sector', "Other"),
+    'governance_assessment_specify': ('governance_assessment', "YES"),
+    'policy_coherence_assessment_specify': ('policy_coherence_assessment', "YES"),
+    'important_drivers_specify': ('important_drivers', "Other (please specify)"),
+    'solutions_financing_specify': ('solutions_financing', "Other (please specify)"),
+    'visualization_choice_other': ('visualization_choice', "Other (please specify)"),
+    'data_mgmt_plan_specify': ('data_mgmt_plan', "YES"),
+    'usage_other_purpose': ('usage_choice', "Other purposes (please specify)"),
+    'other_helix': ('helix_choice', "Others (please specify)"),
+}
+
+def refresh_entity_options(entity_label, key):
+    # Runs when the search box changes: the typed prefix goes to the
+    # typeahead and its best match is preselected; with no match the typed
+    # text is kept as a new name.
+    prefix = st.session_state[f"{key}_search"].strip()
+    matches = typeahead.suggest(entity_label, prefix) if prefix else []
+    st.session_state[f"{key}_options"] = matches
+    st.session_state[key] = matches[0] if matches else (prefix or None)
+
+def entity_search(label, entity_label, key):
+    # Widgets inside a form cannot have callbacks, so the search box sits
+    # before the form and fills the options of entity_input.
+    st.text_input(f"Search {label.lower()}", key=f"{key}_search", on_change=refresh_entity_options,
+                  args=(entity_label, key), placeholder="Type the start of a name and press Enter")
+
+def entity_input(label, key):
+    current = st.session_state.get(key)
+    options = list(dict.fromkeys(([current] if current else []) + st.session_state.get(f"{key}_options", [])))
+    return st.selectbox(label, options, index=None, key=key,
+                        accept_new_options=True, placeholder="Search above or type a new name")
+
+def chosen(answers, field, option):
+    value = answers.get(field)
+    return value == option or (isinstance(value, list) and option in value)
+
+def answer(widget, label, *args, key, **kwargs):
+    # Streamlit drops the state of widgets that are not rendered, so values
+    # typed in other sections are restored from the saved answers.
+    answers = st.session_state['case_study_answers']
+    if key not in st.session_state and key in answers:
+        st.session_state[key] = answers[key]
+    st.session_state['case_study_section_keys'].append(key)
+    return widget(label, *args, key=key, **kwargs)
+
+def save_section(step):
+    answers = st.session_state['case_study_answers']
+    for key in st.session_state['case_study_section_keys']:
+        answers[key] = st.session_state[key]
+    if st.session_state['case_study_section'] == 0:
+        latitude = answers.get('case_study_latitude')
+        longitude = answers.get('case_study_longitude')
+        invalid = bool(latitude or longitude) and not validate_lat_lon(latitude, longitude)
+        st.session_state['case_study_location_error'] = invalid
+        if invalid:
+            return
+    st.session_state['case_study_section'] += step
+
+st.session_state['rerun_count'] = st.session_state.get('rerun_count', 0) + 1
+st.sidebar.caption(f"Reruns this session: {st.session_state['rerun_count']}, "
+                   f"since last case study submission: {st.session_state['rerun_count'] - st.session_state.get('reruns_at_last_submission', 0)}")
+
+with st.sidebar.expander("Submission queue"):
+    submission_queue_status = queue_status()
+    st.write(f"Waiting: {submission_queue_status['pending']}, failed: {submission_queue_status['failed']}, "
+             f"lag: {submission_queue_status['lag_seconds']:.1f}s")
+    for submission_error in submission_queue_status['recent_errors']:
+        st.caption(f"{submission_error['kind']} {submission_error['key'][:8]} "
+                   f"(attempt {submission_error['attempts']}): {submission_error['error']}")
 
 st.title("NEXUSNET Database Survey Form")
 st.header("Introduction")
@@ -167,16 +238,18 @@ The platform is a free-to-access tool that hosts Nexus Case Studies from all aro
 The platform allows the users to visualize the information of each Case Studies based on multiple queries and also download a factsheet with complete information of each CS. \n
 You will now be guided to provide information about your CS.
 """)
-selection = st.radio('Are you inputting a new project or adding a case study to an existing project?', ('New Project', 'New Case Study'))
+selection = st.radio('Are you inputting a new project or adding a case study to an existing project?', ('New Project', 'New Case Study', 'Search Case Studies', 'Case Study Map', 'Browse Data', 'Statistics', 'Query Metrics'))
 if selection == 'New Project':
-    name = st.text_input(label='Project Name')
-    proj_type = st.selectbox(label='The project is funded by:',options=['HORIZON 2020', 'HORIZON EUROPE', 'ERC', 'Life','Prima','Interreg','Erasmus+','Marie Sklodowska-Curie', 'National/Regional Funding', 'Other'], index=1)
-    coord_host = st.text_input(label='Project Coordinator Host Institution')
-    proj_website = st.text_input(label='Project Website')
-    proj_funding = st.text_input(label='Project Funding Amount')
-    proj_start = st.date_input(label='Project Start Date')
-    proj_end = st.date_input(label='Project End Date')
-    submit_button = st.button(label='Submit Project Info')
+    entity_search('Project Coordinator Host Institution', 'Institution', "coord_host")
+    with st.form("new_project"):
+        name = st.text_input(label='Project Name')
+        proj_type = st.selectbox(label='The project is funded by:',options=['HORIZON 2020', 'HORIZON EUROPE', 'ERC', 'Life','Prima','Interreg','Erasmus+','Marie Sklodowska-Curie', 'National/Regional Funding', 'Other'], index=1)
+        coord_host = entity_input('Project Coordinator Host Institution', key="coord_host") or ''
+        proj_website = st.text_input(label='Project Website')
+        proj_funding = st.text_input(label='Project Funding Amount')
+        proj_start = st.date_input(label='Project Start Date')
+        proj_end = st.date_input(label='Project End Date')
+        submit_button = st.form_submit_button(label='Submit Project Info')
 
     if submit_button:
         submit_project_info(name, proj_type, proj_website, proj_funding, proj_start,
@@ -184,627 +257,583 @@ if selection == 'New Project':
         st.success('Project info submitted successfully!')
 
 if selection == 'New Case Study':
-    list_of_projects = [x['n']['name'] for x in get_all_projects()]
+    # Each section is a form: widget edits stay in the browser until "Back",
+    # "Next" or the final submit, and only those trigger a rerun.
+    section = st.session_state.setdefault('case_study_section', 0)
+    st.session_state.setdefault('case_study_answers', {})
+    st.session_state['case_study_section_keys'] = []
     st.title("Case Study Form")
-
-    # SECTION 2: Case Study characteristics
-    st.header("Section 1: Case Study Characteristics")
-    case_study_project = st.selectbox("Which project is the case study part of?", list_of_projects)
-    st.subheader(":exclamation: :red[WARNING] :exclamation: : If you are adding a case study to a project that does not exist, please go back and create a new project first.")
-    case_study_name = st.text_input("Name your case study", key="case_study_name")
-    case_study_leader_institution = st.text_input("What is the host institution of the case study leader?", key="case_study_leader_institution")
-    case_study_leader_name = st.text_input("Case study leader name", key="case_study_leader_name")
-    case_study_leader_contact = st.text_input("Case study leader email", key="case_study_leader_contact")
-    case_study_country = st.text_input("In which country/countries is your case study located?", key="case_study_country")
-    #case_study_latitude = st.text_input("9c. What is the latitude of the case study?",value=0.0)
-    #case_study_longitude = st.text_input("9b. What is the longitude of the case study?",value=0.0)
-    #if validate_lat_lon(case_study_latitude, case_study_longitude):
-    #    st.write("Valid latitude and longitude values")
-    #else:
-    #    st.write("Invalid latitude and longitude values")
-
-    case_study_scale = st.selectbox(
-        "What is the scale of the case study?",
-        (
-            "Global",
-            "Continental",
-            "International",
-            "National",
-            "State",
-            "Regional",
-            "Subregional",
-            "River basin district",
-            "Municipality/city",
+    st.progress((section + 1) / len(CASE_STUDY_SECTIONS), text=f"Section {section + 1} of {len(CASE_STUDY_SECTIONS)}")
+
+    if section == 0:
+        entity_search("Host institution of the case study leader", 'Institution', "case_study_leader_institution")
+        entity_search("Case study leader name", 'Researcher', "case_study_leader_name")
+    with st.form(f"case_study_section_{section}"):
+        st.header(CASE_STUDY_SECTIONS[section])
+        if section == 0:
+            list_of_projects = get_project_names()
+            case_study_project = answer(st.selectbox, "Which project is the case study part of?", list_of_projects, key="case_study_project")
+            st.subheader(":exclamation: :red[WARNING] :exclamation: : If you are adding a case study to a project that does not exist, please go back and create a new project first.")
+            case_study_name = answer(st.text_input, "Name your case study", key="case_study_name")
+            case_study_leader_institution = answer(entity_input, "What is the host institution of the case study leader?", key="case_study_leader_institution")
+            case_study_leader_name = answer(entity_input, "Case study leader name", key="case_study_leader_name")
+            case_study_leader_contact = answer(st.text_input, "Case study leader email", key="case_study_leader_contact")
+            case_study_country = answer(st.text_input, "In which country/countries is your case study located?", key="case_study_country")
+            case_study_latitude = answer(st.text_input, "What is the latitude of the case study?", key="case_study_latitude")
+            case_study_longitude = answer(st.text_input, "What is the longitude of the case study?", key="case_study_longitude")
+            if st.session_state.get('case_study_location_error'):
+                st.write("Invalid latitude and longitude values")
+
+            case_study_scale = answer(st.selectbox,
+                "What is the scale of the case study?",
+                (
+                    "Global",
+                    "Continental",
+                    "International",
+                    "National",
+                    "State",
+                    "Regional",
+                    "Subregional",
+                    "River basin district",
+                    "Municipality/city",
+                    "Other (specify)",
+                ),
+                key="case_study_scale",
+            )
+            case_study_scale_other = answer(st.text_input, "Please specify:", key="case_study_scale_other")
+
+            case_study_transboundary = answer(st.selectbox,
+                "Is the case study transboundary?",
+                ("No", "Transboundary between countries", "Transboundary between regions"),
+                key="case_study_transboundary",
+            )
+
+            case_study_objectives = answer(st.text_area, "What were/are the objectives (goals) of the case study?", key="case_study_objectives")
+
+        elif section == 1:
+
+            nexus_sectors = answer(st.multiselect,
+                "What sectors are involved in the identified nexus challenges?",
+                (
+                    "Water",
+                    "Food",
+                    "Energy",
+                    "Land Use / Land Availability",
+                    "Ecosystem and/or/Biodiversity",
+                    "Climate",
+                    "Soil",
+                    "Waste",
+                    "Health",
+                    "Other (please specify)",
+                ),
+                key="nexus_sectors",
+            )
+            nexus_sectors_other = answer(st.text_input, "Please specify:", key="nexus_sectors_other")
+
+            layers_of_analysis = answer(st.multiselect,
+                "What are the main areas of investigation for research in the CS?",
+                (
+                    "Biophysical modeling",
+                    "Behavioural studies and stakeholder perception",
+                    "Governance and policy",
+                    "Economic",
+                    "Other (please specify):",
+                ),
+                key="layers_of_analysis",
+            )
+            layers_of_analysis_other = answer(st.text_input, "Please specify:", key="layers_of_analysis_other")
+
+        elif section == 2:
+
+            systems_analysis = answer(st.multiselect,
+                "Systems analysis: Which of the following method(s) have you used?",
+                ("System Dynamics Modelling (SDM)",
+                 "Multi-sectoral systems analysis",
+                 "Material flows analysis",
+                 "System informatics and analytics",
+                 "Causal loop diagrams and system feedbacks",
+                 "Mathematical/engineering modeling",
+                 "Resource flows",
+                 "Network analysis",
+                 "Other (please specify)"),
+                key="systems_analysis",
+            )
+            systems_analysis_specify = answer(st.text_input, "Please specify:", key="systems_analysis_specify")
+            #added
+            integrated_modeling = answer(st.multiselect,
+                "Integrated modelling: Which of the following method(s) have you used?",
+                ("SWAT (Soil and Water Assessment Tool)",
+                 "CLEWS model (Climate, Land, Energy and Water Strategies)",
+                 "SEWEM (System-Wide Economic-Water-Energy Model)",
+                 "WEF Nexus tool 2.0",
+                 "PRIMA (Platform for Regional Integrated Modeling and Analysis)",
+                 "MCDA (Multi-Criteria Decision Analysis)",
+                 "MuSIASEM (Multi-scale Integrated Analysis of Societal and Ecosystem Metabolism)",
+                 "Integrated assessment models",
+                 "Other (please specify)"),
+                key="integrated_modeling",
+            )
+            #added
+            integrated_modeling_specify = answer(st.text_input, "Please specify:", key="integrated_modeling_specify")
+            #added
+            environmental_management = answer(st.multiselect,
+                "Environmental management: Which of the following method(s) have you used?",
+                ("Scenario analysis",
+                 "Footprinting",
+                 "Life Cycle Assessment",
+                 "Decision Support System",
+                 "Other (please specify)"),
+                key="environmental_management",
+            )
+            #added
+            environmental_management_specify = answer(st.text_input, "Please specify:", key="environmental_management_specify")
+            #added
+            economics = answer(st.multiselect,
+                "Economics: Which of the following method(s) have you used?",
+                ("Cost-benefit analysis",
+                 "Input-output analysis",
+                 "Trade-off/Synergy analysis",
+                 "Social accounting matrix",
+                 "Value chain analysis",
+                 "Supply chain analysis",
+                 "Economic modelling",
+                 "Other (please specify)"),
+                key="economics",
+            )
+            #added
+            economics_specify = answer(st.text_input, "Please specify:", key="economics_specify")
+            #added
+            statistics = answer(st.multiselect,
+                "Statistics: Which of the following method(s) have you used?",
+                ("Principal component analysis",
+                 "Regression statistics",
+                 "Trend analysis",
+                 "Data mining",
+                 "Other (please specify)"),
+                key="statistics",
+            )
+            #added
+            statistics_specify = answer(st.text_input, "Please specify:", key="statistics_specify")
+            #added
+            social_science = answer(st.multiselect,
+                "Social science: Which of the following method(s) have you used?",
+                ("Institutional analysis",
+                 "Questionnaires, surveys or interviews",
+                 "Historical analysis",
+                 "Agent-based modelling",
+                 "Delphi technique",
+                 "Critical discourse analysis",
+                 "Stakeholder analysis",
+                 "Participatory workshops/focus groups",
+                 "Living labs",
+                 "Policy analysis",
+                 "Other (please specify)"),
+                key="social_science",
+            )
+            #added
+            social_science_specify = answer(st.text_input, "Please specify:", key="social_science_specify")
+
+            semantics_ontologies = answer(st.selectbox,
+                "Did you perform work on ontology engineering?",
+                ("YES", "NO"),
+                key="semantics_ontologies",
+            )
+            semantics_ontologies_specify = answer(st.text_input, "If yes, please specify:", key="semantics_ontologies_specify")
+
+            footprint_calculations = answer(st.selectbox,
+                "Did you perform any footprint calculations (Water, Energy, Nexus, etc.)?",
+                ("YES", "NO"),
+                key="footprint_calculations",
+            )
+            footprint_calculations_specify = answer(st.text_input, "If yes, please specify:", key="footprint_calculations_specify")
+
+            decision_support_system = answer(st.selectbox,
+            "Did you develop a Decision Support System?",
+            ("YES", "NO"),
+                key="decision_support_system",
+            )
+            decision_support_system_details = answer(st.text_area, "If yes, please give more details:", key="decision_support_system_details")
+            #added
+            climate_projections = answer(st.multiselect,
+                "Climate projections: Which of the following model(s) have you used?",
+                ("CAPRI",
+                 "MAGPIE",
+                 "E3ME",
+                 "MAGNET",
+                 "GLOBIO",
+                 "SWAT",
+                 "HYDROSIM",
+                 "UWOT",
+                 "WEAP",
+                 "LEAP",
+                 "Other (please specify)"),
+                key="climate_projections",
+            )
+            #added
+            climate_projections_specify = answer(st.text_input, "Please specify:", key="climate_projections_specify")
+            #added
+            data_types = answer(st.multiselect,
+                "Data types: Which of the following data sources have you used?",
+                ("Lab test outputs",
+                 "Field test outputs",
+                 "Sensors",
+                 "Literature",
+                 "Model outputs",
+                 "Qualitative",
+                 "Publicly available platforms (OECD, FAO, EUROSTAT)",
+                 "National statistics",
+                 "Other (please specify)"),
+                key="data_types",
+            )
+            #added
+            data_types_specify = answer(st.text_input, "Please specify:", key="data_types_specify")
+            #added
+            ai_methodology = answer(st.multiselect,
+            "Did you use Artificial Intelligence methodology?",
+            (
+            "Knowledge Elicitation Engine",
+            "Machine Learning",
+            "Deep Learning",
+            "Evolutionary Optimization Approaches",
+            "SWORM",
+            "Simulated Annealing",
+            "Agent Based Modeling",
             "Other (specify)",
-        ),
-    )
-    case_study_scale_other = ""
-    if case_study_scale == "Other (specify)":
-        case_study_scale_other = st.text_input("Please specify:", key="case_study_scale_other")
-
-    case_study_transboundary = st.selectbox(
-        "Is the case study transboundary?",
-        ("No", "Transboundary between countries", "Transboundary between regions"),
-    )
-
-    case_study_objectives = st.text_area("What were/are the objectives (goals) of the case study?", key="case_study_objectives")
-
-    # SECTION 2: Nexus components information
-    st.header("Section 2: Nexus Components Information")
-
-    nexus_sectors = st.multiselect(
-        "What sectors are involved in the identified nexus challenges?",
-        (
-            "Water",
-            "Food",
+            ),
+                key="ai_methodology",
+            )
+            ai_methodology_other = answer(st.text_input, "Please specify:",key='ai_methodology_other')
+            nexus_indicators = answer(st.selectbox,
+            "Did you develop indicators/KPIs to assess the Nexus?",
+            ("YES", "NO"),
+                key="nexus_indicators",
+            )
+            nexus_indicators_specify = answer(st.text_area, "If yes, please specify:", key="nexus_indicators_specify")
+            monitoring_techniques = answer(st.multiselect,
+            "Did you use any monitoring techniques (e.g. near real-time, or other)?",
+            (
+            "Sensors",
+            "Satellite",
+            "Citizen Science",
+            "Crowd Sourcing",
+            "Web-scraping tools",
+            "Field visits/sampling",
+            "Other (please specify)"
+            ),
+                key="monitoring_techniques",
+            )
+            #added
+            monitoring_techniques_specify = answer(st.text_input, "Please specify:", key="monitoring_techniques_specify")
+        elif section == 3:
+
+            stakeholders_involved = answer(st.multiselect,
+            "Which stakeholders are involved in the case study? (as part of the 5tuple helix)",
+            (
+            "Private sector/business (industry, business, enterprises)",
+            "Governmental stakeholders/policy makers",
+            "Academia/research",
+            "Local citizens",
+            "Other (please specify)",
+            ),
+                key="stakeholders_involved",
+            )
+            stakeholders_involved_other = answer(st.text_input, "Please specify:", key="stakeholders_involved_other")
+
+            stakeholder_sectors = answer(st.multiselect,
+            "Which sector did the stakeholders belong to?",
+            (
+            "Agriculture/Farming",
             "Energy",
-            "Land Use / Land Availability",
-            "Ecosystem and/or/Biodiversity",
-            "Climate",
-            "Soil",
-            "Waste",
+            "Water resources",
+            "Tourism",
+            "Media",
+            "Biodiversity and natural ecosystems",
+            "Education",
+            "Built environment/ construction",
+            "Climate crisis/ civil protection",
+            "Forestry",
+            "Economics/Finance (banks, commerce, investors)",
             "Health",
+            "Transport and logistic",
+            "Culture",
+            "Social Sciences and Humanities",
             "Other (please specify)",
-        ),
-    )
-    nexus_sectors_other = ""
-    if "Other (please specify)" in nexus_sectors:
-        nexus_sectors_other = st.text_input("Please specify:", key="nexus_sectors_other")
-
-    layers_of_analysis = st.multiselect(
-        "What are the main areas of investigation for research in the CS?",
-        (
-            "Biophysical modeling",
-            "Behavioural studies and stakeholder perception",
-            "Governance and policy",
-            "Economic",
-            "Other (please specify):",
-        ),
-    )
-    layers_of_analysis_other = ""
-    if "Other (please specify):" in layers_of_analysis:
-        layers_of_analysis_other = st.text_input("Please specify:", key="layers_of_analysis_other")
-
-    # SECTION 4: Modeling/Tools – Main simulation approaches and methodologies
-    st.header("Section 3: Modeling/Tools - Main simulation approaches and methodologies")
-
-    systems_analysis = st.multiselect(
-        "Systems analysis: Which of the following method(s) have you used?",
-        ("System Dynamics Modelling (SDM)",
-         "Multi-sectoral systems analysis",
-         "Material flows analysis",
-         "System informatics and analytics",
-         "Causal loop diagrams and system feedbacks",
-         "Mathematical/engineering modeling",
-         "Resource flows",
-         "Network analysis",
-         "Other (please specify)"),
-    )
-    systems_analysis_specify = ""
-    if "Other (please specify)" in systems_analysis:
-        systems_analysis_specify = st.text_input("Please specify:", key="systems_analysis_specify")
-    #added
-    integrated_modeling = st.multiselect(
-        "Integrated modelling: Which of the following method(s) have you used?",
-        ("SWAT (Soil and Water Assessment Tool)",
-         "CLEWS model (Climate, Land, Energy and Water Strategies)",
-         "SEWEM (System-Wide Economic-Water-Energy Model)",
-         "WEF Nexus tool 2.0",
-         "PRIMA (Platform for Regional Integrated Modeling and Analysis)",
-         "MCDA (Multi-Criteria Decision Analysis)",
-         "MuSIASEM (Multi-scale Integrated Analysis of Societal and Ecosystem Metabolism)",
-         "Integrated assessment models",
-         "Other (please specify)")
-    )
-    #added
-    integrated_modeling_specify = ""
-    if "Other (please specify)" in integrated_modeling:
-        integrated_modeling_specify = st.text_input("Please specify:", key="integrated_modeling_specify")
-    #added
-    environmental_management = st.multiselect(
-        "Environmental management: Which of the following method(s) have you used?",
-        ("Scenario analysis",
-         "Footprinting",
-         "Life Cycle Assessment",
-         "Decision Support System",
-         "Other (please specify)")
-    )
-    #added
-    environmental_management_specify = ""
-    if "Other (please specify)" in environmental_management:
-        environmental_management_specify = st.text_input("Please specify:", key="environmental_management_specify")
-    #added
-    economics = st.multiselect(
-        "Economics: Which of the following method(s) have you used?",
-        ("Cost-benefit analysis",
-         "Input-output analysis",
-         "Trade-off/Synergy analysis",
-         "Social accounting matrix",
-         "Value chain analysis",
-         "Supply chain analysis",
-         "Economic modelling",
-         "Other (please specify)")
-    )
-    #added
-    economics_specify = ""
-    if "Other (please specify)" in economics:
-        economics_specify = st.text_input("Please specify:", key="economics_specify")
-    #added
-    statistics = st.multiselect(
-        "Statistics: Which of the following method(s) have you used?",
-        ("Principal component analysis",
-         "Regression statistics",
-         "Trend analysis",
-         "Data mining",
-         "Other (please specify)")
-    )
-    #added
-    statistics_specify = ""
-    if "Other (please specify)" in statistics:
-        statistics_specify = st.text_input("Please specify:", key="statistics_specify")
-    #added
-    social_science = st.multiselect(
-        "Social science: Which of the following method(s) have you used?",
-        ("Institutional analysis",
-         "Questionnaires, surveys or interviews",
-         "Historical analysis",
-         "Agent-based modelling",
-         "Delphi technique",
-         "Critical discourse analysis",
-         "Stakeholder analysis",
-         "Participatory workshops/focus groups",
-         "Living labs",
-         "Policy analysis",
-         "Other (please specify)")
-    )
-    #added
-    social_science_specify = ""
-    if "Other (please specify)" in social_science:
-        social_science_specify = st.text_input("Please specify:", key="social_science_specify")
-
-    semantics_ontologies = st.selectbox(
-        "Did you perform work on ontology engineering?",
-        ("YES", "NO"),
-    )
-    semantics_ontologies_specify = ""
-    if semantics_ontologies == "YES":
-        semantics_ontologies_specify = st.text_input("If yes, please specify:", key="semantics_ontologies_specify")
-
-    footprint_calculations = st.selectbox(
-        "Did you perform any footprint calculations (Water, Energy, Nexus, etc.)?",
-        ("YES", "NO"),
-    )
-    footprint_calculations_specify = ""
-    if footprint_calculations == "YES":
-        footprint_calculations_specify = st.text_input("If yes, please specify:", key="footprint_calculations_specify")
-
-    decision_support_system = st.selectbox(
-    "Did you develop a Decision Support System?",
-    ("YES", "NO"),
-    )
-    decision_support_system_details = ""
-    if decision_support_system == "YES":
-        decision_support_system_details = st.text_area("If yes, please give more details:", key="decision_support_system_details")
-    #added
-    climate_projections = st.multiselect(
-        "Climate projections: Which of the following model(s) have you used?",
-        ("CAPRI",
-         "MAGPIE",
-         "E3ME",
-         "MAGNET",
-         "GLOBIO",
-         "SWAT",
-         "HYDROSIM",
-         "UWOT",
-         "WEAP",
-         "LEAP",
-         "Other (please specify)")
-    )
-    #added
-    climate_projections_specify = ""
-    if "Other (please specify)" in climate_projections:
-        climate_projections_specify = st.text_input("Please specify:", key="climate_projections_specify")
-    #added
-    data_types = st.multiselect(
-        "Data types: Which of the following data sources have you used?",
-        ("Lab test outputs",
-         "Field test outputs",
-         "Sensors",
-         "Literature",
-         "Model outputs",
-         "Qualitative",
-         "Publicly available platforms (OECD, FAO, EUROSTAT)",
-         "National statistics",
-         "Other (please specify)")
-    )
-    #added
-    data_types_specify = ""
-    if "Other (please specify)" in data_types:
-        data_types_specify = st.text_input("Please specify:", key="data_types_specify")
-    #added
-    ai_methodology = st.multiselect(
-    "Did you use Artificial Intelligence methodology?",
-    (
-    "Knowledge Elicitation Engine",
-    "Machine Learning",
-    "Deep Learning",
-    "Evolutionary Optimization Approaches",
-    "SWORM",
-    "Simulated Annealing",
-    "Agent Based Modeling",
-    "Other (specify)",
-    ),
-    )
-    ai_methodology_other = ""
-    if "Other (specify)" in ai_methodology:
-        ai_methodology_other = st.text_input("Please specify:",key='ai_methodology_other')
-    nexus_indicators = st.selectbox(
-    "Did you develop indicators/KPIs to assess the Nexus?",
-    ("YES", "NO"),
-    )
-    nexus_indicators_specify = ""
-    if nexus_indicators == "YES":
-        nexus_indicators_specify = st.text_area("If yes, please specify:", key="nexus_indicators_specify")
-    monitoring_techniques = st.multiselect(
-    "Did you use any monitoring techniques (e.g. near real-time, or other)?",
-    (
-    "Sensors",
-    "Satellite",
-    "Citizen Science",
-    "Crowd Sourcing",
-    "Web-scraping tools",
-    "Field visits/sampling",
-    "Other (please specify)"
-    ),
-    )
-    #added
-    monitoring_techniques_specify = ""
-    if "Other (please specify)" in monitoring_techniques:
-        monitoring_techniques_specify = st.text_input("Please specify:", key="monitoring_techniques_specify")
-    st.header("Section 4: Stakeholder Engagement")
-
-    stakeholders_involved = st.multiselect(
-    "Which stakeholders are involved in the case study? (as part of the 5tuple helix)",
-    (
-    "Private sector/business (industry, business, enterprises)",
-    "Governmental stakeholders/policy makers",
-    "Academia/research",
-    "Local citizens",
-    "Other (please specify)",
-    ),
-    )
-    stakeholders_involved_other = ""
-    if "Other (please specify)" in stakeholders_involved:
-        stakeholders_involved_other = st.text_input("Please specify:", key="stakeholders_involved_other")
-
-    stakeholder_sectors = st.multiselect(
-    "Which sector did the stakeholders belong to?",
-    (
-    "Agriculture/Farming",
-    "Energy",
-    "Water resources",
-    "Tourism",
-    "Media",
-    "Biodiversity and natural ecosystems",
-    "Education",
-    "Built environment/ construction",
-    "Climate crisis/ civil protection",
-    "Forestry",
-    "Economics/Finance (banks, commerce, investors)",
-    "Health",
-    "Transport and logistic",
-    "Culture",
-    "Social Sciences and Humanities",
-    "Other (please specify)",
-    ),
-    )
-    stakeholder_sectors_other = ""
-    if "Other (please specify)" in stakeholder_sectors:
-        stakeholder_sectors_other = st.text_input("Please specify:", key="stakeholder_sectors_other")
-    stakeholder_approach = st.multiselect(
-        "Which approach did you use to engage the stakeholders?",
-        (
-            "Living Lab",
-            "Stakeholder Mapping and engagement strategy",
-            "Multi stakeholder forum",
-            "Citizen Science",
-            "Scenario building",
-            "Community of Practice",
-            "Co-creation",
-            "Educational programs",
-            "Informing stakeholders after tool development",
-            "Training of local communities",
-            "Other (please specify)",
-        ),
-    )
-    stakeholder_approach_other = ""
-    if "Other (please specify)" in stakeholder_approach:
-        stakeholder_approach_other = st.text_input("Please specify:", key="stakeholder_approach_other")
-    #added
-    biggest_org = st.text_input("Which organization is/was the biggest actor affecting other organizations in the nexus?", key="biggest_org")
-    #added
-    biggest_org_sector = st.multiselect(
-        "Which sector did the biggest organization belong to?",
-        ("Water",
-         "Energy",
-         "Food",
-         "Ecosystems",
-         "Other")
-    )
-    biggest_org_sector_other = ""
-    if "Other" in biggest_org_sector:
-        biggest_org_sector_other = st.text_input("Please specify:", key="biggest_org_sector_other")
-    #added
-    biggest_org_engaged = st.selectbox("Is this organization engaged in the project?",
-                                       ("YES", "NO"))
-    #added
-    st.header("Section 5: Governance and Policy")
-    #added
-    governance_assessment = st.selectbox("Did you perform any governance assessment?",
-                                         ("YES", "NO"))
-    #added
-    governance_assessment_specify = ""
-    if governance_assessment == "YES":
-        governance_assessment_specify = st.text_input("If yes, please specify:",key = "governance_assessment_specify")
-    #added
-    policy_coherence_assessment = st.selectbox("Did you perform any Policy Coherence Assessment to identify policy gaps?",
-        ("YES", "NO"))
-    #added
-    policy_coherence_assessment_specify = ""
-    if policy_coherence_assessment == "YES":
-        policy_coherence_assessment_specify = st.text_input("If yes, please specify:",key = "policy_coherence_assessment_specify")
-    #added
-    important_drivers = st.multiselect(
-        "What are the most important drivers underpinning the Nexus challenges investigated?",
-        ("Governance",
-         "Technological",
-         "Cultural",
-         "Socio-economic",
-         "Biophysical",
-         "Other (please specify)")
-    )
-    #added
-    important_drivers_specify = ""
-    if "Other (please specify)" in important_drivers:
-        important_drivers_specify = st.text_input("Please specify:", key = "important_drivers_specify")
-    #added
-    policy_coproduction = st.selectbox(
-        "What was the level of co-production of policy solutions and recommendations?",
-        ("Solutions were derived by the research team",
-         "Solutions were derived by the research team and validated by stakeholders",
-         "Solutions were derived bottom-up by stakeholders",
-        )
-    )
-    #added
-    current_implementation = st.selectbox(
-        "Are the solutions and recommendations currently being implemented?",
-        ("All solutions and recommendations have been implemented",
-         "Some solutions and recommendations have been implemented",
-         "None of the solutions and recommendations have been implemented",
-    )
-    )
-    #added
-    solutions_financing = st.selectbox(
-        "How were the solutions and recommendations financed?",
-        ("Public funding",
-         "Private funding",
-         "Public-private funding",
-         "Other (please specify)")
-    )
-    #added
-    solutions_financing_specify = ""
-    if "Other (please specify)" in solutions_financing:
-        solutions_financing_specify = st.text_input("Please specify:", key = "solutions_financing_specify")
-    #added
-    governance_challenges = st.text_area("What are the main governance challenges in relation to nexus that you faced in the case study?", key = "governance_challenges")
-    #added
-    governance_lessons = st.text_area("What are the main lessons learned in relation to governance and nexus?", key = "governance_lessons")
-    st.header("Section 6: Project Outputs")
-
-    # Question 32
-    visualization_options = {
-        "a": "Dashboard",
-        "b": "Decision support tools",
-        "c": "Online market place",
-        "d": "Augmented reality/Virtual reality",
-        "e": "Serious games",
-        "f": "Training material",
-        "g": "Open access database",
-        "h": "Mobile/tablet application",
-        "i": "Other (please specify)",
-    }
-    visualization_choice = st.multiselect("Did you develop any visualization of the results?",
-                                          (list(visualization_options.values())))
-    visualization_choice_other = ""
-    if "Other (please specify)" in visualization_choice:
-        visualization_choice_other = st.text_input("Please specify:", key="visualization_choice_other")
-    # Question 33
-    sdg_assessment = st.selectbox("Did you perform any SDG's assessment?", ["YES", "NO"])
-
-    # Question 34
-    selected_sdgs = ""
-    if sdg_assessment == "YES":
-        sdgs = [
-            "SDG 1: No Poverty",
-            "SDG 2: Zero Hunger",
-            "SDG 3: Good Health and Well-being",
-            "SDG 4: Quality Education",
-            "SDG 5: Gender Equality",
-            "SDG 6: Clean Water and Sanitation",
-            "SDG 7: Affordable and Clean Energy",
-            "SDG 8: Decent Work and Economic Growth",
-            "SDG 9: Industry, Innovation, and Infrastructure",
-            "SDG 10: Reduced Inequalities",
-            "SDG 11: Sustainable Cities and Communities",
-            "SDG 12: Responsible Consumption and Production",
-            "SDG 13: Climate Action",
-            "SDG 14: Life Below Water",
-            "SDG 15: Life on Land",
-            "SDG 16: Peace, Justice, and Strong Institutions",
-            "SDG 17: Partnerships for the Goals",
-        ]
-
-        selected_sdgs = st.multiselect("If yes, please select which SDGs did you assess:", options=sdgs)
-    #added
-        sdg_assessment_method = st.text_input("What was the method used for SDG assessment?", key = "sdg_assessment_method")
-    # Question 35
-    data_mgmt_plan = st.selectbox("Did you implement a Data Management Plan (e.g Knowledge Graph, dashboard)?", ["YES", "NO"])
-
-    # Question 35a
-    data_mgmt_plan_specify = ""
-    if data_mgmt_plan == 'YES':
-        data_mgmt_plan_specify = st.text_input("If yes, please specify:", key="data_mgmt_plan_specify")
-    st.header("Section 7: Project After Life (Exploitation and Sustainability of the Solutions)")
-
-    # Question 36
-    outputs_options = {
-        "a": "Creation of stakeholder networks",
-        "b": "Teaching",
-        "c": "Basis/ideas for a new scientific project",
-        "d": "Citizen science platform/app",
-        "e": "Serious game",
-        "f": "Dashboard",
-        "g": "Knowledge graph",
-        "h": "Data inventory",
-    }
-    outputs_choice = st.multiselect("What kind of outputs did the case study develop?", options=list(outputs_options.values()))
-
-    # Question 37
-    usage_options = {
-        "a": "For planning and management",
-        "b": "For research purposes",
-        "c": "For advancing the technology readiness level of solutions",
-        "d": "For commercialization of solutions",
-        "e": "For education purposes",
-        "f": "For teaching purposes",
-        "g": "The results have not been used so far but actions are being taken",
-        "h": "The results are not used and there is no action in place to use them",
-        "i": "Other purposes (please specify)",
-    }
-    usage_choice = st.multiselect("How have the outputs of the project been used?", options=list(usage_options.values()), key="usage_choice")
-
-    usage_other_purpose = ""
-    if "Other purposes (please specify)" in usage_choice:
-        usage_other_purpose = st.text_input("Please specify the other purpose:", key="other_purpose")
-
-    # Question 38
-    helix_categories = {
-        "j": "Academia",
-        "k": "Government",
-        "l": "Industry",
-        "m": "Civil society",
-        "n": "Nature conservation organizations",
-        "o": "Others (please specify)",
-    }
-    helix_choice = st.multiselect("When used, who used the results (Helix categorization)?", options=list(helix_categories.values()), key="helix_choice")
-
-    other_helix = ""
-    if "Others (please specify)" in helix_choice:
-        other_helix = st.text_input("Please specify the other user:", key="other_helix")
-
-    # Question 39
-    impact_categories = {
-        "1": "Scientific impact",
-        "2": "Technological impact",
-        "3": "Economic impact",
-        "4": "Social impact",
-        "5": "Political impact",
-        "6": "Environmental impact",
-        "7": "Health impact",
-        "8": "Cultural impact",
-        "9": "Training impacts",
-    }
-    selected_impacts = st.multiselect("Did the project have any/multiple of the following impacts?", options=list(impact_categories.values()), key="impacts")
-
-    # Question 40
-    impact_description = st.text_area("Please briefly illustrate the impact(s) achieved:", key="impact_description")
-
-    if st.button("Submit Case Study Data"):
-        case_study_data_specify = {
-            'case_study_scale_other':case_study_scale_other,
-            'nexus_sectors_other':nexus_sectors_other,
-            'layers_of_analysis_other':layers_of_analysis_other,
-            'systems_analysis_specify':systems_analysis_specify,
-            'integrated_modeling_specify':integrated_modeling_specify,
-            'environmental_management_specify':environmental_management_specify,
-            'economics_specify':economics_specify,
-            'statistics_specify':statistics_specify,
-            'social_science_specify':social_science_specify,
-            'climate_projections_specify':climate_projections_specify,
-            'semantics_ontologies_specify':semantics_ontologies_specify,
-            'footprint_calculations_specify':footprint_calculations_specify,
-            'decision_support_system_details':decision_support_system_details,
-            'data_types_specify':data_types_specify,
-            'ai_methodology_other':ai_methodology_other,
-            'nexus_indicators_specify':nexus_indicators_specify,
-            'monitoring_techniques_specify':monitoring_techniques_specify,
-            'stakeholders_involved_other':stakeholders_involved_other,
-            'stakeholder_sectors_other':stakeholder_sectors_other,
-            'stakeholder_approach_other':stakeholder_approach_other,
-            'biggest_org_sector_other':biggest_org_sector_other,
-            'governance_assessment_specify':governance_assessment_specify,
-            'policy_coherence_assessment_specify':policy_coherence_assessment_specify,
-            'important_drivers_specify':important_drivers_specify,
-            'solutions_financing_specify':solutions_financing_specify,
-            'visualization_choice_other':visualization_choice_other,
-            'data_mgmt_plan_specify':data_mgmt_plan_specify,
-            'usage_other_purpose':usage_other_purpose,
-            'other_helix':other_helix,
-        }
+            ),
+                key="stakeholder_sectors",
+            )
+            stakeholder_sectors_other = answer(st.text_input, "Please specify:", key="stakeholder_sectors_other")
+            stakeholder_approach = answer(st.multiselect,
+                "Which approach did you use to engage the stakeholders?",
+                (
+                    "Living Lab",
+                    "Stakeholder Mapping and engagement strategy",
+                    "Multi stakeholder forum",
+                    "Citizen Science",
+                    "Scenario building",
+                    "Community of Practice",
+                    "Co-creation",
+                    "Educational programs",
+                    "Informing stakeholders after tool development",
+                    "Training of local communities",
+                    "Other (please specify)",
+                ),
+                key="stakeholder_approach",
+            )
+            stakeholder_approach_other = answer(st.text_input, "Please specify:", key="stakeholder_approach_other")
+            #added
+            biggest_org = answer(st.text_input, "Which organization is/was the biggest actor affecting other organizations in the nexus?", key="biggest_org")
+            #added
+            biggest_org_sector = answer(st.multiselect,
+                "Which sector did the biggest organization belong to?",
+                ("Water",
+                 "Energy",
+                 "Food",
+                 "Ecosystems",
+                 "Other"),
+                key="biggest_org_sector",
+            )
+            biggest_org_sector_other = answer(st.text_input, "Please specify:", key="biggest_org_sector_other")
+            #added
+            biggest_org_engaged = answer(st.selectbox, "Is this organization engaged in the project?",
+                                               ("YES", "NO"), key="biggest_org_engaged")
+            #added
+        elif section == 4:
+            #added
+            governance_assessment = answer(st.selectbox, "Did you perform any governance assessment?",
+                                                 ("YES", "NO"), key="governance_assessment")
+            #added
+            governance_assessment_specify = answer(st.text_input, "If yes, please specify:",key = "governance_assessment_specify")
+            #added
+            policy_coherence_assessment = answer(st.selectbox, "Did you perform any Policy Coherence Assessment to identify policy gaps?",
+                ("YES", "NO"), key="policy_coherence_assessment")
+            #added
+            policy_coherence_assessment_specify = answer(st.text_input, "If yes, please specify:",key = "policy_coherence_assessment_specify")
+            #added
+            important_drivers = answer(st.multiselect,
+                "What are the most important drivers underpinning the Nexus challenges investigated?",
+                ("Governance",
+                 "Technological",
+                 "Cultural",
+                 "Socio-economic",
+                 "Biophysical",
+                 "Other (please specify)"),
+                key="important_drivers",
+            )
+            #added
+            important_drivers_specify = answer(st.text_input, "Please specify:", key = "important_drivers_specify")
+            #added
+            policy_coproduction = answer(st.selectbox,
+                "What was the level of co-production of policy solutions and recommendations?",
+                ("Solutions were derived by the research team",
+                 "Solutions were derived by the research team and validated by stakeholders",
+                 "Solutions were derived bottom-up by stakeholders",
+                ),
+                key="policy_coproduction",
+            )
+            #added
+            current_implementation = answer(st.selectbox,
+                "Are the solutions and recommendations currently being implemented?",
+                ("All solutions and recommendations have been implemented",
+                 "Some solutions and recommendations have been implemented",
+                 "None of the solutions and recommendations have been implemented",
+            ),
+                key="current_implementation",
+            )
+            #added
+            solutions_financing = answer(st.selectbox,
+                "How were the solutions and recommendations financed?",
+                ("Public funding",
+                 "Private funding",
+                 "Public-private funding",
+                 "Other (please specify)"),
+                key="solutions_financing",
+            )
+            #added
+            solutions_financing_specify = answer(st.text_input, "Please specify:", key = "solutions_financing_specify")
+            #added
+            governance_challenges = answer(st.text_area, "What are the main governance challenges in relation to nexus that you faced in the case study?", key = "governance_challenges")
+            #added
+            governance_lessons = answer(st.text_area, "What are the main lessons learned in relation to governance and nexus?", key = "governance_lessons")
+        elif section == 5:
+
+            # Question 32
+            visualization_options = {
+                "a": "Dashboard",
+                "b": "Decision support tools",
+                "c": "Online market place",
+                "d": "Augmented reality/Virtual reality",
+                "e": "Serious games",
+                "f": "Training material",
+                "g": "Open access database",
+                "h": "Mobile/tablet application",
+                "i": "Other (please specify)",
+            }
+            visualization_choice = answer(st.multiselect, "Did you develop any visualization of the results?",
+                                                  (list(visualization_options.values())), key="visualization_choice")
+            visualization_choice_other = answer(st.text_input, "Please specify:", key="visualization_choice_other")
+            # Question 33
+            sdg_assessment = answer(st.selectbox, "Did you perform any SDG's assessment?", ["YES", "NO"], key="sdg_assessment")
+
+            # Question 34
+            sdgs = [
+                "SDG 1: No Poverty",
+                "SDG 2: Zero Hunger",
+                "SDG 3: Good Health and Well-being",
+                "SDG 4: Quality Education",
+                "SDG 5: Gender Equality",
+                "SDG 6: Clean Water and Sanitation",
+                "SDG 7: Affordable and Clean Energy",
+                "SDG 8: Decent Work and Economic Growth",
+                "SDG 9: Industry, Innovation, and Infrastructure",
+                "SDG 10: Reduced Inequalities",
+                "SDG 11: Sustainable Cities and Communities",
+                "SDG 12: Responsible Consumption and Production",
+                "SDG 13: Climate Action",
+                "SDG 14: Life Below Water",
+                "SDG 15: Life on Land",
+                "SDG 16: Peace, Justice, and Strong Institutions",
+                "SDG 17: Partnerships for the Goals",
+            ]
+
+            selected_sdgs = answer(st.multiselect, "If yes, please select which SDGs did you assess:", options=sdgs, key="selected_sdgs")
+            #added
+            sdg_assessment_method = answer(st.text_input, "What was the method used for SDG assessment?", key = "sdg_assessment_method")
+            # Question 35
+            data_mgmt_plan = answer(st.selectbox, "Did you implement a Data Management Plan (e.g Knowledge Graph, dashboard)?", ["YES", "NO"], key="data_mgmt_plan")
+
+            # Question 35a
+            data_mgmt_plan_specify = answer(st.text_input, "If yes, please specify:", key="data_mgmt_plan_specify")
+        elif section == 6:
+            # Question 36
+            outputs_options = {
+                "a": "Creation of stakeholder networks",
+                "b": "Teaching",
+                "c": "Basis/ideas for a new scientific project",
+                "d": "Citizen science platform/app",
+                "e": "Serious game",
+                "f": "Dashboard",
+                "g": "Knowledge graph",
+                "h": "Data inventory",
+            }
+            outputs_choice = answer(st.multiselect, "What kind of outputs did the case study develop?", options=list(outputs_options.values()), key="outputs_choice")
+
+            # Question 37
+            usage_options = {
+                "a": "For planning and management",
+                "b": "For research purposes",
+                "c": "For advancing the technology readiness level of solutions",
+                "d": "For commercialization of solutions",
+                "e": "For education purposes",
+                "f": "For teaching purposes",
+                "g": "The results have not been used so far but actions are being taken",
+                "h": "The results are not used and there is no action in place to use them",
+                "i": "Other purposes (please specify)",
+            }
+            usage_choice = answer(st.multiselect, "How have the outputs of the project been used?", options=list(usage_options.values()), key="usage_choice")
+
+            usage_other_purpose = answer(st.text_input, "Please specify the other purpose:", key="usage_other_purpose")
+
+            # Question 38
+            helix_categories = {
+                "j": "Academia",
+                "k": "Government",
+                "l": "Industry",
+                "m": "Civil society",
+                "n": "Nature conservation organizations",
+                "o": "Others (please specify)",
+            }
+            helix_choice = answer(st.multiselect, "When used, who used the results (Helix categorization)?", options=list(helix_categories.values()), key="helix_choice")
+
+            other_helix = answer(st.text_input, "Please specify the other user:", key="other_helix")
+
+            # Question 39
+            impact_categories = {
+                "1": "Scientific impact",
+                "2": "Technological impact",
+                "3": "Economic impact",
+                "4": "Social impact",
+                "5": "Political impact",
+                "6": "Environmental impact",
+                "7": "Health impact",
+                "8": "Cultural impact",
+                "9": "Training impacts",
+            }
+            selected_impacts = answer(st.multiselect, "Did the project have any/multiple of the following impacts?", options=list(impact_categories.values()), key="selected_impacts")
+
+            # Question 40
+            impact_description = answer(st.text_area, "Please briefly illustrate the impact(s) achieved:", key="impact_description")
+
+
+        back_col, next_col = st.columns(2)
+        back_col.form_submit_button("Back", on_click=save_section, args=(-1,), disabled=section == 0)
+        if section < len(CASE_STUDY_SECTIONS) - 1:
+            next_col.form_submit_button("Next", on_click=save_section, args=(1,))
+            case_study_submitted = False
+        else:
+            case_study_submitted = next_col.form_submit_button("Submit Case Study Data", on_click=save_section, args=(0,))
+
+    if case_study_submitted:
+        answers = st.session_state['case_study_answers']
+        case_study_data_specify = {key: answers.get(key, "") if chosen(answers, field, option) else ""
+                                   for key, (field, option) in SPECIFY_FIELDS.items()}
+        case_study_has_location = bool(answers.get('case_study_latitude') or answers.get('case_study_longitude'))
         case_study_data = {
-            'name': case_study_name,
-            'Country': case_study_country,
-            #'latitude':case_study_latitude,
-            #'longitude':case_study_longitude,
-            'Scale': case_study_scale,
-            'Transboundary': case_study_transboundary,
-            'Objectives': case_study_objectives,
-            'NexusSectors': nexus_sectors,
-            'LayersOfAnalysis': layers_of_analysis,
-            'SystemsAnalysis': systems_analysis_specify,
-            'IntegratedModeling': integrated_modeling,
-            'EnvironmentalManagement': environmental_management,
-            'Economics': economics,
-            'Statistics': statistics,
-            'SocialScience': social_science,
-            'ClimateProjections': climate_projections,
-            'DataTypes': data_types,
-            'AIMethodology': ai_methodology,
+            'name': answers.get('case_study_name'),
+            'Country': answers.get('case_study_country'),
+            'latitude': float(answers['case_study_latitude']) if case_study_has_location else "",
+            'longitude': float(answers['case_study_longitude']) if case_study_has_location else "",
+            'Scale': answers.get('case_study_scale'),
+            'Transboundary': answers.get('case_study_transboundary'),
+            'Objectives': answers.get('case_study_objectives'),
+            'NexusSectors': answers.get('nexus_sectors'),
+            'LayersOfAnalysis': answers.get('layers_of_analysis'),
+            'SystemsAnalysis': case_study_data_specify['systems_analysis_specify'],
+            'IntegratedModeling': answers.get('integrated_modeling'),
+            'EnvironmentalManagement': answers.get('environmental_management'),
+            'Economics': answers.get('economics'),
+            'Statistics': answers.get('statistics'),
+            'SocialScience': answers.get('social_science'),
+            'ClimateProjections': answers.get('climate_projections'),
+            'DataTypes': answers.get('data_types'),
+            'AIMethodology': answers.get('ai_methodology'),
             #'ClimateProjYears': climate_projections_years,
             #'ExistingModels': existing_models_specify,
             #'LifeCycleAssessment': lifecycle_assessment_approach,
-            'MonitoringTechniques': monitoring_techniques,
-            'Stakeholders': stakeholders_involved,
-            'StakeholderSectors': stakeholder_sectors,
-            'StakeholderApproach': stakeholder_approach,
-            'ImportantDrivers': important_drivers,
-            'SolutionsFinancing': solutions_financing,
-            'GovernanceChallenges': governance_challenges,
-            'GovernanceLessons': governance_lessons,
-            'MostImpactfulOrg': biggest_org,
-            'MostImpactfulOrgSector': biggest_org_sector,
-            'MostImpactfulOrgEngaged': biggest_org_engaged,
-            'Visualization': visualization_choice,
-            'SDGs': selected_sdgs,
-            'CaseStudyOutputs': outputs_choice,
-            'Usage': usage_choice,
-            'Helix': helix_choice,
-            'Impacts': selected_impacts,
-            'ImpactDescription': impact_description,
-            'PolicyCoProduction': policy_coproduction,
-            'CurrentImplementation': current_implementation
+            'MonitoringTechniques': answers.get('monitoring_techniques'),
+            'Stakeholders': answers.get('stakeholders_involved'),
+            'StakeholderSectors': answers.get('stakeholder_sectors'),
+            'StakeholderApproach': answers.get('stakeholder_approach'),
+            'ImportantDrivers': answers.get('important_drivers'),
+            'SolutionsFinancing': answers.get('solutions_financing'),
+            'GovernanceChallenges': answers.get('governance_challenges'),
+            'GovernanceLessons': answers.get('governance_lessons'),
+            'MostImpactfulOrg': answers.get('biggest_org'),
+            'MostImpactfulOrgSector': answers.get('biggest_org_sector'),
+            'MostImpactfulOrgEngaged': answers.get('biggest_org_engaged'),
+            'Visualization': answers.get('visualization_choice'),
+            'SDGs': answers.get('selected_sdgs') if answers.get('sdg_assessment') == "YES" else "",
+            'CaseStudyOutputs': answers.get('outputs_choice'),
+            'Usage': answers.get('usage_choice'),
+            'Helix': answers.get('helix_choice'),
+            'Impacts': answers.get('selected_impacts'),
+            'ImpactDescription': answers.get('impact_description'),
+            'PolicyCoProduction': answers.get('policy_coproduction'),
+            'CurrentImplementation': answers.get('current_implementation')
         }
         for key, value in case_study_data_specify.items():
             if value:
                 case_study_data[key] = value
         case_study_leader_data = {
-                'name':case_study_leader_name,
-                'ContactMail':case_study_leader_contact,
-                'HostInstitution':case_study_leader_institution,
+                'name':answers.get('case_study_leader_name') or '',
+                'ContactMail':answers.get('case_study_leader_contact'),
+                'HostInstitution':answers.get('case_study_leader_institution') or '',
         }
-        create_case_study_node(case_study_data,
+        submit_case_study_info(case_study_data,
                                case_study_leader_data,
-        case_study_project, case_study_leader_institution)
+        answers.get('case_study_project'), answers.get('case_study_leader_institution') or '')
+        st.session_state['case_study_answers'] = {}
+        st.session_state['case_study_section'] = 0
+        st.session_state['reruns_at_last_submission'] = st.session_state['rerun_count']
         st.success("Case Study Data Submitted Successfully!")
 
 # if selection == "Modify Nodes":
@@ -818,7 +847,130 @@ if selection == 'New Case Study':
 #     if st.button("Modify Node"):
 #         modify_node_attribute(label_selection, node_name_selection, node_attribute_to_modify, new_attribute_value)
 #         st.success("Node Modified Successfully!")
-# st.header("All Data Nodes")
-# all_nodes = get_all_nodes()
-# for node in all_nodes:
-#     st.write(node)
+
+if selection == 'Search Case Studies':
+    st.header("Search Case Studies")
+    # Options come from the (cached) unfiltered aggregates. The filters are
+    # already in session state, so on a cache miss both searches run
+    # concurrently.
+    search_filters = {facet: st.session_state.get(f"search_{facet}", []) for facet in FACETS}
+    if snapshot.active():
+        all_facets = search_case_studies()['facets']
+        search_result = search_case_studies(search_filters)
+    else:
+        searches = run_cached({'all': search_load(), 'filtered': search_load(search_filters)},
+                              timeout=float(get_setting('PAGE_QUERY_TIMEOUT', 10)), name='app.search')
+        all_facets, search_result = searches['all']['facets'], searches['filtered']
+    for facet in FACETS:
+        st.multiselect(facet, options=list(all_facets[facet]), key=f"search_{facet}")
+    st.subheader(f"{search_result['total']} matching case studies")
+    with st.expander("Counts per facet"):
+        for facet, counts in search_result['facets'].items():
+            st.write(facet, counts)
+    st.dataframe(pd.DataFrame(search_result['results']))
+    factsheet_options = {f"{x['name']} ({x['project']})": x['id'] for x in search_result['results']}
+    if factsheet_options:
+        factsheet_choice = st.selectbox("Factsheet", options=list(factsheet_options), key="factsheet_choice")
+        factsheet_data = fetch_factsheet_data(factsheet_options[factsheet_choice])
+        if factsheet_data:
+            st.download_button("Download factsheet", data=render_factsheet(factsheet_data[0], 'html'),
+                               file_name=f"{factsheet_choice}.html", mime="text/html")
+
+if selection == 'Case Study Map':
+    st.header("Case Study Map")
+    map_zoom = st.slider("Zoom", min_value=0, max_value=MAX_ZOOM, value=2, key="map_zoom")
+    map_south, map_north = st.slider("Latitude range", -90.0, 90.0, (-90.0, 90.0), key="map_lat")
+    map_west, map_east = st.slider("Longitude range", -180.0, 180.0, (-180.0, 180.0), key="map_lon")
+    map_clusters = get_clusters(map_zoom, map_south, map_west, map_north, map_east)
+    if map_clusters:
+        map_df = pd.DataFrame(map_clusters)
+        # Marker radius in metres: about a cluster cell wide, growing with the count.
+        map_df['radius'] = 1_000_000 / 2 ** map_zoom * map_df['count'] ** 0.5
+        st.map(map_df, latitude='latitude', longitude='longitude', size='radius', zoom=map_zoom)
+    st.caption(f"{sum(c['count'] for c in map_clusters)} case studies in {len(map_clusters)} clusters")
+
+if selection == 'Browse Data':
+    st.header("All Data Nodes")
+    # The label list and the page do not depend on each other, so both are
+    # fetched concurrently using the selection from the previous run.
+    browse_label = st.session_state.get('browse_label', 'All')
+    browse_page_size = st.session_state.get('browse_page_size', 25)
+    # Cursors of the pages visited so far, so "Previous" needs no offset scan.
+    if st.session_state.get('browse_key') != (browse_label, browse_page_size):
+        st.session_state['browse_key'] = (browse_label, browse_page_size)
+        st.session_state['browse_cursors'] = [None]
+    cursors = st.session_state['browse_cursors']
+    if snapshot.active():
+        # Browsing covers the snapshot's labels and never touches Neo4j.
+        browse_labels = snapshot.LABELS
+        nodes, next_cursor = snapshot.current().node_page(None if browse_label == 'All' else browse_label,
+                                                          cursors[-1], browse_page_size)
+    else:
+        browse_results = run_queries({
+            'labels': ("CALL db.labels() YIELD label RETURN label", None),
+            'page': node_page_query(None if browse_label == 'All' else browse_label, cursors[-1], browse_page_size),
+        }, timeout=float(get_setting('PAGE_QUERY_TIMEOUT', 10)), name='app.browse')
+        browse_labels = [x['label'] for x in browse_results['labels']]
+        nodes, next_cursor = parse_node_page(browse_results['page'], browse_page_size)
+    st.selectbox("Label", options=['All'] + browse_labels, key="browse_label")
+    st.selectbox("Nodes per page", options=[25, 50, 100], key="browse_page_size")
+    for node in nodes:
+        st.write(node)
+    st.caption(f"Page {len(cursors)}")
+    previous_col, next_col = st.columns(2)
+    if previous_col.button("Previous", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    if next_col.button("Next", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
+    st.subheader("Export")
+    export_format = st.selectbox("Format", options=FORMATS, key="export_format")
+    if st.button("Prepare export"):
+        with st.spinner("Exporting nodes and relationships..."):
+            export_data = export_zip(export_format)
+        st.download_button("Download export", data=export_data, file_name=f"graph_export_{export_format}.zip",
+                           mime="application/zip")
+
+if selection == 'Statistics':
+    st.header("Case Study Statistics")
+    stats_cube = stats.get_cube()
+    st.caption(f"{stats_cube.total} case studies")
+    stats_field = st.selectbox("Answer", options=stats.FIELDS, key="stats_field")
+    st.bar_chart(stats_cube.counts(stats_field))
+    st.subheader("Case studies per sector and country")
+    st.dataframe(stats_cube.crosstab('Country', 'NexusSectors'))
+    st.subheader("SDG co-occurrence")
+    st.dataframe(stats_cube.cooccurrence('SDGs'))
+    st.subheader("Method usage by funding programme")
+    st.dataframe(stats_cube.method_usage('FundedBy'))
+    st.subheader("Cross-tab")
+    rows_col, columns_col = st.columns(2)
+    stats_rows = rows_col.selectbox("Rows", options=stats.FIELDS, key="stats_rows")
+    stats_columns = columns_col.selectbox("Columns", options=stats.FIELDS, index=1, key="stats_columns")
+    st.dataframe(stats_cube.crosstab(stats_rows, stats_columns))
+    st.subheader("Most central institutions")
+    central = network.stored_top('Institution', 20)
+    if central.empty:
+        st.info("No network scores yet. Run `python network.py --write` to compute them.")
+    else:
+        st.caption(f"Scores computed {pd.to_datetime(central['scoresUpdatedAt'].max(), unit='ms'):%Y-%m-%d %H:%M} UTC")
+        st.dataframe(central[['name'] + network.SCORE_COLUMNS], hide_index=True)
+
+if selection == 'Query Metrics':
+    st.header("Query Metrics")
+    query_metrics = metrics.snapshot()
+    st.dataframe(pd.DataFrame([
+        {'query': name, 'calls': query_stats['count'], 'mean ms': query_stats['total_ms'] / query_stats['count'],
+         'max ms': query_stats['max_ms'], 'rows': query_stats['rows'], 'server ms': query_stats['server_ms'], 'db hits': query_stats['db_hits']}
+        for name, query_stats in query_metrics['queries'].items()
+    ]))
+    st.subheader(f"Slow queries (>= {query_metrics['slow_query_ms']:.0f} ms)")
+    st.dataframe(pd.DataFrame(query_metrics['slow_queries']))
+    st.subheader("Caches")
+    st.write(all_cache_stats())
+    st.subheader("Read snapshot")
+    st.write(snapshot.snapshot_status())
+    json_col, prometheus_col = st.columns(2)
+    json_col.download_button("Download JSON", data=metrics.to_json(), file_name="query_metrics.json", mime="application/json")
+    prometheus_col.download_button("Download Prometheus text", data=metrics.to_prometheus(), file_name="query_metrics.prom", mime="text/plain")
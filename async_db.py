@@ -0,0 +1,110 @@
+import time
+import asyncio
+import atexit
+import threading
+from neo4j import AsyncGraphDatabase, basic_auth
+from db import get_setting
+import metrics
+
+# The async driver lives on one background event loop per process. Streamlit
+# code stays synchronous and hands whole batches of independent queries to
+# that loop through run_queries(), which runs them concurrently.
+_loop = None
+_driver = None
+_lock = threading.Lock()
+
+
+def _start_loop():
+    global _loop
+    _loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=_loop.run_forever, name='neo4j-async', daemon=True)
+    thread.start()
+
+
+def _create_driver():
+    return AsyncGraphDatabase.driver(
+        get_setting('NEO4J_URI'),
+        auth=basic_auth(get_setting('NEO4J_USER'), get_setting('NEO4J_PASSWORD')),
+        max_connection_pool_size=int(get_setting('NEO4J_MAX_POOL_SIZE', 50)),
+        connection_acquisition_timeout=float(get_setting('NEO4J_ACQUISITION_TIMEOUT', 30)),
+        max_connection_lifetime=float(get_setting('NEO4J_MAX_CONNECTION_LIFETIME', 3600)),
+    )
+
+
+def _ensure_started():
+    global _driver
+    if _driver is None:
+        with _lock:
+            if _driver is None:
+                _start_loop()
+                _driver = _create_driver()
+
+
+async def fetch(query, parameters=None, timeout=None, name=None):
+    async def work():
+        start = time.perf_counter()
+        async with _driver.session() as session:
+            result = await session.run(query, parameters)
+            records = await result.data()
+            summary = await result.consume()
+        metrics.record(name or 'async_db.fetch', query, (time.perf_counter() - start) * 1000, len(records), summary)
+        return records
+    return await asyncio.wait_for(work(), timeout)
+
+
+async def gather_queries(queries, timeout=None, total_timeout=None, name='async_db.gather_queries'):
+    # queries: key -> (query, parameters). Each is recorded in the metrics as
+    # "<name>.<key>". A query that fails or times out yields its exception
+    # without cancelling the others; hitting total_timeout cancels every query
+    # still in flight and raises asyncio.TimeoutError.
+    names = list(queries)
+    results = await asyncio.wait_for(
+        asyncio.gather(*(fetch(*queries[key], timeout=timeout, name=f'{name}.{key}') for key in names),
+                       return_exceptions=True),
+        total_timeout)
+    return dict(zip(names, results))
+
+
+def run_queries(queries, timeout=None, total_timeout=None, name=None):
+    # The keys of `queries` are only unique per call, so metrics are recorded
+    # under `name` (the caller by default) plus the key.
+    name = name or metrics.caller_name()
+    _ensure_started()
+    # Timeouts are applied on the loop, so the exceptions raised here are
+    # asyncio.TimeoutError on every Python version.
+    results = asyncio.run_coroutine_threadsafe(gather_queries(queries, timeout, total_timeout, name), _loop).result()
+    for result in results.values():
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
+
+def run_cached(loads, timeout=None, total_timeout=None, name=None):
+    # loads: load -> (cache, key, query, parameters, parse). Cache hits are
+    # served as they are; the misses run concurrently in one run_queries call
+    # and their parsed results are cached.
+    name = name or metrics.caller_name()
+    results, misses = {}, {}
+    for load, (cache, key, query, parameters, _) in loads.items():
+        hit, value = cache.peek(key)
+        if hit:
+            results[load] = value
+        else:
+            misses[load] = (query, parameters)
+    if misses:
+        for load, records in run_queries(misses, timeout, total_timeout, name).items():
+            cache, key, _, _, parse = loads[load]
+            results[load] = cache.put(key, parse(records))
+    return results
+
+
+def close():
+    global _driver
+    with _lock:
+        if _driver is not None:
+            asyncio.run_coroutine_threadsafe(_driver.close(), _loop).result(10)
+            _loop.call_soon_threadsafe(_loop.stop)
+            _driver = None
+
+
+atexit.register(close)
@@ -0,0 +1,353 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import numpy as np
+import pandas as pd
+from cordis import CordisStore
+from db import run_query, run_write, close_driver
+from schema import ensure_schema
+from import_cordis import IMPORT_QUERY
+from projects import write_project, DuplicateProjectError
+from casestudies import LIST_FIELDS, normalize_case_study_info, write_case_studies
+
+# Seeded synthetic NEXUSNET data and timings for the data-access paths behind
+# create_project_node, create_case_study_node, get_all_projects,
+# check_project_exists_with_same_name and fetch_project_data. The same seed and
+# scale always produce the same dataset, so result files are comparable.
+SCALES = {'1k': 1_000, '10k': 10_000, '100k': 100_000}
+
+COUNTRIES = ['Greece', 'Italy', 'Spain', 'Germany', 'France', 'Netherlands', 'Portugal', 'Cyprus',
+             'Austria', 'Sweden', 'Poland', 'Romania', 'Belgium', 'Denmark', 'Finland', 'Ireland']
+CITIES = ['Patras', 'Athens', 'Milan', 'Madrid', 'Berlin', 'Lyon', 'Delft', 'Lisbon', 'Nicosia', 'Vienna']
+ACTIVITY_TYPES = ['HES', 'REC', 'PRC', 'PUB', 'OTH']
+PROGRAMMES = ['HORIZON 2020', 'HORIZON EUROPE']
+SCALE_OPTIONS = ['International', 'National', 'State', 'Regional', 'Subregional', 'River basin district',
+                 'Municipality/city']
+TRANSBOUNDARY_OPTIONS = ['No', 'Transboundary between countries', 'Transboundary between regions']
+INSTITUTION_WORDS = ['University', 'Institute', 'Centre', 'Agency', 'Foundation', 'Laboratory', 'Council']
+TOPIC_WORDS = ['Water', 'Energy', 'Food', 'Climate', 'Soil', 'Land', 'Ecosystem', 'Nexus', 'Resource', 'Basin']
+FIRST_NAMES = ['Maria', 'Giorgos', 'Anna', 'Luca', 'Elena', 'Jan', 'Sofia', 'Pedro', 'Eva', 'Nikos', 'Ines', 'Karl']
+LAST_NAMES = ['Papadopoulos', 'Rossi', 'Garcia', 'Muller', 'Dubois', 'de Vries', 'Silva', 'Nowak', 'Lind',
+              'Ionescu', 'Murphy', 'Jensen', 'Virtanen', 'Georgiou']
+
+# Answer options for the multi-select questions, as offered by the form.
+LIST_OPTIONS = {
+    'NexusSectors': ['Water', 'Food', 'Energy', 'Land Use / Land Availability', 'Ecosystem and/or/Biodiversity',
+                     'Climate', 'Soil', 'Waste', 'Health'],
+    'LayersOfAnalysis': ['Biophysical modeling', 'Behavioural studies and stakeholder perception',
+                         'Governance and policy', 'Economic'],
+    'IntegratedModeling': ['SWAT (Soil and Water Assessment Tool)',
+                           'CLEWS model (Climate, Land, Energy and Water Strategies)',
+                           'SEWEM (System-Wide Economic-Water-Energy Model)', 'WEF Nexus tool 2.0',
+                           'MCDA (Multi-Criteria Decision Analysis)', 'Integrated assessment models'],
+    'DataTypes': ['Lab test outputs', 'Field test outputs', 'Sensors', 'Literature', 'Model outputs', 'Qualitative',
+                  'Publicly available platforms (OECD, FAO, EUROSTAT)', 'National statistics'],
+    'AIMethodology': ['Knowledge Elicitation Engine', 'Machine Learning', 'Deep Learning',
+                      'Evolutionary Optimization Approaches', 'Simulated Annealing', 'Agent Based Modeling'],
+    'MonitoringTechniques': ['Sensors', 'Satellite', 'Citizen Science', 'Crowd Sourcing', 'Web-scraping tools',
+                             'Field visits/sampling'],
+    'Stakeholders': ['Private sector/business (industry, business, enterprises)',
+                     'Governmental stakeholders/policy makers', 'Academia/research', 'Local citizens'],
+    'SDGs': [f'SDG {i}' for i in range(1, 18)],
+}
+DEFAULT_OPTION_COUNT = 6
+
+
+def _pick(rng, options, low=1, high=4):
+    size = min(int(rng.integers(low, high + 1)), len(options))
+    return [options[i] for i in sorted(rng.choice(len(options), size=size, replace=False))]
+
+
+def generate_dataset(scale, seed=0):
+    # `scale` is the number of case studies; projects, researchers and
+    # institutions are sized relative to it.
+    rng = np.random.default_rng(seed)
+    n_projects = max(scale // 4, 1)
+    n_institutions = max(scale // 5, 1)
+    n_researchers = max(scale // 2, 1)
+
+    institutions = [f'{INSTITUTION_WORDS[i % len(INSTITUTION_WORDS)]} of '
+                    f'{CITIES[(i // len(INSTITUTION_WORDS)) % len(CITIES)]} {i}' for i in range(n_institutions)]
+    researchers = [f'{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]} {i}'
+                   for i in range(n_researchers)]
+
+    projects = []
+    for i in range(n_projects):
+        coord = institutions[int(rng.integers(n_institutions))]
+        projects.append({
+            'project_info': {
+                'name': f'{TOPIC_WORDS[i % len(TOPIC_WORDS)].upper()}-{i}',
+                'FundedBy': PROGRAMMES[int(rng.integers(len(PROGRAMMES)))],
+                'Website': f'https://project-{i}.example.eu',
+                'FundingAmount': float(np.round(rng.uniform(2e5, 1.5e7), 2)),
+            },
+            'coord_info': {'name': coord},
+        })
+
+    options = {field: LIST_OPTIONS.get(field, [f'{field} option {i}' for i in range(DEFAULT_OPTION_COUNT)])
+               for field in LIST_FIELDS}
+    latitudes = rng.uniform(34.0, 70.0, scale)
+    longitudes = rng.uniform(-10.0, 35.0, scale)
+    case_studies = []
+    for i in range(scale):
+        info = {
+            'name': f'Case study {i}',
+            'Country': COUNTRIES[int(rng.integers(len(COUNTRIES)))],
+            'latitude': float(np.round(latitudes[i], 5)),
+            'longitude': float(np.round(longitudes[i], 5)),
+            'Scale': SCALE_OPTIONS[int(rng.integers(len(SCALE_OPTIONS)))],
+            'Transboundary': TRANSBOUNDARY_OPTIONS[int(rng.integers(len(TRANSBOUNDARY_OPTIONS)))],
+            'Objectives': f'Objectives of case study {i}',
+        }
+        for field in LIST_FIELDS:
+            info[field] = _pick(rng, options[field])
+        case_studies.append({
+            'case_study_info': info,
+            'case_study_lead_info': {'name': researchers[int(rng.integers(n_researchers))]},
+            'project_name': projects[int(rng.integers(n_projects))]['project_info']['name'],
+            'case_study_leader_host_institution': institutions[int(rng.integers(n_institutions))],
+        })
+    return {'projects': projects, 'case_studies': case_studies,
+            'institutions': institutions, 'researchers': researchers}
+
+
+def write_cordis_csv(path, projects, seed=0, participants=3):
+    # Same columns as the CORDIS organization exports: one coordinator row per
+    # project plus a few participant rows sharing its acronym.
+    rng = np.random.default_rng(seed)
+    rows = []
+    for project in projects:
+        acronym = project['project_info']['name']
+        for k in range(participants + 1):
+            rows.append({
+                'projectAcronym': acronym,
+                'role': 'coordinator' if k == 0 else 'participant',
+                'name': project['coord_info']['name'] if k == 0 else f'Partner {int(rng.integers(1_000_000))}',
+                'country': COUNTRIES[int(rng.integers(len(COUNTRIES)))][:2].upper(),
+                'city': CITIES[int(rng.integers(len(CITIES)))],
+                'organizationURL': f'https://org-{int(rng.integers(1_000_000))}.example.eu',
+                'activityType': ACTIVITY_TYPES[int(rng.integers(len(ACTIVITY_TYPES)))],
+                'ecContribution': float(np.round(rng.uniform(1e4, 2e6), 2)),
+            })
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return path
+
+
+class MemoryBackend:
+    # In-process stand-in for the graph with the same semantics as the Neo4j
+    # write paths (unique project names, MERGE on institution/researcher names).
+    name = 'memory'
+
+    def reset(self):
+        self.projects = {}
+        self.institutions = {}
+        self.researchers = {}
+        self.case_studies = {}
+        self.edges = []
+
+    def load(self, dataset, batch_size=1000):
+        for project in dataset['projects']:
+            self.create_project(project['project_info'], project['coord_info'])
+        self.create_case_studies(dataset['case_studies'])
+
+    def create_project(self, project_info, coord_info):
+        if project_info['name'] in self.projects:
+            raise DuplicateProjectError('Project with the same name already exists in the database')
+        self.institutions.setdefault(coord_info['name'], dict(coord_info))
+        self.projects[project_info['name']] = dict(project_info)
+        self.edges.append((coord_info['name'], 'WORKS_ON', project_info['name']))
+
+    def create_case_studies(self, rows):
+        for row in rows:
+            if row['project_name'] not in self.projects:
+                continue
+            key = len(self.case_studies)
+            self.case_studies[key] = dict(row['case_study_info'])
+            lead = row['case_study_lead_info']['name']
+            self.researchers.setdefault(lead, dict(row['case_study_lead_info']))
+            self.institutions.setdefault(row['case_study_leader_host_institution'], {})
+            self.edges.extend([(row['project_name'], 'HAS_CASE_STUDY', key), (lead, 'WORKS_ON', key),
+                               (lead, 'WORKS_ON', row['project_name']),
+                               (lead, 'BELONGS_TO', row['case_study_leader_host_institution'])])
+
+    def get_all_projects(self):
+        return [{'n': dict(project)} for project in self.projects.values()]
+
+    def project_exists(self, name):
+        return name in self.projects
+
+
+class Neo4jBackend:
+    # Runs against the database configured through NEO4J_URI/NEO4J_USER/
+    # NEO4J_PASSWORD. reset() deletes every node, so point it at a scratch
+    # database.
+    name = 'neo4j'
+
+    def reset(self, chunk_size=10000):
+        # A plain chunked DETACH DELETE rather than reset_graph: no tombstones
+        # or reset markers pile up in the change feed, and tombstones left by
+        # earlier runs go too. Only the schema version is kept.
+        while run_write("MATCH (n) WHERE NOT n:SchemaVersion WITH n LIMIT $limit DETACH DELETE n "
+                        "RETURN count(*) AS deleted", {'limit': chunk_size})[0]['deleted'] == chunk_size:
+            pass
+        ensure_schema()
+
+    def load(self, dataset, batch_size=1000):
+        projects = [{'project': p['project_info'], 'coord': p['coord_info']} for p in dataset['projects']]
+        for start in range(0, len(projects), batch_size):
+            run_write(IMPORT_QUERY, {'rows': projects[start:start + batch_size]})
+        rows = dataset['case_studies']
+        for start in range(0, len(rows), batch_size):
+            self.create_case_studies([dict(row) for row in rows[start:start + batch_size]])
+
+    def create_project(self, project_info, coord_info):
+        write_project(project_info, coord_info)
+
+    def create_case_studies(self, rows):
+        for row in rows:
+            row['case_study_info'] = normalize_case_study_info(dict(row['case_study_info']))
+        write_case_studies(rows)
+
+    def get_all_projects(self):
+        return run_query("MATCH (n:Project) RETURN n")
+
+    def project_exists(self, name):
+        return len(run_query("MATCH (n:Project {name: $name}) RETURN 1 LIMIT 1", {'name': name})) > 0
+
+
+BACKENDS = {'memory': MemoryBackend, 'neo4j': Neo4jBackend}
+
+
+def _summarize(samples_ms):
+    samples = np.asarray(samples_ms, dtype=float)
+    total_s = samples.sum() / 1000
+    return {
+        'n': int(samples.size),
+        'mean_ms': float(samples.mean()),
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p95_ms': float(np.percentile(samples, 95)),
+        'max_ms': float(samples.max()),
+        'ops_per_sec': float(samples.size / total_s) if total_s > 0 else None,
+    }
+
+
+def _time_each(calls):
+    samples = []
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    return _summarize(samples)
+
+
+def run_benchmarks(backend, scale, seed=0, ops=200, repeat=5, workdir='data/.bench'):
+    rng = np.random.default_rng(seed + 1)
+    dataset = generate_dataset(scale, seed)
+    # Extra projects/case studies for the timed single writes, generated from a
+    # different seed so their names never collide with the base dataset.
+    extra = generate_dataset(ops * 4, seed + 10_000)
+    for i, project in enumerate(extra['projects'][:ops]):
+        project['project_info']['name'] = f'BENCH-{seed}-{i}'
+
+    csv_path = write_cordis_csv(os.path.join(workdir, f'cordis_{scale}_{seed}.csv'), dataset['projects'], seed)
+    results = {}
+
+    backend.reset()
+    start = time.perf_counter()
+    backend.load(dataset)
+    elapsed = time.perf_counter() - start
+    results['load_dataset'] = {'n': 1, 'seconds': elapsed,
+                               'rows_per_sec': (len(dataset['projects']) + len(dataset['case_studies'])) / elapsed}
+
+    new_projects = extra['projects'][:ops]
+    results['create_project_node'] = _time_each(
+        lambda p=p: backend.create_project(p['project_info'], p['coord_info']) for p in new_projects)
+
+    project_names = [p['project_info']['name'] for p in dataset['projects']]
+    new_case_studies = extra['case_studies'][:ops]
+    for row in new_case_studies:
+        row['project_name'] = project_names[int(rng.integers(len(project_names)))]
+    results['create_case_study_node'] = _time_each(
+        lambda row=row: backend.create_case_studies([dict(row)]) for row in new_case_studies)
+
+    results['get_all_projects'] = _time_each(backend.get_all_projects for _ in range(repeat))
+
+    names = [project_names[int(i)] for i in rng.integers(len(project_names), size=ops // 2)]
+    names += [f'MISSING-{i}' for i in range(ops - len(names))]
+    results['check_project_exists_with_same_name'] = _time_each(
+        lambda name=name: backend.project_exists(name) for name in names)
+
+    start = time.perf_counter()
+    store = CordisStore(csv_path)
+    results['fetch_project_data_first_load'] = _summarize([(time.perf_counter() - start) * 1000])
+    lookups = [project_names[int(i)] for i in rng.integers(len(project_names), size=ops)]
+    results['fetch_project_data'] = _time_each(lambda name=name: store.lookup(name) for name in lookups)
+
+    return {
+        'meta': {'backend': backend.name, 'scale': scale, 'seed': seed, 'ops': ops, 'repeat': repeat,
+                 'python': platform.python_version(), 'platform': platform.platform(), 'created_at': time.time()},
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=0.2, metric='p50_ms'):
+    # A benchmark regresses when `metric` grew by more than `threshold`
+    # (a fraction) over the baseline.
+    regressions = []
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name, {}).get(metric)
+        after = result.get(metric)
+        if before is None or after is None or before <= 0:
+            continue
+        change = (after - before) / before
+        if change > threshold:
+            regressions.append({'benchmark': name, 'metric': metric, 'baseline': before,
+                                'current': after, 'change': change})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the NEXUSNET data-access paths on synthetic data.')
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='memory')
+    parser.add_argument('--scale', choices=sorted(SCALES, key=SCALES.get), default='1k')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ops', type=int, default=200, help='Timed calls per single-operation benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed calls of get_all_projects')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', help='Baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Allowed relative slowdown before a benchmark counts as a regression')
+    parser.add_argument('--metric', default='p50_ms')
+    args = parser.parse_args()
+
+    backend = BACKENDS[args.backend]()
+    try:
+        report = run_benchmarks(backend, SCALES[args.scale], args.seed, args.ops, args.repeat)
+    finally:
+        if args.backend == 'neo4j':
+            close_driver()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold, args.metric)
+        for r in regressions:
+            print(f"REGRESSION {r['benchmark']}: {r['metric']} {r['baseline']:.3f} -> {r['current']:.3f} "
+                  f"(+{r['change']:.0%})", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
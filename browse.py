@@ -0,0 +1,60 @@
+from functools import lru_cache
+from db import get_driver, run_query
+import querybuilder as qb
+
+# Property each label is paged on. Each is unique-constrained (schema.py), so
+# a page is an index range seek in index order, and every write path sets it,
+# so no node is left out. Other labels are paged by elementId.
+PAGE_KEYS = {
+    'Project': 'name', 'CaseStudy': 'id', 'Researcher': 'name', 'Institution': 'name', 'Sector': 'name',
+    'SDG': 'name', 'StakeholderType': 'name', 'StakeholderSector': 'name', 'DataType': 'name',
+    'Impact': 'name', 'Method': 'name',
+}
+# "All" walks these labels in order.
+ALL_LABELS = list(PAGE_KEYS)
+
+
+def iter_nodes(label=None, fetch_size=1000):
+    # Records are pulled from the Bolt stream fetch_size at a time as the
+    # caller iterates, so nothing is materialized up front.
+    match = f"(n:`{qb.check_label(label)}`)" if label else "(n)"
+    with get_driver().session(fetch_size=fetch_size) as session:
+        for record in session.run(f"MATCH {match} RETURN n"):
+            yield record.data()
+
+
+def _segment_query(label, segment, after):
+    key = f"n.`{PAGE_KEYS[label]}`" if label in PAGE_KEYS else "elementId(n)"
+    condition = f"{key} > $after" if after else f"{key} IS NOT NULL"
+    return (f"MATCH (n:`{label}`) WHERE {condition} "
+            f"RETURN n, {segment} AS segment, {key} AS cursor ORDER BY cursor LIMIT $limit")
+
+
+@lru_cache(maxsize=64)
+def _page_query(labels, segment, first):
+    # A cursor is (segment, key): the position in `labels` and the last key
+    # seen there. The current label and every later one contribute at most
+    # one page each, so a page can span labels and still only reads
+    # index-ordered prefixes.
+    branches = [_segment_query(labels[i], i, i == segment and not first) for i in range(segment, len(labels))]
+    return ("CALL {\n" + "\nUNION ALL\n".join(branches) + "\n}\n"
+            "RETURN n, segment, cursor ORDER BY segment, cursor LIMIT $limit")
+
+
+def node_page_query(label=None, after=None, page_size=50):
+    labels = tuple(ALL_LABELS) if label is None else (qb.check_label(label),)
+    segment, key = after if after is not None else (0, None)
+    # One extra row tells whether there is a next page.
+    return _page_query(labels, segment, after is None), {'after': key, 'limit': page_size + 1}
+
+
+def parse_node_page(records, page_size):
+    nodes = [record['n'] for record in records[:page_size]]
+    last = records[page_size - 1] if len(records) > page_size else None
+    next_cursor = (last['segment'], last['cursor']) if last is not None else None
+    return nodes, next_cursor
+
+
+def get_node_page(label=None, after=None, page_size=50):
+    records = run_query(*node_page_query(label, after, page_size))
+    return parse_node_page(records, page_size)
@@ -0,0 +1,66 @@
+import time
+import threading
+
+# Caches live in this module rather than in app.py so they survive Streamlit
+# reruns and are shared by every session in the process.
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+class TTLCache:
+    def __init__(self, ttl, max_entries=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def peek(self, key):
+        # (True, value) on a hit, (False, None) on a miss.
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return True, entry[1]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            if self.max_entries is not None and len(self._entries) > self.max_entries:
+                # Drop the entry closest to expiry, i.e. the least recently loaded.
+                oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                del self._entries[oldest]
+        return value
+
+    def get_or_load(self, key, loader):
+        hit, value = self.peek(key)
+        if hit:
+            return value
+        return self.put(key, loader())
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+
+def get_cache(name, ttl=300, max_entries=None):
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = TTLCache(ttl, max_entries)
+        return _caches[name]
+
+
+def all_cache_stats():
+    with _caches_lock:
+        return {name: cache.stats() for name, cache in _caches.items()}
@@ -0,0 +1,160 @@
+import math
+import uuid
+from db import run_write
+import snapshot
+
+# Multi-select answers; stored on the CaseStudy node as lists.
+LIST_FIELDS = [
+    'NexusSectors', 'LayersOfAnalysis', 'IntegratedModeling', 'EnvironmentalManagement',
+    'Economics', 'Statistics', 'SocialScience', 'ClimateProjections', 'DataTypes',
+    'AIMethodology', 'MonitoringTechniques', 'Stakeholders', 'StakeholderSectors',
+    'StakeholderApproach', 'ImportantDrivers', 'MostImpactfulOrgSector', 'Visualization',
+    'SDGs', 'CaseStudyOutputs', 'Usage', 'Helix', 'Impacts',
+]
+
+# Multi-select answers that are also linked to shared, uniquely named category
+# nodes, so cross-case-study filters are an index lookup plus an expansion.
+# field -> (category label, relationship type, method family)
+CATEGORY_FIELDS = {
+    'NexusSectors': ('Sector', 'INVOLVES_SECTOR', None),
+    'SDGs': ('SDG', 'ASSESSES_SDG', None),
+    'Stakeholders': ('StakeholderType', 'ENGAGES_STAKEHOLDER', None),
+    'StakeholderSectors': ('StakeholderSector', 'ENGAGES_SECTOR', None),
+    'DataTypes': ('DataType', 'USES_DATA', None),
+    'Impacts': ('Impact', 'HAS_IMPACT', None),
+    'IntegratedModeling': ('Method', 'USES_METHOD', 'IntegratedModeling'),
+    'EnvironmentalManagement': ('Method', 'USES_METHOD', 'EnvironmentalManagement'),
+    'Economics': ('Method', 'USES_METHOD', 'Economics'),
+    'Statistics': ('Method', 'USES_METHOD', 'Statistics'),
+    'SocialScience': ('Method', 'USES_METHOD', 'SocialScience'),
+    'ClimateProjections': ('Method', 'USES_METHOD', 'ClimateProjections'),
+    'AIMethodology': ('Method', 'USES_METHOD', 'AIMethodology'),
+}
+
+
+def _category_clauses():
+    clauses = []
+    for field, (label, rel_type, family) in CATEGORY_FIELDS.items():
+        rel = f"[link:{rel_type} {{family: '{family}'}}]" if family else f"[link:{rel_type}]"
+        clauses.append(f"""FOREACH (value IN coalesce(row.categories.{field}, []) |
+    MERGE (category:{label} {{name: value}})
+        ON CREATE SET category.createdAt = timestamp(), category.updatedAt = timestamp()
+    MERGE (case_study)-{rel}->(category)
+        ON CREATE SET link.createdAt = timestamp(), link.updatedAt = timestamp())""")
+    return "\n".join(clauses)
+
+
+CATEGORY_CLAUSES = _category_clauses()
+
+# One row per case study: the case study itself, its lead researcher, the
+# lead's host institution (when known), the project it belongs to and its
+# category links. Rows whose project does not exist are not written and not
+# returned.
+CASE_STUDY_QUERY = """
+UNWIND $rows AS row
+MATCH (project:Project {name: row.project_name})
+MERGE (case_study:CaseStudy {submissionKey: row.submission_key})
+    ON CREATE SET case_study.id = apoc.create.uuid(), case_study += row.case_study_info,
+        case_study.location = point(row.location),
+        case_study.LeaderInstitution = row.case_study_leader_host_institution,
+        case_study.createdAt = timestamp(), case_study.updatedAt = timestamp()
+MERGE (lead:Researcher {name: row.case_study_lead_info.name})
+    ON CREATE SET lead.id = apoc.create.uuid(), lead += row.case_study_lead_info,
+        lead.createdAt = timestamp(), lead.updatedAt = timestamp()
+MERGE (project)-[r0:HAS_CASE_STUDY]->(case_study)
+    ON CREATE SET r0.createdAt = timestamp(), r0.updatedAt = timestamp()
+MERGE (lead)-[r1:WORKS_ON {role: 'Case Study Leader'}]->(case_study)
+    ON CREATE SET r1.timestamp = timestamp(), r1.createdAt = timestamp(), r1.updatedAt = timestamp()
+MERGE (lead)-[r2:WORKS_ON {role: 'Case Study Leader'}]->(project)
+    ON CREATE SET r2.timestamp = timestamp(), r2.createdAt = timestamp(), r2.updatedAt = timestamp()
+FOREACH (institution_name IN CASE WHEN row.case_study_leader_host_institution IS NULL THEN []
+                               ELSE [row.case_study_leader_host_institution] END |
+    MERGE (institution:Institution {name: institution_name})
+        ON CREATE SET institution.id = apoc.create.uuid(),
+            institution.createdAt = timestamp(), institution.updatedAt = timestamp()
+    MERGE (lead)-[r3:BELONGS_TO]->(institution)
+        ON CREATE SET r3.createdAt = timestamp(), r3.updatedAt = timestamp())
+""" + CATEGORY_CLAUSES + """
+RETURN row.submission_key AS submission_key
+"""
+
+CATEGORY_LINK_QUERY = """
+UNWIND $rows AS row
+MATCH (case_study:CaseStudy {id: row.id})
+""" + CATEGORY_CLAUSES
+
+
+def validate_lat_lon(lat, lon):
+    # Check if the values are floats
+    try:
+        lat = float(lat)
+        lon = float(lon)
+    except (TypeError, ValueError):
+        # None, lists and dicts from bulk ingests are invalid too.
+        return False
+    if math.isnan(lat) or math.isnan(lon):
+        return False
+
+    # Check if the values are within valid ranges
+    if lat < -90 or lat > 90:
+        return False
+    if lon < -180 or lon > 180:
+        return False
+
+    return True
+
+
+# An unanswered institution is not an institution; no node is created for it.
+MISSING_VALUES = (None, '', 'Not Available')
+
+
+def normalize_case_study_info(case_study_info):
+    for key, value in case_study_info.items():
+        if value == "" or value == [] or value is None:
+            case_study_info[key] = "Not Available"
+    return case_study_info
+
+
+def normalize_case_study_frame(df):
+    # Same rule as normalize_case_study_info, applied column-wise to a batch.
+    df = df.copy()
+    for column in df.columns:
+        values = df[column]
+        if column in LIST_FIELDS and values.dtype == object:
+            empty = values.isna() | (values.str.len() == 0)
+        else:
+            empty = values.isna() | (values.astype(str).str.strip() == '')
+        df[column] = values.astype(object).mask(empty, 'Not Available')
+    return df
+
+
+def category_values(case_study_info):
+    # Empty answers were normalized to "Not Available" and have no category.
+    return {field: case_study_info[field] for field in CATEGORY_FIELDS
+            if isinstance(case_study_info.get(field), list)}
+
+
+def case_study_location(case_study_info):
+    lat, lon = case_study_info.get('latitude'), case_study_info.get('longitude')
+    if isinstance(lat, (int, float)) and isinstance(lon, (int, float)) and validate_lat_lon(lat, lon):
+        return {'latitude': float(lat), 'longitude': float(lon)}
+    return None
+
+
+class ProjectNotFoundError(Exception):
+    pass
+
+
+def write_case_studies(rows):
+    # Returns the submission keys of the rows actually written.
+    for row in rows:
+        # Re-sending a row with the same key (e.g. a retried queue item) does
+        # not create a second case study.
+        row.setdefault('submission_key', str(uuid.uuid4()))
+        row['categories'] = category_values(row['case_study_info'])
+        row['location'] = case_study_location(row['case_study_info'])
+        if row.get('case_study_leader_host_institution') in MISSING_VALUES:
+            row['case_study_leader_host_institution'] = None
+    written = [record['submission_key'] for record in run_write(CASE_STUDY_QUERY, {'rows': rows})]
+    snapshot.notify()
+    return written
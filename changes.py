@@ -0,0 +1,84 @@
+from functools import lru_cache
+from db import run_query, run_write, get_setting
+
+# Change feed over the createdAt/updatedAt stamps every write path sets (Neo4j
+# timestamp(), epoch milliseconds) and the :Tombstone nodes left by deletes.
+# A consumer keeps the `until` of its last call and passes it back as `since`.
+TRACKED_LABELS = ['Project', 'CaseStudy', 'Researcher', 'Institution', 'Sector', 'SDG', 'StakeholderType',
+                  'StakeholderSector', 'DataType', 'Impact', 'Method']
+TRACKED_TYPES = ['WORKS_ON', 'BELONGS_TO', 'HAS_CASE_STUDY', 'INVOLVES_SECTOR', 'ASSESSES_SDG',
+                 'ENGAGES_STAKEHOLDER', 'ENGAGES_SECTOR', 'USES_DATA', 'HAS_IMPACT', 'USES_METHOD']
+# timestamp() is taken when a write transaction starts, so a transaction that
+# commits after a read can carry a stamp just before that read's `until`. The
+# cursor is held back by this much; overlapping changes are delivered again.
+SAFETY_LAG_MS = int(get_setting('CHANGE_FEED_SAFETY_LAG_MS', 5000))
+
+
+def node_tombstone(var):
+    # Cypher clause recording the deletion of node `var`; its relationships
+    # are implied deleted with it.
+    return (f"CREATE (:Tombstone {{kind: 'node', elementId: elementId({var}), labels: labels({var}), "
+            f"id: {var}.id, name: {var}.name, deletedAt: timestamp()}})")
+
+
+def relationship_tombstone(var, src, dst):
+    return (f"CREATE (:Tombstone {{kind: 'relationship', elementId: elementId({var}), type: type({var}), "
+            f"src: elementId({src}), dst: elementId({dst}), deletedAt: timestamp()}})")
+
+
+# Left by a full reset instead of one tombstone per node: everything stamped
+# before it is gone, so consumers that see it start over with a full load.
+RESET_TOMBSTONE = "CREATE (:Tombstone {kind: 'reset', deletedAt: timestamp()})"
+
+
+def is_reset(feed):
+    return any(t['tombstone']['kind'] == 'reset' for t in feed['tombstones'])
+
+
+@lru_cache(maxsize=None)
+def _nodes_query(labels):
+    return "\nUNION ALL\n".join(
+        f"MATCH (n:`{label}`) WHERE n.updatedAt > $since "
+        f"RETURN '{label}' AS label, elementId(n) AS elementId, properties(n) AS properties"
+        for label in labels)
+
+
+@lru_cache(maxsize=None)
+def _edges_query(types):
+    return "\nUNION ALL\n".join(
+        f"MATCH (a)-[r:`{rel_type}`]->(b) WHERE r.updatedAt > $since "
+        f"RETURN '{rel_type}' AS type, elementId(r) AS elementId, elementId(a) AS src, elementId(b) AS dst, "
+        f"properties(r) AS properties"
+        for rel_type in types)
+
+
+def feed_cursor():
+    # A `since` value covering everything committed from now on.
+    return run_query("RETURN timestamp() AS now")[0]['now'] - SAFETY_LAG_MS
+
+
+def changes_since(since=None, labels=None, types=None):
+    # since=None returns everything that carries a stamp, i.e. a full sync.
+    until = feed_cursor()
+    since = -1 if since is None else since
+    labels = tuple(TRACKED_LABELS if labels is None else labels)
+    types = tuple(TRACKED_TYPES if types is None else types)
+    return {
+        'since': since,
+        'until': max(until, since),
+        'nodes': run_query(_nodes_query(labels), {'since': since}) if labels else [],
+        'edges': run_query(_edges_query(types), {'since': since}) if types else [],
+        'tombstones': run_query("MATCH (t:Tombstone) WHERE t.deletedAt > $since RETURN properties(t) AS tombstone "
+                                "ORDER BY t.deletedAt", {'since': since}),
+    }
+
+
+def prune_tombstones(before, chunk_size=10000):
+    # Consumers that last synced before `before` need a full sync afterwards.
+    deleted = 0
+    while True:
+        count = run_write("MATCH (t:Tombstone) WHERE t.deletedAt < $before WITH t LIMIT $limit "
+                          "DELETE t RETURN count(*) AS deleted", {'before': before, 'limit': chunk_size})[0]['deleted']
+        deleted += count
+        if count < chunk_size:
+            return deleted
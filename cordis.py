@@ -0,0 +1,74 @@
+import os
+import json
+import threading
+import pandas as pd
+
+CORDIS_FILES = {
+    'HORIZON EUROPE': 'data/horizon_europe_c.csv',
+    'HORIZON 2020': 'data/horizon_2020_c.csv',
+}
+CACHE_DIR = 'data/.cache'
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def source_signature(csv_path):
+    stat = os.stat(csv_path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def _cache_paths(csv_path):
+    base = os.path.splitext(os.path.basename(csv_path))[0]
+    return (os.path.join(CACHE_DIR, base + '.parquet'),
+            os.path.join(CACHE_DIR, base + '.json'))
+
+
+def load_columnar(csv_path):
+    # The parquet copy is only trusted while its recorded signature matches
+    # the CSV it was built from; otherwise the CSV is parsed once and the
+    # cache rewritten.
+    parquet_path, meta_path = _cache_paths(csv_path)
+    signature = source_signature(csv_path)
+    if os.path.exists(parquet_path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            if json.load(f) == signature:
+                return pd.read_parquet(parquet_path)
+
+    df = pd.read_csv(csv_path)
+    for column in df.select_dtypes(include='object').columns:
+        df[column] = df[column].astype('string')
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    df.to_parquet(parquet_path)
+    with open(meta_path, 'w') as f:
+        json.dump(signature, f)
+    return df
+
+
+class CordisStore:
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.signature = source_signature(csv_path)
+        self.df = load_columnar(csv_path)
+        # Lowercase acronym -> row positions, so a lookup is a dict probe.
+        acronyms = self.df['projectAcronym'].str.lower()
+        self.index = acronyms.groupby(acronyms, sort=False).indices
+
+    def is_stale(self):
+        return source_signature(self.csv_path) != self.signature
+
+    def lookup(self, acronym):
+        rows = self.index.get(acronym.lower())
+        if rows is None:
+            return self.df.iloc[0:0]
+        return self.df.iloc[rows]
+
+
+def get_store(project_type):
+    csv_path = CORDIS_FILES.get(project_type, CORDIS_FILES['HORIZON 2020'])
+    with _stores_lock:
+        store = _stores.get(csv_path)
+        if store is None or store.is_stale():
+            store = CordisStore(csv_path)
+            _stores[csv_path] = store
+        return store
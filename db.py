@@ -0,0 +1,108 @@
+import os
+import atexit
+import time
+import threading
+import streamlit as st
+from neo4j import GraphDatabase, basic_auth
+import metrics
+
+# One driver (and connection pool) per process. Streamlit re-executes app.py on
+# every widget interaction but imported modules stay loaded, so every rerun and
+# every session borrows sessions from the same pool.
+_driver = None
+_driver_lock = threading.Lock()
+
+
+def get_setting(name, default=None):
+    try:
+        if name in st.secrets:
+            return st.secrets[name]
+    except Exception:
+        # No secrets.toml (e.g. when run from a CLI script); fall back to env.
+        pass
+    return os.environ.get(name, default)
+
+
+def _create_driver():
+    uri = get_setting('NEO4J_URI')
+    user = get_setting('NEO4J_USER')
+    password = get_setting('NEO4J_PASSWORD')
+    return GraphDatabase.driver(
+        uri,
+        auth=basic_auth(user, password),
+        max_connection_pool_size=int(get_setting('NEO4J_MAX_POOL_SIZE', 50)),
+        connection_acquisition_timeout=float(get_setting('NEO4J_ACQUISITION_TIMEOUT', 30)),
+        max_connection_lifetime=float(get_setting('NEO4J_MAX_CONNECTION_LIFETIME', 3600)),
+    )
+
+
+def warm_up(driver, connections):
+    # Open the sessions concurrently so each one checks out its own connection
+    # and the pool is already filled when the first user arrives.
+    def ping():
+        with driver.session() as session:
+            session.run("RETURN 1").consume()
+
+    threads = [threading.Thread(target=ping) for _ in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def get_driver():
+    global _driver
+    if _driver is None:
+        with _driver_lock:
+            if _driver is None:
+                driver = _create_driver()
+                try:
+                    driver.verify_connectivity()
+                    warm_up(driver, int(get_setting('NEO4J_WARM_UP_CONNECTIONS', 0)))
+                except Exception:
+                    # Not kept, so close it here or its pool leaks on every retry.
+                    driver.close()
+                    raise
+                _driver = driver
+    return _driver
+
+
+def close_driver():
+    global _driver
+    with _driver_lock:
+        if _driver is not None:
+            _driver.close()
+            _driver = None
+
+
+atexit.register(close_driver)
+
+metrics.slow_query_ms = float(get_setting('SLOW_QUERY_MS', 500))
+
+
+def _run(tx_or_session, query, parameters, name, profile):
+    if profile:
+        query = "PROFILE " + query
+    start = time.perf_counter()
+    result = tx_or_session.run(query, parameters)
+    records = result.data()
+    summary = result.consume()
+    metrics.record(name, query, (time.perf_counter() - start) * 1000, len(records), summary)
+    return records
+
+
+def run_query(query, parameters=None, name=None, profile=False):
+    name = name or metrics.caller_name()
+    with get_driver().session() as session:
+        return _run(session, query, parameters, name, profile)
+
+
+def run_write(query, parameters=None, name=None, profile=False):
+    # Managed write transaction: retried by the driver on transient errors.
+    name = name or metrics.caller_name()
+
+    def work(tx):
+        return _run(tx, query, parameters, name, profile)
+
+    with get_driver().session() as session:
+        return session.execute_write(work)
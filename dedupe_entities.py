@@ -0,0 +1,290 @@
+import re
+import json
+import time
+import uuid
+import zlib
+import argparse
+import unicodedata
+import numpy as np
+from db import run_query, run_write, close_driver, get_setting
+from schema import ensure_schema, SchemaMigrationError
+from changes import node_tombstone
+import snapshot
+
+# Offline deduplication of Institution and Researcher nodes that were MERGEd
+# on slightly different spellings of the same name. Names are normalized,
+# candidate pairs come only from shared blocks (a name token or a MinHash LSH
+# band over character 3-grams), pairs are scored on MinHash signatures in
+# NumPy, and each cluster of duplicates is merged into its best-connected
+# member with its relationships moved over.
+ABBREVIATIONS = {
+    'univ': 'university', 'uni': 'university', 'universita': 'university', 'universidad': 'university',
+    'universitat': 'university', 'universite': 'university', 'inst': 'institute', 'instituto': 'institute',
+    'institut': 'institute', 'dept': 'department', 'dep': 'department', 'ctr': 'centre', 'center': 'centre',
+    'tech': 'technology', 'techn': 'technical', 'natl': 'national', 'nat': 'national', 'res': 'research',
+    'lab': 'laboratory', 'labs': 'laboratory', 'assoc': 'association', 'found': 'foundation',
+    'co': 'company', 'ltd': 'limited', 'intl': 'international', 'sci': 'science', 'agr': 'agricultural',
+}
+STOPWORDS = {'of', 'the', 'and', 'for', 'de', 'di', 'del', 'della', 'des', 'du', 'la', 'le', 'y', 'e', 'at', 'in'}
+
+# Relationships moved from a duplicate to the surviving node, per label:
+# (type, direction from the node, properties that identify the relationship).
+REWIRE = {
+    'Institution': [('WORKS_ON', 'out', ['role']), ('BELONGS_TO', 'in', [])],
+    'Researcher': [('WORKS_ON', 'out', ['role']), ('BELONGS_TO', 'out', [])],
+}
+# Properties of other nodes that hold a node's name as text, per label:
+# (label, property). A merge points them at the surviving name.
+NAME_REFERENCES = {
+    'Institution': [('CaseStudy', 'LeaderInstitution'), ('Researcher', 'HostInstitution')],
+    'Researcher': [],
+}
+THRESHOLDS = {'Institution': 0.8, 'Researcher': 0.9}
+
+NUM_HASHES = 64
+LSH_BANDS = 16
+MAX_BLOCK_SIZE = 200
+HASH_PRIME = (1 << 61) - 1
+AUDIT_PATH = get_setting('DEDUPE_AUDIT_PATH', 'data/dedupe_audit.jsonl')
+
+
+def normalize_name(name):
+    # Accents are dropped but non-Latin scripts are kept as they are.
+    text = ''.join(c for c in unicodedata.normalize('NFKD', str(name)) if not unicodedata.combining(c)).lower()
+    tokens = re.findall(r'\w+', text)
+    tokens = [ABBREVIATIONS.get(token, token) for token in tokens]
+    return ' '.join(token for token in tokens if token not in STOPWORDS)
+
+
+def _shingles(key):
+    padded = f' {key} '
+    return {zlib.crc32(padded[i:i + 3].encode()) for i in range(len(padded) - 2)} or {0}
+
+
+def minhash_signatures(keys, num_hashes=NUM_HASHES, seed=0):
+    # One row of num_hashes minimums per key; the share of equal columns
+    # between two rows estimates the Jaccard similarity of their 3-gram sets.
+    signatures = np.empty((len(keys), num_hashes), dtype=np.uint64)
+    if not keys:
+        return signatures
+    shingles = [np.fromiter(_shingles(key), dtype=np.uint64) for key in keys]
+    lengths = np.array([len(s) for s in shingles])
+    values = np.concatenate(shingles)
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    # a, b < 2**32 and 3-gram hashes < 2**32, so a * x + b fits in uint64.
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 1 << 32, num_hashes, dtype=np.uint64)
+    b = rng.integers(0, 1 << 32, num_hashes, dtype=np.uint64)
+    for start in range(0, num_hashes, 8):
+        # Eight hash functions at a time keeps the (3-grams x hashes) matrix small.
+        hashed = (values[:, None] * a[None, start:start + 8] + b[None, start:start + 8]) % HASH_PRIME
+        signatures[:, start:start + 8] = np.minimum.reduceat(hashed, starts, axis=0)
+    return signatures
+
+
+def _block_pairs(members):
+    members = np.asarray(members, dtype=np.int64)
+    i, j = np.triu_indices(len(members), k=1)
+    return members[i], members[j]
+
+
+def candidate_pairs(keys, signatures, bands=LSH_BANDS, max_block_size=MAX_BLOCK_SIZE):
+    blocks = {}
+    for index, key in enumerate(keys):
+        if key:
+            blocks.setdefault(('key', key), []).append(index)
+        for token in set(key.split()):
+            blocks.setdefault(('token', token), []).append(index)
+    rows = signatures.shape[1] // bands
+    for band in range(bands):
+        band_keys = signatures[:, band * rows:(band + 1) * rows]
+        for index, row in enumerate(band_keys):
+            blocks.setdefault(('band', band, row.tobytes()), []).append(index)
+
+    left, right = [], []
+    for block, members in blocks.items():
+        # Very common tokens ("university") say nothing; exact keys always pair.
+        if len(members) < 2 or (block[0] != 'key' and len(members) > max_block_size):
+            continue
+        i, j = _block_pairs(members)
+        left.append(i)
+        right.append(j)
+    if not left:
+        return np.empty((0, 2), dtype=np.int64)
+    pairs = np.stack([np.concatenate(left), np.concatenate(right)], axis=1)
+    return np.unique(pairs, axis=0)
+
+
+def score_pairs(pairs, keys, signatures, batch_size=100_000):
+    digits = np.array([' '.join(sorted(re.findall(r'\d+', key))) for key in keys], dtype=object)
+    exact = np.array(keys, dtype=object)
+    scores = np.empty(len(pairs), dtype=float)
+    for start in range(0, len(pairs), batch_size):
+        i, j = pairs[start:start + batch_size, 0], pairs[start:start + batch_size, 1]
+        similarity = (signatures[i] == signatures[j]).mean(axis=1)
+        similarity[exact[i] == exact[j]] = 1.0
+        # "Lab 2" and "Lab 3" are different places however similar the rest,
+        # and names that normalize to nothing carry no evidence at all.
+        similarity[(digits[i] != digits[j]) | (exact[i] == '')] = 0.0
+        scores[start:start + batch_size] = similarity
+    return scores
+
+
+def clusters(n, pairs):
+    parent = np.arange(n)
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j in pairs:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+    groups = {}
+    for index in range(n):
+        groups.setdefault(find(index), []).append(index)
+    return [members for members in groups.values() if len(members) > 1]
+
+
+def load_nodes(label):
+    return run_query(f"""
+    MATCH (n:`{label}`)
+    RETURN elementId(n) AS eid, n.name AS name, n.id AS id, COUNT {{ (n)--() }} AS degree,
+           n.createdAt AS createdAt
+    """)
+
+
+def find_duplicates(label, threshold=None):
+    nodes = [node for node in load_nodes(label) if node['name'] is not None]
+    keys = [normalize_name(node['name']) for node in nodes]
+    signatures = minhash_signatures(keys)
+    pairs = candidate_pairs(keys, signatures)
+    scores = score_pairs(pairs, keys, signatures)
+    threshold = THRESHOLDS[label] if threshold is None else threshold
+    accepted = pairs[scores >= threshold]
+    accepted_scores = {(int(i), int(j)): float(s) for (i, j), s in zip(accepted, scores[scores >= threshold])}
+
+    merges = []
+    for members in clusters(len(nodes), accepted):
+        # Keep the best-connected node, then the oldest, then the shortest name.
+        members.sort(key=lambda m: (-nodes[m]['degree'], nodes[m]['createdAt'] or 0, len(nodes[m]['name'])))
+        canonical = members[0]
+        merges.append({
+            'canonical': nodes[canonical],
+            'duplicates': [{**nodes[m], 'score': accepted_scores.get((min(canonical, m), max(canonical, m)))}
+                           for m in members[1:]],
+        })
+    return {'nodes': len(nodes), 'candidate_pairs': len(pairs), 'accepted_pairs': len(accepted), 'merges': merges}
+
+
+def _merge_query(label):
+    handled = [rel_type for rel_type, _, _ in REWIRE[label]]
+    moves = []
+    for k, (rel_type, direction, keys) in enumerate(REWIRE[label]):
+        identity = f" {{{', '.join(f'{key}: r.{key}' for key in keys)}}}" if keys else ""
+        if direction == 'out':
+            match, merge = f"(d)-[r:{rel_type}]->(other)", f"(c)-[moved:{rel_type}{identity}]->(other)"
+        else:
+            match, merge = f"(other)-[r:{rel_type}]->(d)", f"(other)-[moved:{rel_type}{identity}]->(c)"
+        moves.append(f"""CALL {{
+    WITH c, d
+    MATCH {match} WHERE other <> c
+    MERGE {merge}
+        ON CREATE SET moved += properties(r)
+    SET moved.updatedAt = timestamp()
+    RETURN count(*) AS moved{k}
+}}""")
+    for k, (other_label, prop) in enumerate(NAME_REFERENCES[label]):
+        moves.append(f"""CALL {{
+    WITH c, d
+    MATCH (other:`{other_label}` {{`{prop}`: d.name}})
+    SET other.`{prop}` = c.name, other.updatedAt = timestamp()
+    RETURN count(*) AS renamed{k}
+}}""")
+    return f"""
+UNWIND $pairs AS pair
+MATCH (c:`{label}`) WHERE elementId(c) = pair.canonical
+MATCH (d:`{label}`) WHERE elementId(d) = pair.duplicate
+    AND NOT EXISTS {{ (d)-[r]-() WHERE NOT type(r) IN {json.dumps(handled)} }}
+{chr(10).join(moves)}
+SET c.aliases = [alias IN coalesce(c.aliases, []) + coalesce(d.aliases, []) WHERE alias <> d.name] + d.name,
+    c.updatedAt = timestamp()
+WITH d, pair
+{node_tombstone('d')}
+DETACH DELETE d
+RETURN pair.duplicate AS merged
+"""
+
+
+def apply_merges(label, merges, chunk_size=500, progress=None):
+    # One write transaction per chunk of (canonical, duplicate) pairs. A
+    # duplicate with relationships the job does not know how to move is
+    # left in place and reported as skipped.
+    query = _merge_query(label)
+    pairs = [{'canonical': merge['canonical']['eid'], 'duplicate': duplicate['eid']}
+             for merge in merges for duplicate in merge['duplicates']]
+    merged = set()
+    for start in range(0, len(pairs), chunk_size):
+        chunk = pairs[start:start + chunk_size]
+        merged.update(record['merged'] for record in run_write(query, {'pairs': chunk}))
+        if progress is not None:
+            progress(min(start + chunk_size, len(pairs)), len(pairs))
+    snapshot.notify()
+    return merged
+
+
+def write_audit(path, run_id, label, merges, merged, dry_run):
+    with open(path, 'a', encoding='utf-8') as f:
+        for merge in merges:
+            for duplicate in merge['duplicates']:
+                status = 'proposed' if dry_run else ('merged' if duplicate['eid'] in merged else 'skipped')
+                f.write(json.dumps({
+                    'run': run_id, 'at': time.time(), 'label': label, 'status': status,
+                    'canonical': {key: merge['canonical'][key] for key in ('eid', 'id', 'name')},
+                    'duplicate': {key: duplicate[key] for key in ('eid', 'id', 'name')},
+                    'score': duplicate['score'],
+                }) + '\n')
+
+
+def dedupe(label, threshold=None, dry_run=False, chunk_size=500, audit_path=AUDIT_PATH, progress=None):
+    try:
+        ensure_schema()
+    except SchemaMigrationError:
+        # Duplicates blocking the unique constraints are what this job merges.
+        pass
+    run_id = str(uuid.uuid4())
+    start = time.perf_counter()
+    found = find_duplicates(label, threshold)
+    merged = set() if dry_run else apply_merges(label, found['merges'], chunk_size, progress)
+    write_audit(audit_path, run_id, label, found['merges'], merged, dry_run)
+    duplicates = sum(len(merge['duplicates']) for merge in found['merges'])
+    return {
+        'run': run_id, 'label': label, 'nodes': found['nodes'], 'candidate_pairs': found['candidate_pairs'],
+        'accepted_pairs': found['accepted_pairs'], 'clusters': len(found['merges']), 'duplicates': duplicates,
+        'merged': len(merged), 'skipped': 0 if dry_run else duplicates - len(merged),
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find and merge duplicate Institution/Researcher nodes.')
+    parser.add_argument('labels', nargs='*', choices=sorted(REWIRE), default=sorted(REWIRE))
+    parser.add_argument('--threshold', type=float, help='Minimum similarity (defaults per label)')
+    parser.add_argument('--dry-run', action='store_true', help='Only write the proposed merges to the audit log')
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--audit', default=AUDIT_PATH, help='JSONL audit log to append to')
+    args = parser.parse_args()
+    try:
+        for label in args.labels:
+            report = dedupe(label, args.threshold, args.dry_run, args.chunk_size, args.audit,
+                            lambda done, total: print(f'{label}: {done}/{total} pairs merged'))
+            print(json.dumps(report))
+    finally:
+        close_driver()
+
+
+if __name__ == '__main__':
+    main()
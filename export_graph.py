@@ -0,0 +1,258 @@
+import io
+import os
+import json
+import time
+import zipfile
+import argparse
+import tempfile
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from db import get_driver, run_query, close_driver
+from casestudies import LIST_FIELDS
+from changes import changes_since, feed_cursor
+
+# Columnar export of the graph for analysts: one file per label and per
+# relationship type, written chunk by chunk from a streamed query so memory
+# stays bounded by chunk_size whatever the size of the database. Multi-select
+# answers become list<string> columns in Parquet and '; '-joined text in CSV.
+LABELS = ['Project', 'CaseStudy', 'Researcher', 'Institution']
+EDGE_TYPES = ['WORKS_ON', 'BELONGS_TO', 'HAS_CASE_STUDY']
+FORMATS = ['parquet', 'csv']
+LIST_SEPARATOR = '; '
+STATE_FILE = 'export_state.json'
+
+ARROW_TYPES = {
+    'String': pa.string(), 'Long': pa.int64(), 'Integer': pa.int64(), 'Double': pa.float64(),
+    'Float': pa.float64(), 'Boolean': pa.bool_(), 'Date': pa.date32(), 'DateTime': pa.timestamp('us', tz='UTC'),
+    'LocalDateTime': pa.timestamp('us'), 'StringArray': pa.list_(pa.string()),
+}
+
+
+def _arrow_type(name, types):
+    if name in LIST_FIELDS:
+        return pa.list_(pa.string())
+    types = set(types or [])
+    if len(types) == 1 and next(iter(types)) in ARROW_TYPES:
+        return ARROW_TYPES[next(iter(types))]
+    # Mixed or unsupported (e.g. Point) property types are exported as text.
+    return pa.string()
+
+
+def node_schema(label):
+    records = run_query("""
+    CALL db.schema.nodeTypeProperties() YIELD nodeLabels, propertyName, propertyTypes
+    WHERE $label IN nodeLabels AND propertyName IS NOT NULL
+    RETURN propertyName, propertyTypes
+    """, {'label': label})
+    fields = {}
+    for record in records:
+        fields.setdefault(record['propertyName'], set()).update(record['propertyTypes'] or [])
+    return pa.schema([('element_id', pa.string())] +
+                     [(name, _arrow_type(name, types)) for name, types in sorted(fields.items())])
+
+
+def edge_schema(rel_type):
+    records = run_query("""
+    CALL db.schema.relTypeProperties() YIELD relType, propertyName, propertyTypes
+    WHERE relType = $rel_type AND propertyName IS NOT NULL
+    RETURN propertyName, propertyTypes
+    """, {'rel_type': f':`{rel_type}`'})
+    fields = {}
+    for record in records:
+        fields.setdefault(record['propertyName'], set()).update(record['propertyTypes'] or [])
+    base = [('element_id', pa.string()), ('src_element_id', pa.string()), ('dst_element_id', pa.string()),
+            ('src_key', pa.string()), ('dst_key', pa.string())]
+    return pa.schema(base + [(name, _arrow_type(name, types)) for name, types in sorted(fields.items())
+                             if name not in dict(base)])
+
+
+def _convert(value, arrow_type):
+    if value is None:
+        return None
+    if pa.types.is_list(arrow_type):
+        # Empty answers were normalized to "Not Available".
+        return [str(x) for x in value] if isinstance(value, list) else []
+    if hasattr(value, 'to_native'):
+        value = value.to_native()
+    if pa.types.is_string(arrow_type):
+        return value if isinstance(value, str) else str(value)
+    return value
+
+
+def _rows(records, schema):
+    return [{field.name: _convert(record.get(field.name), field.type) for field in schema} for record in records]
+
+
+class ChunkWriter:
+    def __init__(self, path, schema, fmt):
+        self.path = path
+        self.schema = schema
+        self.fmt = fmt
+        self.rows = 0
+        self._writer = None
+        self._header = True
+
+    def write(self, rows):
+        if not rows:
+            return
+        table = pa.Table.from_pylist(rows, schema=self.schema)
+        if self.fmt == 'parquet':
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, self.schema)
+            self._writer.write_table(table)
+        else:
+            df = table.to_pandas()
+            for field in self.schema:
+                if pa.types.is_list(field.type):
+                    df[field.name] = df[field.name].map(
+                        lambda v: LIST_SEPARATOR.join(v) if v is not None else None)
+            df.to_csv(self.path, mode='w' if self._header else 'a', header=self._header, index=False)
+            self._header = False
+        self.rows += len(rows)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        elif self.rows == 0:
+            # Still write an empty file with the right columns.
+            if self.fmt == 'parquet':
+                pq.write_table(self.schema.empty_table(), self.path)
+            else:
+                pd.DataFrame(columns=self.schema.names).to_csv(self.path, index=False)
+        return self.rows
+
+
+def _stream(query, parameters, schema, writer, chunk_size):
+    with get_driver().session(fetch_size=chunk_size) as session:
+        chunk = []
+        for record in session.run(query, parameters):
+            chunk.append(record['row'])
+            if len(chunk) >= chunk_size:
+                writer.write(_rows(chunk, schema))
+                chunk = []
+        writer.write(_rows(chunk, schema))
+
+
+def _key(var):
+    return f"coalesce({var}.id, {var}.name, elementId({var}))"
+
+
+def export_full(out_dir, fmt='parquet', chunk_size=10000, progress=None):
+    os.makedirs(out_dir, exist_ok=True)
+    cursor = feed_cursor()
+    counts = {}
+    for label in LABELS:
+        schema = node_schema(label)
+        writer = ChunkWriter(os.path.join(out_dir, f'{label}.{fmt}'), schema, fmt)
+        _stream(f"MATCH (n:`{label}`) RETURN n {{.*, element_id: elementId(n)}} AS row",
+                {}, schema, writer, chunk_size)
+        counts[label] = writer.close()
+        if progress is not None:
+            progress(label, counts[label])
+    for rel_type in EDGE_TYPES:
+        schema = edge_schema(rel_type)
+        writer = ChunkWriter(os.path.join(out_dir, f'edges_{rel_type}.{fmt}'), schema, fmt)
+        _stream(f"""
+        MATCH (a)-[r:`{rel_type}`]->(b)
+        RETURN r {{.*, element_id: elementId(r), src_element_id: elementId(a),
+                               dst_element_id: elementId(b), src_key: {_key('a')}, dst_key: {_key('b')}}} AS row
+        """, {}, schema, writer, chunk_size)
+        counts[rel_type] = writer.close()
+        if progress is not None:
+            progress(rel_type, counts[rel_type])
+    return {'cursor': cursor, 'counts': counts}
+
+
+def export_changes(out_dir, since, fmt='parquet', chunk_size=10000):
+    # Only what the change feed reports since the last run, plus tombstones
+    # for deleted nodes and relationships. A 'reset' tombstone means all data
+    # exported before it is gone; every node after it is in this delta.
+    os.makedirs(out_dir, exist_ok=True)
+    feed = changes_since(since, LABELS, EDGE_TYPES)
+    counts = {}
+    for label in LABELS:
+        schema = node_schema(label)
+        records = [{**node['properties'], 'element_id': node['elementId']}
+                   for node in feed['nodes'] if node['label'] == label]
+        writer = ChunkWriter(os.path.join(out_dir, f'{label}.{fmt}'), schema, fmt)
+        for start in range(0, len(records), chunk_size):
+            writer.write(_rows(records[start:start + chunk_size], schema))
+        counts[label] = writer.close()
+    for rel_type in EDGE_TYPES:
+        schema = edge_schema(rel_type)
+        records = [{**edge['properties'], 'element_id': edge['elementId'], 'src_element_id': edge['src'],
+                    'dst_element_id': edge['dst']} for edge in feed['edges'] if edge['type'] == rel_type]
+        writer = ChunkWriter(os.path.join(out_dir, f'edges_{rel_type}.{fmt}'), schema, fmt)
+        for start in range(0, len(records), chunk_size):
+            writer.write(_rows(records[start:start + chunk_size], schema))
+        counts[rel_type] = writer.close()
+    tombstone_schema = pa.schema([('kind', pa.string()), ('elementId', pa.string()), ('labels', pa.list_(pa.string())),
+                                  ('type', pa.string()), ('id', pa.string()), ('name', pa.string()),
+                                  ('src', pa.string()), ('dst', pa.string()), ('deletedAt', pa.int64())])
+    writer = ChunkWriter(os.path.join(out_dir, f'tombstones.{fmt}'), tombstone_schema, fmt)
+    writer.write(_rows([t['tombstone'] for t in feed['tombstones']], tombstone_schema))
+    counts['tombstones'] = writer.close()
+    return {'cursor': feed['until'], 'counts': counts}
+
+
+def load_state(out_dir):
+    path = os.path.join(out_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(out_dir, cursor):
+    path = os.path.join(out_dir, STATE_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'cursor': cursor, 'exported_at': time.time()}, f)
+    os.replace(tmp_path, path)
+
+
+def export_graph(out_dir, fmt='parquet', changed_only=False, chunk_size=10000, progress=None):
+    # With changed_only, each run after the first writes a delta-<cursor>
+    # directory with the changes since the previous run.
+    start = time.perf_counter()
+    state = load_state(out_dir) if changed_only else None
+    if state is None:
+        report = export_full(out_dir, fmt, chunk_size, progress)
+        target = out_dir
+    else:
+        target = os.path.join(out_dir, f"delta-{state['cursor']}")
+        report = export_changes(target, state['cursor'], fmt, chunk_size)
+    save_state(out_dir, report['cursor'])
+    return {**report, 'directory': target, 'seconds': time.perf_counter() - start}
+
+
+def export_zip(fmt='parquet', chunk_size=10000):
+    # Full export packed into an in-memory zip, for the Streamlit download.
+    with tempfile.TemporaryDirectory() as out_dir:
+        export_full(out_dir, fmt, chunk_size)
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name in sorted(os.listdir(out_dir)):
+                archive.write(os.path.join(out_dir, name), name)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export nodes and relationships to Parquet or CSV files.')
+    parser.add_argument('out_dir')
+    parser.add_argument('--format', choices=FORMATS, default='parquet')
+    parser.add_argument('--changed-only', action='store_true',
+                        help='Only export what changed since the last run into this directory')
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    args = parser.parse_args()
+    try:
+        report = export_graph(args.out_dir, args.format, args.changed_only, args.chunk_size,
+                              lambda name, rows: print(f'{name}: {rows} rows'))
+    finally:
+        close_driver()
+    print(f"Exported to {report['directory']} in {report['seconds']:.1f}s: {report['counts']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+import os
+import re
+import json
+import html
+import time
+import zipfile
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from db import run_query, close_driver, get_setting
+from network import SCORE_COLUMNS
+import snapshot
+
+# Bump when the templates change so cached output is re-rendered.
+TEMPLATE_VERSION = 1
+CACHE_DIR = 'data/.cache/factsheets'
+CACHE_TTL = float(get_setting('FACTSHEET_CACHE_TTL', 7 * 86400))
+CACHE_MAX_ENTRIES = int(get_setting('FACTSHEET_CACHE_MAX_ENTRIES', 20000))
+PRUNE_INTERVAL = 60
+FORMATS = {'html': 'html', 'markdown': 'md'}
+
+FACTSHEET_QUERY = """
+MATCH (project:Project)-[:HAS_CASE_STUDY]->(case_study:CaseStudy %s)
+OPTIONAL MATCH (lead:Researcher)-[:WORKS_ON {role: 'Case Study Leader'}]->(case_study)
+WITH project, case_study, head(collect(lead)) AS lead
+// The institution recorded with the case study; older case studies fall
+// back to the lead's institution when there is only one.
+OPTIONAL MATCH (recorded:Institution {name: case_study.LeaderInstitution})
+OPTIONAL MATCH (lead)-[:BELONGS_TO]->(affiliation:Institution)
+WITH project, case_study, lead, recorded, collect(affiliation) AS affiliations
+RETURN case_study, project, lead,
+       coalesce(recorded, CASE WHEN size(affiliations) = 1 THEN affiliations[0] END) AS institution
+"""
+
+PROJECT_FIELDS = ['name', 'FundedBy', 'Website', 'FundingAmount', 'StartDate', 'EndDate']
+# Network scores are written onto case studies too; they are not answers.
+HIDDEN_FIELDS = {'id', 'name', 'LeaderInstitution', 'scoresUpdatedAt', *SCORE_COLUMNS}
+
+
+def fetch_factsheet_data(case_study_id=None):
+    if snapshot.active():
+        return snapshot.current().factsheet_records(case_study_id)
+    if case_study_id is None:
+        return run_query(FACTSHEET_QUERY % '')
+    return run_query(FACTSHEET_QUERY % '{id: $id}', {'id': case_study_id})
+
+
+def content_hash(data, fmt):
+    # Only what is rendered, so properties the templates leave out (score
+    # write-backs, stamps on the project or lead) keep cached output valid.
+    payload = json.dumps([TEMPLATE_VERSION, fmt, data['case_study'].get('name'), _sections(data)],
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _title(key):
+    return re.sub(r'(?<=[a-z])(?=[A-Z])', ' ', key).replace('_', ' ').capitalize()
+
+
+def _value(value):
+    if isinstance(value, list):
+        return ', '.join(str(x) for x in value)
+    return '' if value is None else str(value)
+
+
+def _sections(data):
+    case_study = data['case_study']
+    project = data['project'] or {}
+    lead = data['lead'] or {}
+    institution = data['institution'] or {}
+    return [
+        ('Project', [(_title(k), _value(project.get(k))) for k in PROJECT_FIELDS]),
+        ('Case study leader', [('Name', _value(lead.get('name'))),
+                               ('Email', _value(lead.get('ContactMail'))),
+                               ('Institution', _value(institution.get('name')))]),
+        ('Case study', [(_title(k), _value(v)) for k, v in sorted(case_study.items())
+                        if k not in HIDDEN_FIELDS]),
+    ]
+
+
+def render_markdown(data):
+    lines = [f"# {data['case_study'].get('name', 'Case study')}", '']
+    for heading, rows in _sections(data):
+        lines += [f'## {heading}', '']
+        lines += [f'- **{label}:** {value}' for label, value in rows]
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def render_html(data):
+    parts = [f"<html><head><meta charset=\"utf-8\"><title>{html.escape(str(data['case_study'].get('name', '')))}</title></head><body>",
+             f"<h1>{html.escape(str(data['case_study'].get('name', 'Case study')))}</h1>"]
+    for heading, rows in _sections(data):
+        parts.append(f'<h2>{html.escape(heading)}</h2><table>')
+        parts += [f'<tr><th>{html.escape(label)}</th><td>{html.escape(value)}</td></tr>' for label, value in rows]
+        parts.append('</table>')
+    parts.append('</body></html>')
+    return '\n'.join(parts)
+
+
+RENDERERS = {'html': render_html, 'markdown': render_markdown}
+
+
+def render_factsheet(data, fmt='html'):
+    # Rendered output is cached on disk under the hash of everything that
+    # goes into it, so unchanged case studies are never rendered twice and
+    # worker processes share the cache.
+    digest = content_hash(data, fmt)
+    path = os.path.join(CACHE_DIR, f'{digest}.{FORMATS[fmt]}')
+    try:
+        if time.time() - os.path.getmtime(path) < CACHE_TTL:
+            with open(path, encoding='utf-8') as f:
+                return f.read()
+    except FileNotFoundError:
+        pass
+    output = RENDERERS[fmt](data)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(output)
+    os.replace(tmp_path, path)
+    prune_cache()
+    return output
+
+
+_pruned_at = 0.0
+
+
+def prune_cache(force=False):
+    # Drops expired entries, then the oldest beyond CACHE_MAX_ENTRIES. Runs at
+    # most every PRUNE_INTERVAL seconds per process.
+    global _pruned_at
+    now = time.time()
+    if not force and now - _pruned_at < PRUNE_INTERVAL:
+        return 0
+    _pruned_at = now
+    entries = []
+    for entry in os.scandir(CACHE_DIR):
+        try:
+            entries.append((entry.stat().st_mtime, entry.path))
+        except FileNotFoundError:
+            continue
+    entries.sort(reverse=True)
+    removed = 0
+    for i, (mtime, path) in enumerate(entries):
+        if i >= CACHE_MAX_ENTRIES or now - mtime >= CACHE_TTL:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+def _render_job(args):
+    data, fmt = args
+    return render_factsheet(data, fmt)
+
+
+def _file_name(data, fmt):
+    name = re.sub(r'[^A-Za-z0-9_-]+', '_', str(data['case_study'].get('name', 'case_study'))).strip('_')
+    return f"{name or 'case_study'}_{data['case_study'].get('id', '')[:8]}.{FORMATS[fmt]}"
+
+
+def export_factsheets(zip_path, fmt='html', workers=None):
+    start = time.perf_counter()
+    records = fetch_factsheet_data()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        outputs = pool.map(_render_job, [(data, fmt) for data in records], chunksize=16)
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for data, output in zip(records, outputs):
+                archive.writestr(_file_name(data, fmt), output)
+    return {'factsheets': len(records), 'seconds': time.perf_counter() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render every case-study factsheet into a zip archive.')
+    parser.add_argument('zip_path')
+    parser.add_argument('--format', choices=sorted(FORMATS), default='html')
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+    try:
+        report = export_factsheets(args.zip_path, args.format, args.workers)
+    finally:
+        close_driver()
+    print(f"Wrote {report['factsheets']} factsheets to {args.zip_path} in {report['seconds']:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import numpy as np
+from db import run_query, get_setting
+from cache import get_cache
+
+MAX_ZOOM = 18
+# A cluster cell is this many screen tiles wide at its zoom level.
+CELL_TILES = 0.25
+
+clusters_cache = get_cache('map_clusters', ttl=float(get_setting('MAP_CLUSTER_CACHE_TTL', 3600)))
+
+
+def case_studies_in_bbox(south, west, north, east):
+    # Served by the case_study_location point index.
+    query = """
+    MATCH (cs:CaseStudy)
+    WHERE point.withinBBox(cs.location,
+                           point({latitude: $south, longitude: $west}),
+                           point({latitude: $north, longitude: $east}))
+    RETURN cs.id AS id, cs.name AS name, cs.location.latitude AS latitude, cs.location.longitude AS longitude
+    """
+    return run_query(query, {'south': south, 'west': west, 'north': north, 'east': east})
+
+
+def case_studies_within(latitude, longitude, radius_m):
+    query = """
+    MATCH (cs:CaseStudy)
+    WHERE point.distance(cs.location, point({latitude: $latitude, longitude: $longitude})) <= $radius
+    RETURN cs.id AS id, cs.name AS name, cs.location.latitude AS latitude, cs.location.longitude AS longitude,
+           point.distance(cs.location, point({latitude: $latitude, longitude: $longitude})) AS distance
+    ORDER BY distance
+    """
+    return run_query(query, {'latitude': latitude, 'longitude': longitude, 'radius': radius_m})
+
+
+def _grid_clusters(lat, lon, zoom):
+    cell = 360.0 / (2 ** zoom) * CELL_TILES
+    cells = np.stack([np.floor(lat / cell), np.floor(lon / cell)], axis=1)
+    _, inverse, counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+    return {
+        'latitude': np.bincount(inverse, weights=lat) / counts,
+        'longitude': np.bincount(inverse, weights=lon) / counts,
+        'count': counts,
+    }
+
+
+def _build_clusters():
+    records = run_query("""
+    MATCH (cs:CaseStudy) WHERE cs.location IS NOT NULL
+    RETURN cs.location.latitude AS latitude, cs.location.longitude AS longitude
+    """)
+    lat = np.array([r['latitude'] for r in records], dtype=float)
+    lon = np.array([r['longitude'] for r in records], dtype=float)
+    if len(lat) == 0:
+        empty = {'latitude': lat, 'longitude': lon, 'count': np.array([], dtype=int)}
+        return {zoom: empty for zoom in range(MAX_ZOOM + 1)}
+    return {zoom: _grid_clusters(lat, lon, zoom) for zoom in range(MAX_ZOOM + 1)}
+
+
+def get_clusters(zoom, south=-90.0, west=-180.0, north=90.0, east=180.0):
+    # Every zoom level is clustered once from a single read of the points and
+    # cached; panning only filters the cached clusters to the viewport.
+    clusters = clusters_cache.get_or_load('all', _build_clusters)[min(max(int(zoom), 0), MAX_ZOOM)]
+    lat, lon = clusters['latitude'], clusters['longitude']
+    in_lon = (lon >= west) & (lon <= east) if west <= east else (lon >= west) | (lon <= east)
+    mask = (lat >= south) & (lat <= north) & in_lon
+    return [{'latitude': float(a), 'longitude': float(b), 'count': int(c)}
+            for a, b, c in zip(lat[mask], lon[mask], clusters['count'][mask])]
@@ -0,0 +1,107 @@
+import os
+import json
+import time
+import argparse
+import pandas as pd
+from db import run_write, close_driver
+from cordis import CORDIS_FILES, source_signature
+from schema import ensure_schema
+
+# Same graph shape as create_project_node in app.py, but idempotent (MERGE on
+# the project acronym) and one UNWIND transaction per batch of rows.
+IMPORT_QUERY = """
+UNWIND $rows AS row
+MERGE (project:Project {name: row.project.name})
+ON CREATE SET project += row.project, project.createdAt = timestamp(), project.updatedAt = timestamp()
+MERGE (coord:Institution {name: row.coord.name})
+ON CREATE SET coord += row.coord, coord.id = apoc.create.uuid(),
+    coord.createdAt = timestamp(), coord.updatedAt = timestamp()
+MERGE (coord)-[r:WORKS_ON {role: 'Project Coordinator'}]->(project)
+ON CREATE SET r.timestamp = timestamp(), r.createdAt = timestamp(), r.updatedAt = timestamp()
+"""
+
+COORD_COLUMNS = {'country': 'Country', 'city': 'City', 'organizationURL': 'Website', 'activityType': 'ActivityType'}
+
+
+def to_rows(chunk, funded_by):
+    # Organization files have a coordinator row per project plus participant
+    # rows; only the coordinator becomes the 'Project Coordinator' edge.
+    # ecContribution is that organization's own share, so the project total
+    # only comes from the project-level ecMaxContribution when the file has it.
+    chunk = chunk.dropna(subset=['projectAcronym', 'name'])
+    if 'role' in chunk.columns:
+        chunk = chunk[chunk['role'].astype(str).str.lower() == 'coordinator']
+    chunk = chunk.astype(object).where(chunk.notna(), None)
+    rows = []
+    for record in chunk.to_dict('records'):
+        project = {'name': record['projectAcronym'], 'FundedBy': funded_by,
+                   'FundingAmount': record.get('ecMaxContribution'),
+                   'CoordinatorContribution': record.get('ecContribution')}
+        coord = {'name': record['name']}
+        for column, key in COORD_COLUMNS.items():
+            if record.get(column) is not None:
+                coord[key] = record[column]
+        rows.append({'project': project, 'coord': coord})
+    return rows
+
+
+def load_checkpoint(path, csv_path):
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        checkpoint = json.load(f)
+    # A checkpoint only applies to the exact file it was written for.
+    if checkpoint.get('csv') != csv_path or checkpoint.get('signature') != source_signature(csv_path):
+        return 0
+    return checkpoint['rows_done']
+
+
+def save_checkpoint(path, csv_path, rows_done):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'csv': csv_path, 'signature': source_signature(csv_path), 'rows_done': rows_done}, f)
+    os.replace(tmp_path, path)
+
+
+def import_projects(programme, csv_path=None, batch_size=1000, checkpoint_path=None, restart=False):
+    csv_path = csv_path or CORDIS_FILES[programme]
+    checkpoint_path = checkpoint_path or csv_path + '.import.json'
+    rows_done = 0 if restart else load_checkpoint(checkpoint_path, csv_path)
+    if rows_done:
+        print(f'Resuming {csv_path} after {rows_done} rows')
+
+    ensure_schema()
+    start = time.perf_counter()
+    imported = 0
+    reader = pd.read_csv(csv_path, chunksize=batch_size, skiprows=range(1, rows_done + 1))
+    for chunk in reader:
+        rows = to_rows(chunk, programme)
+        if rows:
+            run_write(IMPORT_QUERY, {'rows': rows})
+        rows_done += len(chunk)
+        imported += len(chunk)
+        save_checkpoint(checkpoint_path, csv_path, rows_done)
+        print(f'{rows_done} rows done')
+
+    elapsed = time.perf_counter() - start
+    rate = imported / elapsed if elapsed > 0 else 0.0
+    print(f'Imported {imported} rows in {elapsed:.1f}s ({rate:.0f} rows/sec)')
+    return {'rows': imported, 'seconds': elapsed, 'rows_per_sec': rate}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk import CORDIS project coordinators into the graph.')
+    parser.add_argument('programme', choices=sorted(CORDIS_FILES))
+    parser.add_argument('--csv', help='CSV to import (defaults to the file used by fetch_project_data)')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--checkpoint', help='Checkpoint file (defaults to <csv>.import.json)')
+    parser.add_argument('--restart', action='store_true', help='Ignore any existing checkpoint')
+    args = parser.parse_args()
+    try:
+        import_projects(args.programme, args.csv, args.batch_size, args.checkpoint, args.restart)
+    finally:
+        close_driver()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import os
+import time
+import argparse
+import pandas as pd
+from db import run_query, close_driver
+from schema import ensure_schema
+from casestudies import LIST_FIELDS, validate_lat_lon, normalize_case_study_frame, write_case_studies
+
+# Survey export columns that are not CaseStudy properties. Every other column
+# is stored on the CaseStudy node under its own name, exactly like the keys of
+# case_study_data in the "New Case Study" form.
+PROJECT_COLUMN = 'Project'
+LEADER_COLUMNS = {'LeaderName': 'name', 'LeaderEmail': 'ContactMail', 'LeaderInstitution': 'HostInstitution'}
+
+
+def read_export(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.jsonl':
+        return pd.read_json(path, lines=True, dtype=False)
+    if extension in ('.xlsx', '.xls'):
+        df = pd.read_excel(path, dtype=str)
+    else:
+        df = pd.read_csv(path, dtype=str)
+    # Spreadsheets hold multi-select answers as "a; b; c".
+    for column in LIST_FIELDS:
+        if column in df:
+            df[column] = (df[column].fillna('').str.split(';')
+                          .map(lambda items: [x.strip() for x in items if x.strip()]))
+    return df
+
+
+def validate_frame(df, known_projects):
+    errors = {}
+
+    def add(mask, message):
+        for index in df.index[mask]:
+            errors.setdefault(index, []).append(message)
+
+    for column in ('name', 'LeaderName', PROJECT_COLUMN):
+        if column not in df:
+            add(pd.Series(True, index=df.index), f'missing column {column}')
+        else:
+            add(df[column].isna() | (df[column].astype(str).str.strip() == ''), f'{column} is empty')
+    if PROJECT_COLUMN in df:
+        add(df[PROJECT_COLUMN].notna() & ~df[PROJECT_COLUMN].isin(known_projects), 'unknown project')
+    if 'latitude' in df and 'longitude' in df:
+        present = df['latitude'].notna() | df['longitude'].notna()
+        for index in df.index[present]:
+            lat, lon = df.at[index, 'latitude'], df.at[index, 'longitude']
+            if not validate_lat_lon(lat, lon):
+                errors.setdefault(index, []).append('invalid latitude/longitude')
+    return errors
+
+
+def to_rows(df):
+    leader = df[[c for c in LEADER_COLUMNS if c in df]].rename(columns=LEADER_COLUMNS)
+    leader = leader.astype(object).where(leader.notna(), None)
+    info = df.drop(columns=[PROJECT_COLUMN, *LEADER_COLUMNS], errors='ignore')
+    if 'latitude' in info and 'longitude' in info:
+        info['latitude'] = pd.to_numeric(info['latitude'])
+        info['longitude'] = pd.to_numeric(info['longitude'])
+    info = normalize_case_study_frame(info)
+    rows = []
+    for project, lead, case_study in zip(df[PROJECT_COLUMN], leader.to_dict('records'), info.to_dict('records')):
+        rows.append({
+            'case_study_info': case_study,
+            'case_study_lead_info': lead,
+            'project_name': project,
+            'case_study_leader_host_institution': lead.get('HostInstitution') or None,
+        })
+    return rows
+
+
+def ingest_case_studies(path, batch_size=200):
+    ensure_schema()
+    start = time.perf_counter()
+    df = read_export(path).reset_index(drop=True)
+    known_projects = [x['name'] for x in run_query("MATCH (n:Project) RETURN n.name AS name")]
+    errors = validate_frame(df, known_projects)
+    valid = df.drop(index=list(errors))
+
+    written = 0
+    for offset in range(0, len(valid), batch_size):
+        batch = valid.iloc[offset:offset + batch_size]
+        rows = to_rows(batch)
+        keys = set(write_case_studies(rows))
+        written += len(keys)
+        # A project deleted since validation leaves its rows unwritten.
+        for index, row in zip(batch.index, rows):
+            if row['submission_key'] not in keys:
+                errors.setdefault(index, []).append('unknown project')
+
+    elapsed = time.perf_counter() - start
+    return {'written': written, 'errors': errors, 'seconds': elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk ingest case studies from a survey export (CSV, XLSX or JSONL).')
+    parser.add_argument('path')
+    parser.add_argument('--batch-size', type=int, default=200)
+    args = parser.parse_args()
+    try:
+        report = ingest_case_studies(args.path, args.batch_size)
+    finally:
+        close_driver()
+    for index, messages in sorted(report['errors'].items()):
+        print(f'record {index + 1}: ' + '; '.join(messages))
+    print(f"Wrote {report['written']} case studies, rejected {len(report['errors'])} "
+          f"in {report['seconds']:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import sys
+import json
+import math
+import time
+import logging
+import threading
+from collections import deque
+
+# Per-query-name latency histograms and a slow-query log, fed by db.run_query,
+# db.run_write and async_db.fetch. Exposed as JSON and Prometheus text.
+BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, math.inf]
+
+slow_query_logger = logging.getLogger('nexusnet.slow_queries')
+
+_stats = {}
+_slow_queries = deque(maxlen=100)
+_lock = threading.Lock()
+slow_query_ms = 500.0
+
+
+def caller_name(depth=2):
+    frame = sys._getframe(depth)
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+
+
+def _db_hits(profile):
+    if not profile:
+        return 0
+    return profile.get('dbHits', 0) + sum(_db_hits(child) for child in profile.get('children', []))
+
+
+def record(name, query, wall_ms, rows, summary=None):
+    available_ms = consumed_ms = None
+    db_hits = None
+    if summary is not None:
+        available_ms = summary.result_available_after
+        consumed_ms = summary.result_consumed_after
+        if summary.profile:
+            db_hits = _db_hits(summary.profile)
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0,
+                                    'server_ms': 0.0, 'db_hits': 0, 'buckets': [0] * len(BUCKETS_MS)}
+        stats['count'] += 1
+        stats['total_ms'] += wall_ms
+        stats['max_ms'] = max(stats['max_ms'], wall_ms)
+        stats['rows'] += rows
+        stats['server_ms'] += (available_ms or 0) + (consumed_ms or 0)
+        stats['db_hits'] += db_hits or 0
+        for i, bound in enumerate(BUCKETS_MS):
+            if wall_ms <= bound:
+                stats['buckets'][i] += 1
+                break
+        if wall_ms >= slow_query_ms:
+            entry = {'name': name, 'query': ' '.join(query.split()), 'wall_ms': round(wall_ms, 2),
+                     'available_after_ms': available_ms, 'consumed_after_ms': consumed_ms,
+                     'rows': rows, 'db_hits': db_hits, 'at': time.time()}
+            _slow_queries.append(entry)
+            slow_query_logger.warning('slow query %s: %.1f ms, %d rows', name, wall_ms, rows)
+
+
+def _label(name):
+    return name.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def snapshot():
+    with _lock:
+        return {
+            'queries': {name: {**stats, 'buckets': dict(zip(map(str, BUCKETS_MS), stats['buckets']))}
+                        for name, stats in _stats.items()},
+            'slow_queries': list(_slow_queries),
+            'slow_query_ms': slow_query_ms,
+        }
+
+
+def to_json():
+    return json.dumps(snapshot(), indent=2)
+
+
+def to_prometheus():
+    lines = ['# TYPE nexusnet_query_duration_ms histogram']
+    with _lock:
+        items = [(name, dict(stats), list(stats['buckets'])) for name, stats in _stats.items()]
+    for name, stats, buckets in sorted(items):
+        label = _label(name)
+        cumulative = 0
+        for bound, count in zip(BUCKETS_MS, buckets):
+            cumulative += count
+            le = '+Inf' if bound == math.inf else str(bound)
+            lines.append(f'nexusnet_query_duration_ms_bucket{{query="{label}",le="{le}"}} {cumulative}')
+        lines.append(f'nexusnet_query_duration_ms_sum{{query="{label}"}} {stats["total_ms"]:.3f}')
+        lines.append(f'nexusnet_query_duration_ms_count{{query="{label}"}} {stats["count"]}')
+    lines.append('# TYPE nexusnet_query_rows_total counter')
+    for name, stats, _ in sorted(items):
+        label = _label(name)
+        lines.append(f'nexusnet_query_rows_total{{query="{label}"}} {stats["rows"]}')
+    lines.append('# TYPE nexusnet_query_db_hits_total counter')
+    for name, stats, _ in sorted(items):
+        label = _label(name)
+        lines.append(f'nexusnet_query_db_hits_total{{query="{label}"}} {stats["db_hits"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _slow_queries.clear()
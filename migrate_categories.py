@@ -0,0 +1,46 @@
+import time
+import argparse
+from db import run_query, run_write, close_driver
+from schema import ensure_schema
+from casestudies import CATEGORY_FIELDS, CATEGORY_LINK_QUERY, category_values
+
+# One-shot backfill of category links for case studies written before the
+# write path created them. Safe to re-run: every node and link is MERGEd.
+PAGE_QUERY = """
+MATCH (case_study:CaseStudy) WHERE case_study.id > $after
+RETURN case_study.id AS id, case_study {%s} AS info
+ORDER BY id LIMIT $batch_size
+""" % ", ".join(f".{field}" for field in CATEGORY_FIELDS)
+
+
+def migrate_category_links(batch_size=500, progress=None):
+    ensure_schema()
+    after = ''
+    migrated = 0
+    while True:
+        records = run_query(PAGE_QUERY, {'after': after, 'batch_size': batch_size})
+        if not records:
+            break
+        rows = [{'id': record['id'], 'categories': category_values(record['info'])} for record in records]
+        run_write(CATEGORY_LINK_QUERY, {'rows': rows})
+        migrated += len(rows)
+        after = records[-1]['id']
+        if progress is not None:
+            progress(migrated)
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Link existing case studies to category nodes.')
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    try:
+        migrated = migrate_category_links(args.batch_size, lambda n: print(f'{n} case studies linked'))
+    finally:
+        close_driver()
+    print(f'Linked {migrated} case studies in {time.perf_counter() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from db import run_query, run_write, get_setting, close_driver
+from cache import get_cache
+
+# Collaboration network over researchers, projects, case studies and
+# institutions, analysed in-process. The graph is treated as undirected and
+# held as a CSR adjacency (indptr/indices arrays); every measure below is a
+# loop over a handful of whole-array NumPy operations, never over nodes.
+LABELS = ['Researcher', 'Project', 'CaseStudy', 'Institution']
+EDGE_TYPES = ['WORKS_ON', 'BELONGS_TO', 'HAS_CASE_STUDY']
+DAMPING = 0.85
+# Betweenness is estimated from this many BFS sources (Brandes with pivots);
+# the estimate is exact when the graph has no more nodes than that.
+BETWEENNESS_SAMPLES = int(get_setting('NETWORK_BETWEENNESS_SAMPLES', 64))
+SCORE_COLUMNS = ['degree', 'pageRank', 'betweenness', 'community']
+
+network_cache = get_cache('network_scores', ttl=float(get_setting('NETWORK_CACHE_TTL', 86400)), max_entries=2)
+
+EDGES_QUERY = """
+MATCH (a)-[r]->(b) WHERE type(r) IN $types
+RETURN elementId(a) AS src, [label IN labels(a) WHERE label IN $labels][0] AS src_label,
+       elementId(b) AS dst, [label IN labels(b) WHERE label IN $labels][0] AS dst_label
+"""
+
+WRITE_SCORES_QUERY = """
+UNWIND $rows AS row
+MATCH (n) WHERE elementId(n) = row.eid
+SET n.degree = row.degree, n.pageRank = row.pageRank, n.betweenness = row.betweenness,
+    n.community = row.community, n.scoresUpdatedAt = timestamp()
+"""
+
+# Scores as last written back by `network.py --write`, for request paths that
+# must not run the analysis.
+STORED_SCORES_QUERY = """
+MATCH (n:`{label}`) WHERE n.{by} IS NOT NULL
+RETURN elementId(n) AS eid, n.name AS name, n.degree AS degree, n.pageRank AS pageRank,
+       n.betweenness AS betweenness, n.community AS community, n.scoresUpdatedAt AS scoresUpdatedAt
+ORDER BY n.{by} DESC LIMIT $limit
+"""
+
+
+def last_change():
+    # Newest stamp on a relationship of the network or on a tombstone, i.e.
+    # when its structure last changed. Score write-backs only touch nodes, so
+    # they do not move it.
+    stamps = [run_query(f"MATCH ()-[r:`{rel_type}`]->() WHERE r.updatedAt IS NOT NULL "
+                        f"RETURN r.updatedAt AS stamp ORDER BY stamp DESC LIMIT 1") for rel_type in EDGE_TYPES]
+    stamps.append(run_query("MATCH (t:Tombstone) WHERE t.deletedAt IS NOT NULL "
+                            "RETURN t.deletedAt AS stamp ORDER BY stamp DESC LIMIT 1"))
+    return max((records[0]['stamp'] for records in stamps if records), default=0)
+
+
+def build_adjacency(src, dst, n):
+    # Symmetric CSR without self-loops or parallel edges.
+    keep = src != dst
+    low, high = np.minimum(src[keep], dst[keep]), np.maximum(src[keep], dst[keep])
+    pairs = np.unique(low.astype(np.int64) * n + high)
+    low, high = pairs // n, pairs % n
+    rows, cols = np.concatenate([low, high]), np.concatenate([high, low])
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return indptr, cols[order]
+
+
+def load_graph():
+    records = run_query(EDGES_QUERY, {'types': EDGE_TYPES, 'labels': LABELS})
+    edges = pd.DataFrame(records, columns=['src', 'src_label', 'dst', 'dst_label'])
+    edges = edges[edges['src_label'].notna() & edges['dst_label'].notna()]
+    codes, eids = pd.factorize(pd.concat([edges['src'], edges['dst']], ignore_index=True))
+    labels = pd.concat([edges['src_label'], edges['dst_label']], ignore_index=True).groupby(codes).first()
+    indptr, indices = build_adjacency(codes[:len(edges)], codes[len(edges):], len(eids))
+    return pd.Index(eids, name='eid'), labels.to_numpy(), indptr, indices
+
+
+def _neighbours(indptr, indices, frontier):
+    # (source, neighbour) for every edge leaving the frontier nodes.
+    counts = indptr[frontier + 1] - indptr[frontier]
+    total = counts.sum()
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(frontier, counts), indices[np.repeat(indptr[frontier], counts) + offsets]
+
+
+def pagerank(indptr, indices, damping=DAMPING, tol=1e-10, max_iter=100):
+    n = len(indptr) - 1
+    degree = np.diff(indptr).astype(np.float64)
+    sources = np.repeat(np.arange(n), np.diff(indptr))
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        share = np.divide(rank, degree, out=np.zeros(n), where=degree > 0)
+        dangling = rank[degree == 0].sum()
+        new = (1 - damping) / n + damping * (np.bincount(indices, weights=share[sources], minlength=n) + dangling / n)
+        converged = np.abs(new - rank).sum() < tol
+        rank = new
+        if converged:
+            break
+    return rank
+
+
+def betweenness(indptr, indices, samples=BETWEENNESS_SAMPLES, seed=0):
+    # Brandes' algorithm from `samples` random sources, one level of the BFS
+    # at a time; scaled to estimate the all-pairs value, normalized to [0, 1].
+    n = len(indptr) - 1
+    if n < 3:
+        return np.zeros(n)
+    rng = np.random.default_rng(seed)
+    sources = rng.choice(n, size=min(samples, n), replace=False)
+    scores = np.zeros(n)
+    for source in sources:
+        distance = np.full(n, -1, dtype=np.int64)
+        distance[source] = 0
+        paths = np.zeros(n)
+        paths[source] = 1
+        frontier = np.array([source])
+        levels = []
+        depth = 0
+        while frontier.size:
+            src, dst = _neighbours(indptr, indices, frontier)
+            distance[np.unique(dst[distance[dst] == -1])] = depth + 1
+            tree = distance[dst] == depth + 1
+            src, dst = src[tree], dst[tree]
+            paths += np.bincount(dst, weights=paths[src], minlength=n)
+            levels.append((src, dst))
+            frontier = np.unique(dst)
+            depth += 1
+        dependency = np.zeros(n)
+        for src, dst in reversed(levels):
+            dependency += np.bincount(src, weights=paths[src] / paths[dst] * (1 + dependency[dst]), minlength=n)
+        dependency[source] = 0
+        scores += dependency
+    # Each unordered pair is seen from both ends when every node is a source.
+    scores *= n / len(sources) / 2
+    return scores * 2 / ((n - 1) * (n - 2))
+
+
+def communities(indptr, indices, seed=0, max_iter=50):
+    # Label propagation: every node takes the label most common among its
+    # neighbours and itself (ties to the smallest). Only a random half of the
+    # nodes moves per round, which stops the flip-flopping synchronous updates
+    # show on bipartite graphs like this one.
+    n = len(indptr) - 1
+    rng = np.random.default_rng(seed)
+    nodes = np.concatenate([np.repeat(np.arange(n), np.diff(indptr)), np.arange(n)])
+    neighbours = np.concatenate([indices, np.arange(n)])
+    labels = np.arange(n)
+    for _ in range(max_iter):
+        keys, votes = np.unique(nodes.astype(np.int64) * n + labels[neighbours], return_counts=True)
+        node, label = keys // n, keys % n
+        order = np.lexsort((label, -votes, node))
+        first = order[np.r_[True, node[order][1:] != node[order][:-1]]]
+        best = np.empty(n, dtype=np.int64)
+        best[node[first]] = label[first]
+        if np.array_equal(best, labels):
+            break
+        labels = np.where(rng.random(n) < 0.5, best, labels)
+    return np.unique(labels, return_inverse=True)[1]
+
+
+def analyze():
+    eids, labels, indptr, indices = load_graph()
+    if len(eids) == 0:
+        return pd.DataFrame({'label': pd.Series(dtype=object), 'degree': pd.Series(dtype=np.int64),
+                             'pageRank': pd.Series(dtype=np.float64), 'betweenness': pd.Series(dtype=np.float64),
+                             'community': pd.Series(dtype=np.int64)}, index=eids)
+    return pd.DataFrame({
+        'label': labels,
+        'degree': np.diff(indptr),
+        'pageRank': pagerank(indptr, indices),
+        'betweenness': betweenness(indptr, indices),
+        'community': communities(indptr, indices),
+    }, index=eids)
+
+
+def get_scores():
+    return network_cache.get_or_load(last_change(), analyze)
+
+
+def top(label, limit=20, by='pageRank'):
+    scores = get_scores()
+    return scores[scores['label'] == label].nlargest(limit, by)
+
+
+def stored_top(label, limit=20, by='pageRank'):
+    if by not in SCORE_COLUMNS:
+        raise ValueError(f"Unknown score: {by}")
+    records = run_query(STORED_SCORES_QUERY.format(label=label, by=by), {'limit': limit})
+    return pd.DataFrame(records, columns=['eid', 'name'] + SCORE_COLUMNS + ['scoresUpdatedAt']).set_index('eid')
+
+
+def write_scores(scores, chunk_size=10000, progress=None):
+    rows = scores[SCORE_COLUMNS].reset_index().astype({'degree': int, 'community': int}).to_dict('records')
+    for start in range(0, len(rows), chunk_size):
+        run_write(WRITE_SCORES_QUERY, {'rows': rows[start:start + chunk_size]})
+        if progress is not None:
+            progress(min(start + chunk_size, len(rows)), len(rows))
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compute centrality and communities of the collaboration network.')
+    parser.add_argument('--write', action='store_true', help='Write the scores back as node properties')
+    parser.add_argument('--top', type=int, default=20, help='Institutions to print')
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    args = parser.parse_args()
+    try:
+        start = time.perf_counter()
+        scores = get_scores()
+        print(f"{len(scores)} nodes analysed in {time.perf_counter() - start:.1f}s")
+        institutions = scores[scores['label'] == 'Institution'].nlargest(args.top, 'pageRank')
+        names = {r['eid']: r['name'] for r in run_query("MATCH (n) WHERE elementId(n) IN $eids "
+                                                         "RETURN elementId(n) AS eid, n.name AS name",
+                                                         {'eids': list(institutions.index)})}
+        print(institutions.assign(name=institutions.index.map(names))[['name'] + SCORE_COLUMNS].to_string(index=False))
+        if args.write:
+            written = write_scores(scores, args.chunk_size,
+                                   lambda done, total: print(f'Wrote {done}/{total} nodes'))
+            print(f"Wrote scores to {written} nodes")
+    finally:
+        close_driver()
+
+
+if __name__ == '__main__':
+    main()
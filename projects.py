@@ -0,0 +1,61 @@
+from neo4j.exceptions import ConstraintError
+from db import run_write
+import snapshot
+
+# One transaction per batch. A row whose project name is already taken is
+# skipped rather than failing the whole batch, unless the existing project
+# carries the row's own submission key: then it is a retry of a write that did
+# commit, and counts as written.
+PROJECTS_QUERY = """
+UNWIND $rows AS row
+OPTIONAL MATCH (existing:Project {name: row.project_info.name})
+WITH row, existing
+FOREACH (_ IN CASE WHEN existing IS NULL THEN [1] ELSE [] END |
+    MERGE (coord:Institution {name: row.coord_info.name})
+    ON CREATE SET coord += row.coord_info, coord.id = apoc.create.uuid(),
+        coord.createdAt = timestamp(), coord.updatedAt = timestamp()
+    CREATE (project:Project)
+    SET project += row.project_info, project.submissionKey = row.submission_key,
+        project.createdAt = timestamp(), project.updatedAt = timestamp()
+    MERGE (coord)-[r:WORKS_ON {role: 'Project Coordinator'}]->(project)
+    ON CREATE SET r.timestamp = timestamp(), r.createdAt = timestamp(), r.updatedAt = timestamp()
+)
+RETURN row.index AS index,
+       existing IS NULL OR coalesce(existing.submissionKey = row.submission_key, false) AS written
+"""
+
+
+class DuplicateProjectError(Exception):
+    pass
+
+
+def write_projects(rows):
+    # rows: dicts with project_info, coord_info and submission_key. Returns a
+    # written flag per row; a name repeated within the batch is only written
+    # for its first row.
+    first = {}
+    for index, row in enumerate(rows):
+        first.setdefault(row['project_info']['name'], index)
+    batch = [{**row, 'index': index} for index, row in enumerate(rows)
+             if first[row['project_info']['name']] == index]
+    if not batch:
+        return []
+    try:
+        records = run_write(PROJECTS_QUERY, {'rows': batch})
+    except ConstraintError as e:
+        # project_name_unique is the only constraint this query can violate:
+        # a concurrent write took a name after it was checked. That project is
+        # visible to a second attempt, which skips it.
+        if e.code != 'Neo.ClientError.Schema.ConstraintValidationFailed':
+            raise
+        records = run_write(PROJECTS_QUERY, {'rows': batch})
+    written = {record['index'] for record in records if record['written']}
+    if written:
+        snapshot.notify()
+    return [index in written for index in range(len(rows))]
+
+
+def write_project(project_info, coord_info, submission_key=None):
+    if not write_projects([{'project_info': project_info, 'coord_info': coord_info,
+                            'submission_key': submission_key}])[0]:
+        raise DuplicateProjectError('Project with the same name already exists in the database')
@@ -0,0 +1,79 @@
+import re
+from functools import lru_cache
+from db import run_query
+from cache import get_cache
+
+# Values are always passed as parameters. Labels and property keys cannot be
+# parameterized in Cypher, so they are checked against the labels/keys the
+# database knows about and then inlined. The resulting query text depends only
+# on the shape (label + keys), which keeps the server's plan cache warm.
+IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+KNOWN_LABELS = {'Project', 'Institution', 'Researcher', 'CaseStudy'}
+KNOWN_KEYS = {'name', 'id'}
+
+schema_cache = get_cache('schema_identifiers', ttl=600)
+
+
+def _load_identifiers():
+    labels = {x['label'] for x in run_query("CALL db.labels() YIELD label RETURN label")}
+    keys = {x['propertyKey'] for x in run_query("CALL db.propertyKeys() YIELD propertyKey RETURN propertyKey")}
+    return {'labels': labels | KNOWN_LABELS, 'keys': keys | KNOWN_KEYS}
+
+
+def _check(kind, value):
+    if not isinstance(value, str) or not IDENTIFIER.match(value):
+        raise ValueError(f'Invalid {kind[:-1]}: {value!r}')
+    if value in schema_cache.get_or_load('all', _load_identifiers)[kind]:
+        return value
+    # The label or key may have been created since the last load.
+    schema_cache.invalidate()
+    if value in schema_cache.get_or_load('all', _load_identifiers)[kind]:
+        return value
+    raise ValueError(f'Unknown {kind[:-1]}: {value!r}')
+
+
+def check_label(label):
+    return _check('labels', label)
+
+
+def check_key(key):
+    return _check('keys', key)
+
+
+@lru_cache(maxsize=256)
+def _node_exists(label, keys):
+    where_clause = " AND ".join(f"n.`{key}` = $values.`{key}`" for key in keys)
+    return f"MATCH (n:`{label}`) WHERE {where_clause} RETURN 1 LIMIT 1"
+
+
+@lru_cache(maxsize=64)
+def _node_names(label):
+    return f"MATCH (n:`{label}`) RETURN n.name AS name"
+
+
+@lru_cache(maxsize=64)
+def _node_by_name(label):
+    return f"MATCH (n:`{label}` {{name: $name}}) RETURN n LIMIT 1"
+
+
+@lru_cache(maxsize=256)
+def _set_node_property(label, key):
+    return f"MATCH (n:`{label}` {{name: $name}}) SET n.`{key}` = $value, n.updatedAt = timestamp()"
+
+
+def node_exists(label, keys):
+    keys = tuple(sorted(check_key(key) for key in keys))
+    return _node_exists(check_label(label), keys)
+
+
+def node_names(label):
+    return _node_names(check_label(label))
+
+
+def node_by_name(label):
+    return _node_by_name(check_label(label))
+
+
+def set_node_property(label, key):
+    return _set_node_property(check_label(label), check_key(key))
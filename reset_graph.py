@@ -0,0 +1,134 @@
+import argparse
+from db import run_write, run_query, close_driver
+import querybuilder as qb
+import snapshot
+from changes import node_tombstone, RESET_TOMBSTONE
+
+# Deletions run as a loop of small write transactions instead of one
+# MATCH ... DETACH DELETE, so transaction memory and lock time stay bounded
+# by chunk_size. Every loop reports progress and checks the cancel event
+# between chunks; work already committed stays deleted when cancelled.
+# Each deleted node leaves a :Tombstone in the same transaction for the
+# change feed (see changes.py); tombstones themselves are never matched here.
+# A full reset instead clears the tombstones and leaves a single reset marker,
+# and keeps the :SchemaVersion node so migrations are not re-run.
+
+
+def _delete_loop(query, parameters, chunk_size, stage, progress, cancel):
+    deleted = 0
+    while cancel is None or not cancel.is_set():
+        result = run_write(query, {**parameters, 'limit': chunk_size})
+        count = result[0]['deleted']
+        deleted += count
+        if progress is not None:
+            progress(stage, deleted)
+        if count < chunk_size:
+            break
+    return deleted
+
+
+def delete_nodes(label=None, chunk_size=10000, progress=None, cancel=None):
+    if label is None:
+        return reset_all(chunk_size, progress, cancel)
+    query = (f"MATCH (n:`{qb.check_label(label)}`) WHERE NOT n:Tombstone WITH n LIMIT $limit "
+             f"{node_tombstone('n')} DETACH DELETE n RETURN count(*) AS deleted")
+    deleted = _delete_loop(query, {}, chunk_size, label, progress, cancel)
+    snapshot.notify()
+    return deleted
+
+
+def reset_all(chunk_size=10000, progress=None, cancel=None):
+    deleted = _delete_loop("MATCH (n) WHERE NOT n:Tombstone AND NOT n:SchemaVersion WITH n LIMIT $limit "
+                           "DETACH DELETE n RETURN count(*) AS deleted", {}, chunk_size, 'all', progress, cancel)
+    if cancel is None or not cancel.is_set():
+        _delete_loop("MATCH (t:Tombstone) WITH t LIMIT $limit DELETE t RETURN count(*) AS deleted",
+                     {}, chunk_size, 'tombstones', progress, cancel)
+    # Written even when cancelled: the nodes deleted so far left no tombstones.
+    run_write(RESET_TOMBSTONE)
+    snapshot.notify()
+    return deleted
+
+
+def _delete_by_ids(query, ids, chunk_size, stage, progress, cancel):
+    deleted = 0
+    for offset in range(0, len(ids), chunk_size):
+        if cancel is not None and cancel.is_set():
+            break
+        result = run_write(query, {'ids': ids[offset:offset + chunk_size]})
+        deleted += result[0]['deleted']
+        if progress is not None:
+            progress(stage, deleted)
+    return deleted
+
+
+def delete_project(project_name, chunk_size=1000, progress=None, cancel=None):
+    # Researchers and institutions are shared between projects, so only the
+    # ones left without any project/case-study work after the delete go.
+    related = run_query("""
+    MATCH (p:Project {name: $name})
+    OPTIONAL MATCH (p)<-[:WORKS_ON]-(r:Researcher)
+    OPTIONAL MATCH (r)-[:BELONGS_TO]->(ri:Institution)
+    OPTIONAL MATCH (p)<-[:WORKS_ON]-(pi:Institution)
+    RETURN p.name AS name, collect(DISTINCT elementId(r)) AS researchers,
+           collect(DISTINCT elementId(ri)) + collect(DISTINCT elementId(pi)) AS institutions
+    """, {'name': project_name})
+    # Grouped by the project, so no row comes back when it does not exist.
+    if not related:
+        return {'case_studies': 0, 'projects': 0, 'researchers': 0, 'institutions': 0, 'cancelled': False}
+
+    counts = {}
+    counts['case_studies'] = _delete_loop(f"""
+    MATCH (:Project {{name: $name}})-[:HAS_CASE_STUDY]->(c:CaseStudy)
+    WITH c LIMIT $limit {node_tombstone('c')} DETACH DELETE c RETURN count(*) AS deleted
+    """, {'name': project_name}, chunk_size, 'case_studies', progress, cancel)
+    if cancel is not None and cancel.is_set():
+        return {**counts, 'cancelled': True}
+
+    counts['projects'] = run_write(f"""
+    MATCH (p:Project {{name: $name}}) {node_tombstone('p')} DETACH DELETE p RETURN count(*) AS deleted
+    """, {'name': project_name})[0]['deleted']
+
+    counts['researchers'] = _delete_by_ids(f"""
+    UNWIND $ids AS id
+    MATCH (r:Researcher) WHERE elementId(r) = id AND NOT (r)-[:WORKS_ON]->()
+    {node_tombstone('r')} DETACH DELETE r RETURN count(*) AS deleted
+    """, related[0]['researchers'], chunk_size, 'researchers', progress, cancel)
+
+    counts['institutions'] = _delete_by_ids(f"""
+    UNWIND $ids AS id
+    MATCH (i:Institution) WHERE elementId(i) = id AND NOT (i)--()
+    {node_tombstone('i')} DELETE i RETURN count(*) AS deleted
+    """, list(set(related[0]['institutions'])), chunk_size, 'institutions', progress, cancel)
+    counts['cancelled'] = cancel is not None and cancel.is_set()
+    snapshot.notify()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Delete graph data in chunked transactions.')
+    scope = parser.add_mutually_exclusive_group(required=True)
+    scope.add_argument('--all', action='store_true', help='Delete every node except the schema version')
+    scope.add_argument('--label', help='Delete every node with this label')
+    scope.add_argument('--project', help='Delete a project, its case studies and orphaned researchers/institutions')
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    def progress(stage, deleted):
+        print(f'{stage}: {deleted} deleted')
+
+    try:
+        if args.project:
+            result = delete_project(args.project, args.chunk_size, progress)
+        else:
+            result = delete_nodes(args.label, args.chunk_size, progress)
+    except KeyboardInterrupt:
+        # Chunks committed before Ctrl-C stay deleted.
+        print('Cancelled')
+        return
+    finally:
+        close_driver()
+    print(result)
+
+
+if __name__ == '__main__':
+    main()
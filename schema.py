@@ -0,0 +1,130 @@
+import threading
+from db import run_query
+
+# Each migration is applied once and recorded on the :SchemaVersion node.
+# Statements use IF NOT EXISTS so re-running a migration is harmless.
+MIGRATIONS = [
+    (1, [
+        "CREATE CONSTRAINT project_name_unique IF NOT EXISTS FOR (n:Project) REQUIRE n.name IS UNIQUE",
+        "CREATE CONSTRAINT institution_name_unique IF NOT EXISTS FOR (n:Institution) REQUIRE n.name IS UNIQUE",
+        "CREATE CONSTRAINT researcher_name_unique IF NOT EXISTS FOR (n:Researcher) REQUIRE n.name IS UNIQUE",
+        "CREATE CONSTRAINT case_study_id_unique IF NOT EXISTS FOR (n:CaseStudy) REQUIRE n.id IS UNIQUE",
+    ]),
+    (2, [
+        "CREATE INDEX institution_id IF NOT EXISTS FOR (n:Institution) ON (n.id)",
+        "CREATE INDEX researcher_id IF NOT EXISTS FOR (n:Researcher) ON (n.id)",
+    ]),
+    (3, [
+        "CREATE CONSTRAINT sector_name_unique IF NOT EXISTS FOR (n:Sector) REQUIRE n.name IS UNIQUE",
+        "CREATE CONSTRAINT sdg_name_unique IF NOT EXISTS FOR (n:SDG) REQUIRE n.name IS UNIQUE",
+        "CREATE CONSTRAINT stakeholder_type_name_unique IF NOT EXISTS FOR (n:StakeholderType) REQUIRE n.name IS UNIQUE",
+        "CREATE CONSTRAINT stakeholder_sector_name_unique IF NOT EXISTS FOR (n:StakeholderSector) REQUIRE n.name IS UNIQUE",
+        "CREATE CONSTRAINT data_type_name_unique IF NOT EXISTS FOR (n:DataType) REQUIRE n.name IS UNIQUE",
+        "CREATE CONSTRAINT impact_name_unique IF NOT EXISTS FOR (n:Impact) REQUIRE n.name IS UNIQUE",
+        "CREATE CONSTRAINT method_name_unique IF NOT EXISTS FOR (n:Method) REQUIRE n.name IS UNIQUE",
+    ]),
+    (4, [
+        "CREATE POINT INDEX case_study_location IF NOT EXISTS FOR (n:CaseStudy) ON (n.location)",
+    ]),
+    (5, [
+        "CREATE CONSTRAINT case_study_submission_key_unique IF NOT EXISTS FOR (n:CaseStudy) REQUIRE n.submissionKey IS UNIQUE",
+    ]),
+    (6, [
+        "CREATE INDEX project_updated_at IF NOT EXISTS FOR (n:Project) ON (n.updatedAt)",
+        "CREATE INDEX case_study_updated_at IF NOT EXISTS FOR (n:CaseStudy) ON (n.updatedAt)",
+        "CREATE INDEX researcher_updated_at IF NOT EXISTS FOR (n:Researcher) ON (n.updatedAt)",
+        "CREATE INDEX institution_updated_at IF NOT EXISTS FOR (n:Institution) ON (n.updatedAt)",
+        "CREATE INDEX sector_updated_at IF NOT EXISTS FOR (n:Sector) ON (n.updatedAt)",
+        "CREATE INDEX sdg_updated_at IF NOT EXISTS FOR (n:SDG) ON (n.updatedAt)",
+        "CREATE INDEX stakeholder_type_updated_at IF NOT EXISTS FOR (n:StakeholderType) ON (n.updatedAt)",
+        "CREATE INDEX stakeholder_sector_updated_at IF NOT EXISTS FOR (n:StakeholderSector) ON (n.updatedAt)",
+        "CREATE INDEX data_type_updated_at IF NOT EXISTS FOR (n:DataType) ON (n.updatedAt)",
+        "CREATE INDEX impact_updated_at IF NOT EXISTS FOR (n:Impact) ON (n.updatedAt)",
+        "CREATE INDEX method_updated_at IF NOT EXISTS FOR (n:Method) ON (n.updatedAt)",
+        "CREATE INDEX works_on_updated_at IF NOT EXISTS FOR ()-[r:WORKS_ON]-() ON (r.updatedAt)",
+        "CREATE INDEX belongs_to_updated_at IF NOT EXISTS FOR ()-[r:BELONGS_TO]-() ON (r.updatedAt)",
+        "CREATE INDEX has_case_study_updated_at IF NOT EXISTS FOR ()-[r:HAS_CASE_STUDY]-() ON (r.updatedAt)",
+        "CREATE INDEX involves_sector_updated_at IF NOT EXISTS FOR ()-[r:INVOLVES_SECTOR]-() ON (r.updatedAt)",
+        "CREATE INDEX assesses_sdg_updated_at IF NOT EXISTS FOR ()-[r:ASSESSES_SDG]-() ON (r.updatedAt)",
+        "CREATE INDEX engages_stakeholder_updated_at IF NOT EXISTS FOR ()-[r:ENGAGES_STAKEHOLDER]-() ON (r.updatedAt)",
+        "CREATE INDEX engages_sector_updated_at IF NOT EXISTS FOR ()-[r:ENGAGES_SECTOR]-() ON (r.updatedAt)",
+        "CREATE INDEX uses_data_updated_at IF NOT EXISTS FOR ()-[r:USES_DATA]-() ON (r.updatedAt)",
+        "CREATE INDEX has_impact_updated_at IF NOT EXISTS FOR ()-[r:HAS_IMPACT]-() ON (r.updatedAt)",
+        "CREATE INDEX uses_method_updated_at IF NOT EXISTS FOR ()-[r:USES_METHOD]-() ON (r.updatedAt)",
+        "CREATE INDEX tombstone_deleted_at IF NOT EXISTS FOR (n:Tombstone) ON (n.deletedAt)",
+        # Stamp everything written before this migration, in batches.
+        """MATCH (n) WHERE n.updatedAt IS NULL AND NOT n:Tombstone AND NOT n:SchemaVersion
+        CALL { WITH n SET n.createdAt = coalesce(n.createdAt, timestamp()), n.updatedAt = timestamp() }
+        IN TRANSACTIONS OF 10000 ROWS""",
+        """MATCH ()-[r]->() WHERE r.updatedAt IS NULL
+        CALL { WITH r SET r.createdAt = coalesce(r.timestamp, timestamp()), r.updatedAt = coalesce(r.timestamp, timestamp()) }
+        IN TRANSACTIONS OF 10000 ROWS""",
+    ]),
+    (7, [
+        "CREATE FULLTEXT INDEX entity_names IF NOT EXISTS FOR (n:Institution|Researcher) ON EACH [n.name]",
+    ]),
+    (8, [
+        # Institution names held as text, rewritten when institutions are merged.
+        "CREATE INDEX case_study_leader_institution IF NOT EXISTS FOR (n:CaseStudy) ON (n.LeaderInstitution)",
+        "CREATE INDEX researcher_host_institution IF NOT EXISTS FOR (n:Researcher) ON (n.HostInstitution)",
+    ]),
+]
+
+# Properties a migration makes unique; existing duplicates would make the
+# constraint creation fail, so they are reported before anything is applied.
+UNIQUE_PROPERTIES = {
+    1: [('Project', 'name'), ('Institution', 'name'), ('Researcher', 'name'), ('CaseStudy', 'id')],
+}
+
+DUPLICATES_QUERY = """
+MATCH (n:`{label}`) WHERE n.`{key}` IS NOT NULL
+WITH n.`{key}` AS value, count(*) AS copies WHERE copies > 1
+RETURN value, copies ORDER BY copies DESC, value LIMIT 20
+"""
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+class SchemaMigrationError(Exception):
+    pass
+
+
+def check_duplicates(version):
+    problems = []
+    for label, key in UNIQUE_PROPERTIES.get(version, []):
+        duplicates = run_query(DUPLICATES_QUERY.format(label=label, key=key))
+        if duplicates:
+            values = ', '.join(f"{d['value']!r} (x{d['copies']})" for d in duplicates)
+            problems.append(f"{label}.{key}: {values}")
+    if problems:
+        raise SchemaMigrationError(
+            f"Migration {version} adds unique constraints but the database has duplicates. "
+            f"Merge them first (Institution/Researcher: python dedupe_entities.py), then restart.\n"
+            + "\n".join(problems))
+
+
+def get_schema_version():
+    result = run_query("MATCH (v:SchemaVersion {id: 'nexusnet'}) RETURN v.version AS version")
+    return result[0]['version'] if result else 0
+
+
+def ensure_schema():
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        current = get_schema_version()
+        for version, statements in MIGRATIONS:
+            if version <= current:
+                continue
+            check_duplicates(version)
+            for statement in statements:
+                run_query(statement)
+            run_query("""
+            MERGE (v:SchemaVersion {id: 'nexusnet'})
+            SET v.version = $version, v.appliedAt = timestamp()
+            """, {'version': version})
+        _schema_ready = True
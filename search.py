@@ -0,0 +1,125 @@
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from db import run_query, get_setting
+from cache import get_cache
+from casestudies import CATEGORY_FIELDS
+import snapshot
+
+# Scalar facets are read from a property; a filter matches any of the chosen
+# values. Multi-select facets go through the category nodes; a filter
+# matches case studies linked to all of the chosen values.
+PROPERTY_FACETS = {
+    'Country': 'cs.Country',
+    'Scale': 'cs.Scale',
+    'Transboundary': 'cs.Transboundary',
+    'FundedBy': 'p.FundedBy',
+}
+CATEGORY_FACETS = ['NexusSectors', 'SDGs', 'Stakeholders']
+FACETS = list(PROPERTY_FACETS) + CATEGORY_FACETS
+
+facets_cache = get_cache('case_study_facets', ttl=float(get_setting('FACET_CACHE_TTL', 600)), max_entries=256)
+
+
+@lru_cache(maxsize=256)
+def _search_query(filtered):
+    conditions = []
+    for facet in filtered:
+        if facet in PROPERTY_FACETS:
+            conditions.append(f"{PROPERTY_FACETS[facet]} IN $filters.{facet}")
+        else:
+            label, rel_type, _ = CATEGORY_FIELDS[facet]
+            conditions.append(f"all(value IN $filters.{facet} WHERE EXISTS "
+                              f"{{ MATCH (cs)-[:{rel_type}]->(:{label} {{name: value}}) }})")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    lists = ",\n     ".join(f"[(cs)-[:{CATEGORY_FIELDS[f][1]}]->(c:{CATEGORY_FIELDS[f][0]}) | c.name] AS {f}"
+                           for f in CATEGORY_FACETS)
+    fields = ", ".join(f"{f}: {PROPERTY_FACETS[f]}" for f in PROPERTY_FACETS) + ", " + \
+        ", ".join(f"{f}: {f}" for f in CATEGORY_FACETS)
+    counts = []
+    for facet in FACETS:
+        unwind = f"UNWIND m.{facet} AS value" if facet in CATEGORY_FACETS else f"WITH m.{facet} AS value"
+        counts.append(f"""CALL {{
+    WITH matches
+    UNWIND matches AS m
+    {unwind}
+    WITH value, count(*) AS n WHERE value IS NOT NULL
+    RETURN collect([value, n]) AS {facet}
+}}""")
+    return f"""
+MATCH (p:Project)-[:HAS_CASE_STUDY]->(cs:CaseStudy)
+{where}
+WITH cs, p,
+     {lists}
+ORDER BY cs.name
+WITH collect({{id: cs.id, name: cs.name, project: p.name, {fields}}}) AS matches
+{chr(10).join(counts)}
+RETURN size(matches) AS total, matches[..$limit] AS results, {', '.join(FACETS)}
+"""
+
+
+def _search_snapshot(graph, filters, limit):
+    # Same result shape as the Cypher search, computed over the snapshot's
+    # case-study table. Property facets are the `cs.`/`p.` columns named in
+    # PROPERTY_FACETS; category facets are the case study's list properties.
+    table = graph.case_studies
+    columns = {facet: PROPERTY_FACETS.get(facet, f'cs.{facet}') for facet in FACETS}
+    values = {facet: table[column] if column in table else pd.Series([None] * len(table), dtype=object)
+              for facet, column in columns.items()}
+    for facet in CATEGORY_FACETS:
+        values[facet] = values[facet].map(lambda v: v if isinstance(v, list) else [])
+    mask = np.ones(len(table), dtype=bool)
+    for facet, wanted in filters.items():
+        if facet in PROPERTY_FACETS:
+            mask &= values[facet].isin(wanted).to_numpy()
+        else:
+            wanted = set(wanted)
+            mask &= np.fromiter((wanted <= set(v) for v in values[facet]), dtype=bool, count=len(table))
+    matches = pd.DataFrame({'id': table['cs.id'] if 'cs.id' in table else None,
+                            'name': table['cs.name'] if 'cs.name' in table else None,
+                            'project': table['p.name'] if 'p.name' in table else None,
+                            **values})[mask]
+    facets = {}
+    for facet in FACETS:
+        column = matches[facet].explode() if facet in CATEGORY_FACETS else matches[facet]
+        facets[facet] = {value: int(n) for value, n in column.dropna().value_counts().items()}
+    results = matches.head(limit).astype(object).where(matches.head(limit).notna(), None).to_dict('records')
+    return {'total': int(mask.sum()), 'results': results, 'facets': facets}
+
+
+def _filters(filters):
+    filters = {facet: sorted(values) for facet, values in (filters or {}).items() if values}
+    unknown = set(filters) - set(FACETS)
+    if unknown:
+        raise ValueError(f'Unknown facets: {sorted(unknown)}')
+    return filters
+
+
+def _parse_search(records):
+    record = records[0]
+    return {
+        'total': record['total'],
+        'results': record['results'],
+        'facets': {facet: dict(sorted(record[facet], key=lambda x: -x[1])) for facet in FACETS},
+    }
+
+
+def search_load(filters=None, limit=50):
+    # The cached search as an async_db.run_cached entry, so several searches
+    # (e.g. the unfiltered facet options and the current filter) load
+    # concurrently.
+    filters = _filters(filters)
+    key = (tuple((facet, tuple(values)) for facet, values in sorted(filters.items())), limit)
+    return (facets_cache, key, _search_query(tuple(sorted(filters))), {'filters': filters, 'limit': limit},
+            _parse_search)
+
+
+def search_case_studies(filters=None, limit=50):
+    # Filters are keyed by facet name; empty selections are ignored so that
+    # equivalent searches share a query shape and a cache entry.
+    filters = _filters(filters)
+    if snapshot.active():
+        return _search_snapshot(snapshot.current(), filters, limit)
+    cache, key, query, parameters, parse = search_load(filters, limit)
+    return cache.get_or_load(key, lambda: parse(run_query(query, parameters)))
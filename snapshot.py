@@ -0,0 +1,261 @@
+import copy
+import time
+import threading
+import numpy as np
+import pandas as pd
+from db import run_query, get_setting
+from changes import changes_since, feed_cursor, is_reset
+from browse import PAGE_KEYS, ALL_LABELS
+
+# Optional in-process copy of the Project/CaseStudy/Researcher/Institution
+# subgraph for the read-heavy views. Writes still go to Neo4j; a background
+# thread follows the change feed (changes.py) and pulls just the changed nodes
+# and their edges, so writes from any process show up. Readers always see one
+# complete, immutable GraphSnapshot.
+LABELS = ['Project', 'CaseStudy', 'Researcher', 'Institution']
+EDGE_TYPES = ['WORKS_ON', 'BELONGS_TO', 'HAS_CASE_STUDY']
+
+ENABLED = str(get_setting('READ_SNAPSHOT', 'false')).lower() in ('1', 'true', 'yes', 'on')
+REFRESH_INTERVAL = float(get_setting('READ_SNAPSHOT_REFRESH_INTERVAL', 2))
+FULL_REFRESH_INTERVAL = float(get_setting('READ_SNAPSHOT_FULL_REFRESH_INTERVAL', 3600))
+
+NODES_QUERY = """
+MATCH (n) WHERE any(label IN labels(n) WHERE label IN $labels)
+RETURN elementId(n) AS eid, [label IN labels(n) WHERE label IN $labels][0] AS label, properties(n) AS props
+"""
+
+EDGES_QUERY = """
+MATCH (a)-[r]->(b) WHERE type(r) IN $types
+RETURN elementId(a) AS src, type(r) AS type, elementId(b) AS dst, r.role AS role
+"""
+
+# Every outgoing edge of the given nodes is re-read with them, so the edges
+# leaving those nodes can be replaced wholesale.
+NODES_BY_ID_QUERY = """
+MATCH (n) WHERE elementId(n) IN $eids
+OPTIONAL MATCH (n)-[r]->(m) WHERE type(r) IN $types
+RETURN elementId(n) AS eid, [label IN labels(n) WHERE label IN $labels][0] AS label, properties(n) AS props,
+       collect(CASE WHEN r IS NULL THEN null
+               ELSE {src: elementId(n), type: type(r), dst: elementId(m), role: r.role} END) AS edges
+"""
+
+EDGE_COLUMNS = ['src', 'type', 'dst', 'role']
+
+_current = None
+_refresher = None
+_refresher_lock = threading.Lock()
+_wake = threading.Event()
+
+
+class GraphSnapshot:
+    def __init__(self, nodes, edges, cursor, loaded_at, full_loaded_at=None):
+        # nodes: eid-indexed frame of label + property dict; edges: one row
+        # per relationship between snapshot nodes; cursor: change-feed
+        # position the snapshot is current up to.
+        self.nodes = nodes
+        self.edges = edges
+        self.cursor = cursor
+        self.loaded_at = loaded_at
+        self.full_loaded_at = full_loaded_at or loaded_at
+        self._build()
+
+    def _build(self):
+        nodes, edges = self.nodes, self.edges
+        edges = edges[edges['src'].isin(nodes.index) & edges['dst'].isin(nodes.index)]
+        self.pages = {}
+        for label in LABELS:
+            frame = nodes[nodes['label'] == label]
+            # Same keys as browse.py.
+            if label in PAGE_KEYS:
+                cursors = frame['props'].map(lambda props: props.get(PAGE_KEYS[label]))
+            else:
+                cursors = pd.Series(frame.index, index=frame.index)
+            keep = cursors.notna().to_numpy()
+            order = np.argsort(cursors[keep].to_numpy().astype(str), kind='stable')
+            self.pages[label] = (cursors[keep].to_numpy().astype(str)[order], frame['props'].to_numpy()[keep][order])
+
+        projects = nodes.loc[nodes['label'] == 'Project', 'props']
+        self.project_names = sorted(props['name'] for props in projects if props.get('name') is not None)
+
+        # One row per project/case-study pair, with the case study's and the
+        # project's properties as `cs.<key>` and `p.<key>` columns.
+        has_case_study = edges[(edges['type'] == 'HAS_CASE_STUDY') & edges['src'].isin(projects.index)]
+        case_studies = pd.DataFrame.from_records(list(nodes.loc[has_case_study['dst'], 'props'])).add_prefix('cs.')
+        project_props = pd.DataFrame.from_records(list(nodes.loc[has_case_study['src'], 'props'])).add_prefix('p.')
+        table = pd.concat([case_studies, project_props], axis=1)
+        table['cs_eid'] = has_case_study['dst'].to_numpy()
+        table['p_eid'] = has_case_study['src'].to_numpy()
+        if 'cs.name' in table:
+            table = table.sort_values('cs.name', kind='stable', na_position='last')
+        self.case_studies = table.reset_index(drop=True)
+
+        leads = edges[(edges['type'] == 'WORKS_ON') & (edges['role'] == 'Case Study Leader')
+                      & edges['dst'].isin(has_case_study['dst'])]
+        leads = leads[nodes.loc[leads['src'], 'label'].to_numpy() == 'Researcher']
+        self.lead_of = leads.drop_duplicates('dst').set_index('dst')['src']
+        # Same rule as FACTSHEET_QUERY: the case study's recorded institution,
+        # else the lead's only institution.
+        institutions = nodes.loc[nodes['label'] == 'Institution', 'props']
+        self.institution_by_name = pd.Series(institutions.index, index=institutions.map(lambda props: props.get('name')))
+        self.institution_by_name = self.institution_by_name[~self.institution_by_name.index.duplicated()]
+        belongs = edges[edges['type'] == 'BELONGS_TO']
+        belongs = belongs[~belongs['src'].duplicated(keep=False)]
+        self.institution_of = belongs.set_index('src')['dst']
+
+    def props(self, eid):
+        if eid is None or eid not in self.nodes.index:
+            return None
+        return self.nodes.at[eid, 'props']
+
+    def node_page(self, label=None, after=None, page_size=50):
+        # Same (segment, key) cursors and order as browse.node_page_query, so
+        # a cursor stays valid when reads switch between the snapshot and
+        # Neo4j: "All" walks ALL_LABELS, a single label is segment 0.
+        segments = list(enumerate(ALL_LABELS)) if label is None else [(0, label)]
+        after_segment, after_key = after if after is not None else (0, None)
+        rows = []
+        for segment, segment_label in segments:
+            if segment < after_segment:
+                continue
+            keys, props = self.pages.get(segment_label, (np.array([], dtype=str), np.array([], dtype=object)))
+            start = 0
+            if segment == after_segment and after_key is not None:
+                start = int(np.searchsorted(keys, str(after_key), side='right'))
+            end = start + page_size + 1 - len(rows)
+            rows += [(segment, str(key), node) for key, node in zip(keys[start:end], props[start:end])]
+            if len(rows) > page_size:
+                break
+        next_cursor = rows[page_size - 1][:2] if len(rows) > page_size else None
+        return [node for _, _, node in rows[:page_size]], next_cursor
+
+    def with_cursor(self, cursor):
+        # Nothing changed since the last refresh: same data, newer cursor.
+        # A copy, since readers may hold this snapshot.
+        snapshot = copy.copy(self)
+        snapshot.cursor = cursor
+        snapshot.loaded_at = time.time()
+        return snapshot
+
+    def factsheet_records(self, case_study_id=None):
+        table = self.case_studies
+        if case_study_id is not None:
+            table = table[table['cs.id'] == case_study_id] if 'cs.id' in table else table.iloc[0:0]
+        records = []
+        for cs_eid, p_eid in zip(table['cs_eid'], table['p_eid']):
+            lead = self.lead_of.get(cs_eid)
+            institution = self.institution_by_name.get(self.props(cs_eid).get('LeaderInstitution'))
+            if institution is None and lead is not None:
+                institution = self.institution_of.get(lead)
+            records.append({'case_study': self.props(cs_eid), 'project': self.props(p_eid),
+                            'lead': self.props(lead), 'institution': self.props(institution)})
+        return records
+
+    def apply(self, records, deleted, cursor):
+        # Replaces the returned nodes and every edge leaving them, and drops
+        # deleted nodes with their edges.
+        touched = [r['eid'] for r in records]
+        new_nodes = pd.DataFrame({'label': [r['label'] for r in records], 'props': [r['props'] for r in records]},
+                                 index=pd.Index(touched, name='eid'))
+        nodes = pd.concat([self.nodes.drop(touched + sorted(deleted), errors='ignore'),
+                           new_nodes[new_nodes['label'].notna()]])
+        new_edges = pd.DataFrame([edge for r in records for edge in r['edges']], columns=EDGE_COLUMNS)
+        kept = ~self.edges['src'].isin(touched) & ~self.edges['src'].isin(deleted) & ~self.edges['dst'].isin(deleted)
+        edges = pd.concat([self.edges[kept], new_edges], ignore_index=True)
+        return GraphSnapshot(nodes, edges, cursor, time.time(), self.full_loaded_at)
+
+
+def load_snapshot():
+    # The cursor is taken first so nothing written during the load is missed.
+    cursor = feed_cursor()
+    records = run_query(NODES_QUERY, {'labels': LABELS})
+    nodes = pd.DataFrame({'label': [r['label'] for r in records], 'props': [r['props'] for r in records]},
+                         index=pd.Index([r['eid'] for r in records], name='eid'))
+    edges = pd.DataFrame(run_query(EDGES_QUERY, {'types': EDGE_TYPES}), columns=EDGE_COLUMNS)
+    return GraphSnapshot(nodes, edges, cursor, time.time())
+
+
+def load_delta(snapshot):
+    # Everything the change feed reports since the snapshot's cursor: changed
+    # nodes, both ends of changed edges, and the source of deleted edges are
+    # re-read with all their outgoing edges; deleted nodes are dropped.
+    # Returns None after a full reset, which needs a full load instead.
+    feed = changes_since(snapshot.cursor, LABELS, EDGE_TYPES)
+    if is_reset(feed):
+        return None
+    deleted = {t['tombstone']['elementId'] for t in feed['tombstones'] if t['tombstone']['kind'] == 'node'}
+    eids = {n['elementId'] for n in feed['nodes']}
+    eids |= {e['src'] for e in feed['edges']} | {e['dst'] for e in feed['edges']}
+    eids |= {t['tombstone']['src'] for t in feed['tombstones'] if t['tombstone']['kind'] == 'relationship'}
+    eids -= deleted
+    records = run_query(NODES_BY_ID_QUERY, {'eids': sorted(eids), 'labels': LABELS, 'types': EDGE_TYPES}) if eids else []
+    # Nodes the new edges point at that the snapshot has not seen yet.
+    known = eids | set(snapshot.nodes.index)
+    missing = sorted({edge['dst'] for r in records for edge in r['edges']} - known)
+    if missing:
+        records += run_query(NODES_BY_ID_QUERY, {'eids': missing, 'labels': LABELS, 'types': EDGE_TYPES})
+    return records, deleted, feed['until']
+
+
+def active():
+    return ENABLED and _current is not None
+
+
+def current():
+    return _current
+
+
+def notify():
+    # Called by write paths so their changes show up without waiting for the
+    # next poll of the change feed.
+    if ENABLED:
+        _wake.set()
+
+
+def refresh_once():
+    global _current
+    if _current is None or time.time() - _current.full_loaded_at >= FULL_REFRESH_INTERVAL:
+        _current = load_snapshot()
+        return
+    delta = load_delta(_current)
+    if delta is None:
+        _current = load_snapshot()
+        return
+    records, deleted, cursor = delta
+    if records or deleted:
+        _current = _current.apply(records, deleted, cursor)
+    else:
+        _current = _current.with_cursor(cursor)
+
+
+def _run_refresher():
+    while True:
+        try:
+            refresh_once()
+        except Exception:
+            pass
+        _wake.wait(REFRESH_INTERVAL)
+        _wake.clear()
+
+
+def start_refresher():
+    global _refresher
+    if not ENABLED:
+        return
+    with _refresher_lock:
+        if _refresher is None or not _refresher.is_alive():
+            _refresher = threading.Thread(target=_run_refresher, name='read-snapshot', daemon=True)
+            _refresher.start()
+
+
+def snapshot_status():
+    snapshot = _current
+    if snapshot is None:
+        return {'enabled': ENABLED, 'loaded': False}
+    return {
+        'enabled': ENABLED,
+        'loaded': True,
+        'age_seconds': time.time() - snapshot.loaded_at,
+        'nodes': {label: int(n) for label, n in snapshot.nodes['label'].value_counts().items()},
+        'edges': len(snapshot.edges),
+        'cursor': snapshot.cursor,
+    }
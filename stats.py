@@ -0,0 +1,178 @@
+import time
+import threading
+import numpy as np
+import pandas as pd
+from db import run_query, get_setting
+from casestudies import LIST_FIELDS, CATEGORY_FIELDS
+from changes import changes_since, feed_cursor, is_reset
+
+# Statistics over the case-study answers, served from memory. Every answer is
+# one-hot encoded as a (field, value) column and the cube is the Gram matrix
+# of that encoding: entry [i, j] is the number of case studies having both
+# column i and column j. Counts are its diagonal and every cross-tab or
+# co-occurrence matrix is a sub-block, so charts are slices, not queries.
+# Adding or removing a case study is a rank-one update of the matrix.
+SCALAR_FIELDS = ['Country', 'Scale', 'Transboundary', 'FundedBy']
+FIELDS = SCALAR_FIELDS + LIST_FIELDS
+METHOD_FIELDS = [field for field, (_, _, family) in CATEGORY_FIELDS.items() if family]
+# Empty answers were normalized to this and are not counted.
+MISSING = 'Not Available'
+REFRESH_INTERVAL = float(get_setting('STATS_REFRESH_INTERVAL', 30))
+FULL_REFRESH_INTERVAL = float(get_setting('STATS_FULL_REFRESH_INTERVAL', 3600))
+
+_ANSWERS = ", ".join(f".{field}" for field in FIELDS if field != 'FundedBy')
+
+ROWS_QUERY = f"""
+MATCH (p:Project)-[:HAS_CASE_STUDY]->(cs:CaseStudy)
+RETURN elementId(cs) AS eid, elementId(p) AS project, cs {{{_ANSWERS}, FundedBy: p.FundedBy}} AS answers
+"""
+
+ROWS_BY_ID_QUERY = f"""
+MATCH (p:Project)-[:HAS_CASE_STUDY]->(cs:CaseStudy)
+WHERE elementId(cs) IN $eids OR elementId(p) IN $projects
+RETURN elementId(cs) AS eid, elementId(p) AS project, cs {{{_ANSWERS}, FundedBy: p.FundedBy}} AS answers
+"""
+
+
+def _values(answer):
+    if isinstance(answer, list):
+        return {str(value) for value in answer if value not in (None, '', MISSING)}
+    if answer in (None, '', MISSING):
+        return set()
+    return {str(answer)}
+
+
+class StatsCube:
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.loaded_at = time.time()
+        self.columns = {}
+        self.keys = []
+        self.gram = np.zeros((0, 0), dtype=np.int64)
+        # eid -> (project eid, encoded column indexes)
+        self.rows = {}
+
+    def _encode(self, answers):
+        indexes = []
+        for field in FIELDS:
+            for value in sorted(_values(answers.get(field))):
+                key = (field, value)
+                if key not in self.columns:
+                    self.columns[key] = len(self.keys)
+                    self.keys.append(key)
+                indexes.append(self.columns[key])
+        if len(self.keys) > len(self.gram):
+            # Grow geometrically so a run of new values is not quadratic.
+            size = max(len(self.keys), 2 * len(self.gram), 64)
+            gram = np.zeros((size, size), dtype=np.int64)
+            gram[:len(self.gram), :len(self.gram)] = self.gram
+            self.gram = gram
+        return np.array(indexes, dtype=np.intp)
+
+    def load(self, records):
+        # Bulk build: one one-hot matrix and one matrix product.
+        self.rows = {}
+        for record in records:
+            self.rows[record['eid']] = (record['project'], self._encode(record['answers']))
+        onehot = np.zeros((len(self.rows), len(self.gram)), dtype=np.float64)
+        for i, (_, indexes) in enumerate(self.rows.values()):
+            onehot[i, indexes] = 1
+        # Float products are exact far beyond any realistic count.
+        self.gram = np.rint(onehot.T @ onehot).astype(np.int64)
+
+    def add(self, eid, project, answers):
+        self.remove(eid)
+        indexes = self._encode(answers)
+        self.gram[np.ix_(indexes, indexes)] += 1
+        self.rows[eid] = (project, indexes)
+
+    def remove(self, eid):
+        row = self.rows.pop(eid, None)
+        if row is not None:
+            self.gram[np.ix_(row[1], row[1])] -= 1
+
+    @property
+    def total(self):
+        return len(self.rows)
+
+    def _field(self, field):
+        indexes = [i for i, key in enumerate(self.keys) if key[0] == field and self.gram[i, i] > 0]
+        return np.array(indexes, dtype=np.intp), pd.Index([self.keys[i][1] for i in indexes], name=field)
+
+    def counts(self, field):
+        indexes, labels = self._field(field)
+        return pd.Series(self.gram[indexes, indexes], index=labels, name='case studies').sort_values(ascending=False)
+
+    def crosstab(self, row_field, column_field):
+        rows, row_labels = self._field(row_field)
+        columns, column_labels = self._field(column_field)
+        table = pd.DataFrame(self.gram[np.ix_(rows, columns)], index=row_labels, columns=column_labels)
+        return table.sort_index().sort_index(axis=1)
+
+    def cooccurrence(self, field):
+        return self.crosstab(field, field)
+
+    def method_usage(self, by='FundedBy'):
+        tables = {field: self.crosstab(field, by) for field in METHOD_FIELDS}
+        return pd.concat(tables, names=['family', 'method']).fillna(0).astype(np.int64)
+
+
+def load_cube():
+    cube = StatsCube(feed_cursor())
+    cube.load(run_query(ROWS_QUERY))
+    return cube
+
+
+def apply_changes(cube):
+    # Re-reads the case studies the change feed touched, including those of
+    # changed or deleted projects, and replaces their rows.
+    feed = changes_since(cube.cursor, ['CaseStudy', 'Project'], ['HAS_CASE_STUDY'])
+    if is_reset(feed):
+        cube.load(run_query(ROWS_QUERY))
+        cube.cursor = feed['until']
+        return
+    eids = {node['elementId'] for node in feed['nodes'] if node['label'] == 'CaseStudy'}
+    eids |= {edge['dst'] for edge in feed['edges']}
+    projects = {node['elementId'] for node in feed['nodes'] if node['label'] == 'Project'}
+    for tombstone in feed['tombstones']:
+        tombstone = tombstone['tombstone']
+        if tombstone['kind'] == 'node':
+            eids.add(tombstone['elementId'])
+            projects.add(tombstone['elementId'])
+        elif tombstone['type'] == 'HAS_CASE_STUDY':
+            eids.add(tombstone['dst'])
+    eids |= {eid for eid, (project, _) in cube.rows.items() if project in projects}
+    if eids or projects:
+        records = run_query(ROWS_BY_ID_QUERY, {'eids': sorted(eids), 'projects': sorted(projects)})
+        for eid in eids - {record['eid'] for record in records}:
+            cube.remove(eid)
+        for record in records:
+            cube.add(record['eid'], record['project'], record['answers'])
+    cube.cursor = feed['until']
+
+
+_cube = None
+_checked_at = 0.0
+_dirty = False
+_lock = threading.Lock()
+
+
+def notify():
+    # Called after case studies are written so the next read catches up
+    # without waiting for the refresh interval.
+    global _dirty
+    _dirty = True
+
+
+def get_cube():
+    global _cube, _checked_at, _dirty
+    with _lock:
+        now = time.time()
+        if _cube is None or now - _cube.loaded_at >= FULL_REFRESH_INTERVAL:
+            _dirty = False
+            _cube = load_cube()
+        elif _dirty or now - _checked_at >= REFRESH_INTERVAL:
+            _dirty = False
+            apply_changes(_cube)
+        _checked_at = now
+        return _cube
@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import datetime
+import threading
+from db import get_setting
+from cache import get_cache
+from projects import write_projects, DuplicateProjectError
+from casestudies import normalize_case_study_info, write_case_studies, ProjectNotFoundError
+import stats
+
+# Form submissions are committed to a local SQLite file (fsync'd before the
+# user is answered) and a background thread drains them into Neo4j. Every
+# item carries an idempotency key that is written onto the created node, so a
+# retry after an unacknowledged commit does not duplicate anything.
+QUEUE_PATH = get_setting('SUBMISSION_QUEUE_PATH', 'data/submissions.sqlite3')
+BATCH_SIZE = int(get_setting('SUBMISSION_QUEUE_BATCH_SIZE', 50))
+MAX_ATTEMPTS = int(get_setting('SUBMISSION_QUEUE_MAX_ATTEMPTS', 10))
+POLL_INTERVAL = 1.0
+MAX_BACKOFF = 300.0
+
+_worker = None
+_worker_lock = threading.Lock()
+_wake = threading.Event()
+
+
+def _encode(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return {'$date': value.isoformat()}
+    raise TypeError(f'Cannot queue {type(value).__name__}')
+
+
+def _decode(obj):
+    if set(obj) == {'$date'}:
+        value = obj['$date']
+        return datetime.datetime.fromisoformat(value) if 'T' in value else datetime.date.fromisoformat(value)
+    return obj
+
+
+def _connect():
+    os.makedirs(os.path.dirname(QUEUE_PATH) or '.', exist_ok=True)
+    connection = sqlite3.connect(QUEUE_PATH, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=FULL")
+    connection.execute("""
+    CREATE TABLE IF NOT EXISTS submissions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        idempotency_key TEXT NOT NULL UNIQUE,
+        kind TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        created_at REAL NOT NULL,
+        next_attempt_at REAL NOT NULL,
+        done_at REAL,
+        last_error TEXT
+    )""")
+    connection.execute("CREATE INDEX IF NOT EXISTS submissions_due ON submissions (status, next_attempt_at)")
+    return connection
+
+
+def enqueue(kind, payload):
+    key = str(uuid.uuid4())
+    now = time.time()
+    connection = _connect()
+    try:
+        with connection:
+            connection.execute(
+                "INSERT INTO submissions (idempotency_key, kind, payload, created_at, next_attempt_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(payload, default=_encode), now, now))
+    finally:
+        connection.close()
+    start_worker()
+    _wake.set()
+    return key
+
+
+# Writers return the idempotency keys of the items they actually wrote.
+def _write_projects(items):
+    written = write_projects([{'project_info': item['payload']['project_info'],
+                               'coord_info': item['payload']['coord_info'],
+                               'submission_key': item['key']} for item in items])
+    get_cache('project_names').invalidate()
+    return {item['key'] for item, ok in zip(items, written) if ok}
+
+
+def _write_case_studies(items):
+    rows = []
+    for item in items:
+        row = dict(item['payload'])
+        normalize_case_study_info(row['case_study_info'])
+        row['submission_key'] = item['key']
+        rows.append(row)
+    written = set(write_case_studies(rows))
+    get_cache('case_study_facets').invalidate()
+    get_cache('map_clusters').invalidate()
+    stats.notify()
+    return written
+
+
+WRITERS = {'project': _write_projects, 'case_study': _write_case_studies}
+
+# Why a writer leaves an item out, and whether retrying can help: a taken
+# project name stays taken, a missing project may still be submitted.
+UNWRITTEN = {
+    'project': (lambda payload: DuplicateProjectError(
+        f"project already exists: {payload['project_info'].get('name')!r}"), True),
+    'case_study': (lambda payload: ProjectNotFoundError(
+        f"project not found: {payload.get('project_name')!r}"), False),
+}
+
+
+def _mark_done(connection, items):
+    with connection:
+        connection.executemany("UPDATE submissions SET status = 'done', done_at = ?, last_error = NULL WHERE id = ?",
+                               [(time.time(), item['id']) for item in items])
+
+
+def _mark_failed(connection, items, error, permanent=False):
+    now = time.time()
+    with connection:
+        for item in items:
+            attempts = item['attempts'] + 1
+            status = 'failed' if permanent or attempts >= MAX_ATTEMPTS else 'pending'
+            backoff = min(2 ** attempts, MAX_BACKOFF)
+            connection.execute(
+                "UPDATE submissions SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (status, attempts, now + backoff, f'{type(error).__name__}: {error}', item['id']))
+
+
+def _mark_written(connection, items, written):
+    _mark_done(connection, [item for item in items if item['key'] in written])
+    for item in items:
+        if item['key'] not in written:
+            error, permanent = UNWRITTEN[item['kind']]
+            _mark_failed(connection, [item], error(item['payload']), permanent)
+
+
+def drain_once():
+    connection = _connect()
+    try:
+        rows = connection.execute(
+            "SELECT id, idempotency_key, kind, payload, attempts FROM submissions "
+            "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+            (time.time(), BATCH_SIZE)).fetchall()
+        items = [{'id': r[0], 'key': r[1], 'kind': r[2], 'payload': json.loads(r[3], object_hook=_decode),
+                  'attempts': r[4]} for r in rows]
+        # Consecutive items of the same kind go to Neo4j together, keeping
+        # submission order between projects and the case studies that use them.
+        groups = []
+        for item in items:
+            if groups and groups[-1][0]['kind'] == item['kind']:
+                groups[-1].append(item)
+            else:
+                groups.append([item])
+        for group in groups:
+            try:
+                written = WRITERS[group[0]['kind']](group)
+            except Exception as e:
+                if len(group) > 1:
+                    # Retry members individually so one bad item does not hold back the rest.
+                    for item in group:
+                        try:
+                            written = WRITERS[item['kind']]([item])
+                        except Exception as item_error:
+                            _mark_failed(connection, [item], item_error)
+                        else:
+                            _mark_written(connection, [item], written)
+                else:
+                    _mark_failed(connection, group, e)
+            else:
+                _mark_written(connection, group, written)
+        return len(items)
+    finally:
+        connection.close()
+
+
+def _run_worker():
+    while True:
+        try:
+            processed = drain_once()
+        except Exception:
+            # Neo4j or the queue file is unavailable; try again shortly.
+            processed = 0
+        if processed < BATCH_SIZE:
+            _wake.wait(POLL_INTERVAL)
+            _wake.clear()
+
+
+def start_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run_worker, name='submission-queue', daemon=True)
+            _worker.start()
+
+
+def queue_status():
+    connection = _connect()
+    try:
+        counts = dict(connection.execute("SELECT status, count(*) FROM submissions GROUP BY status").fetchall())
+        oldest = connection.execute("SELECT min(created_at) FROM submissions WHERE status = 'pending'").fetchone()[0]
+        errors = connection.execute(
+            "SELECT idempotency_key, kind, attempts, last_error FROM submissions "
+            "WHERE last_error IS NOT NULL AND status != 'done' ORDER BY id DESC LIMIT 20").fetchall()
+    finally:
+        connection.close()
+    return {
+        'pending': counts.get('pending', 0),
+        'failed': counts.get('failed', 0),
+        'done': counts.get('done', 0),
+        'lag_seconds': time.time() - oldest if oldest is not None else 0.0,
+        'recent_errors': [dict(zip(('key', 'kind', 'attempts', 'error'), row)) for row in errors],
+    }
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The modules live at the top of the repository. They all import db, which
+# needs streamlit and the neo4j driver even when no database is used, so
+# every test module skips itself without them.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,45 @@
+import asyncio
+import pytest
+
+pytest.importorskip('streamlit')
+pytest.importorskip('neo4j')
+import async_db
+from cache import TTLCache
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    calls = []
+
+    async def fetch(query, parameters=None, timeout=None, name=None):
+        calls.append(name)
+        if query == 'slow':
+            await asyncio.sleep(1)
+        return [{'query': query}]
+
+    monkeypatch.setattr(async_db, 'fetch', fetch)
+    return calls
+
+
+def test_metrics_names_are_unique_per_call_site(fetched):
+    results = asyncio.run(async_db.gather_queries({'labels': ('a', None), 'page': ('b', None)}, name='app.browse'))
+    assert results == {'labels': [{'query': 'a'}], 'page': [{'query': 'b'}]}
+    assert fetched == ['app.browse.labels', 'app.browse.page']
+
+
+def test_total_timeout_cancels_the_batch(fetched):
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(async_db.gather_queries({'slow': ('slow', None)}, total_timeout=0.01, name='app.slow'))
+
+
+def test_cached_loads_only_run_the_misses(fetched, monkeypatch):
+    def run_queries(queries, timeout=None, total_timeout=None, name=None):
+        return asyncio.run(async_db.gather_queries(queries, timeout, total_timeout, name))
+
+    monkeypatch.setattr(async_db, 'run_queries', run_queries)
+    cache = TTLCache(60)
+    cache.put('warm', ['cached'])
+    loads = {'hit': (cache, 'warm', 'a', None, list), 'miss': (cache, 'cold', 'b', None, len)}
+    assert async_db.run_cached(loads, name='app.search') == {'hit': ['cached'], 'miss': 1}
+    assert fetched == ['app.search.miss']
+    assert cache.peek('cold') == (True, 1)
@@ -0,0 +1,63 @@
+import pytest
+
+pytest.importorskip('streamlit')
+pytest.importorskip('neo4j')
+import changes
+
+
+def fake_database(monkeypatch, now, records=None):
+    calls = []
+
+    def run_query(query, parameters=None):
+        calls.append((query, parameters))
+        if query.startswith('RETURN timestamp()'):
+            return [{'now': now}]
+        return (records or {}).get(query.split()[1].split(':')[0], [])
+
+    monkeypatch.setattr(changes, 'run_query', run_query)
+    return calls
+
+
+def test_cursor_is_held_back_by_the_safety_lag(monkeypatch):
+    fake_database(monkeypatch, 100_000)
+    assert changes.feed_cursor() == 100_000 - changes.SAFETY_LAG_MS
+
+
+def test_full_sync_starts_before_every_stamp(monkeypatch):
+    calls = fake_database(monkeypatch, 100_000)
+    feed = changes.changes_since(None, ['Project'], ['WORKS_ON'])
+    assert feed['since'] == -1
+    assert feed['until'] == 100_000 - changes.SAFETY_LAG_MS
+    assert all(parameters == {'since': -1} for _, parameters in calls[1:])
+
+
+def test_cursor_never_moves_backwards(monkeypatch):
+    fake_database(monkeypatch, 1_000)
+    feed = changes.changes_since(50_000, ['Project'], [])
+    assert feed['until'] == 50_000
+    assert feed['edges'] == []
+
+
+def test_queries_cover_each_label_and_type():
+    nodes = changes._nodes_query(('Project', 'CaseStudy'))
+    assert nodes.count('UNION ALL') == 1
+    assert "MATCH (n:`Project`) WHERE n.updatedAt > $since" in nodes
+    assert "RETURN 'CaseStudy' AS label" in nodes
+    edges = changes._edges_query(('WORKS_ON',))
+    assert 'UNION ALL' not in edges
+    assert "[r:`WORKS_ON`]" in edges
+
+
+def test_reset_tombstones_are_detected():
+    feed = {'tombstones': [{'tombstone': {'kind': 'node', 'elementId': '4:x:1'}}]}
+    assert not changes.is_reset(feed)
+    feed['tombstones'].append({'tombstone': {'kind': 'reset', 'deletedAt': 1}})
+    assert changes.is_reset(feed)
+    assert "kind: 'reset'" in changes.RESET_TOMBSTONE
+
+
+def test_tombstone_clauses_record_identity():
+    clause = changes.node_tombstone('p')
+    assert 'elementId: elementId(p)' in clause and 'name: p.name' in clause
+    clause = changes.relationship_tombstone('r', 'a', 'b')
+    assert 'src: elementId(a)' in clause and 'dst: elementId(b)' in clause
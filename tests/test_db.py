@@ -0,0 +1,124 @@
+import pytest
+
+pytest.importorskip('streamlit')
+pytest.importorskip('neo4j')
+import db
+import metrics
+
+
+class FakeResult:
+    def __init__(self, records, summary):
+        self.records = records
+        self.summary = summary
+
+    def data(self):
+        return self.records
+
+    def consume(self):
+        return self.summary
+
+
+class FakeSummary:
+    result_available_after = 3
+    result_consumed_after = 4
+    profile = None
+
+
+class FakeSession:
+    def __init__(self, records):
+        self.records = records
+        self.queries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, parameters=None):
+        self.queries.append((query, parameters))
+        return FakeResult(self.records, FakeSummary())
+
+    def execute_write(self, work):
+        return work(self)
+
+
+class FakeDriver:
+    def __init__(self, uri, auth, **settings):
+        self.uri = uri
+        self.settings = settings
+        self.sessions = 0
+        self.closed = False
+        self.session_records = [{'n': 1}, {'n': 2}]
+        self.last_session = None
+
+    def verify_connectivity(self):
+        if self.uri == 'neo4j://down':
+            raise ConnectionError('unreachable')
+
+    def session(self, **kwargs):
+        self.sessions += 1
+        self.last_session = FakeSession(self.session_records)
+        return self.last_session
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def drivers(monkeypatch):
+    created = []
+
+    def driver(uri, auth, **settings):
+        created.append(FakeDriver(uri, auth, **settings))
+        return created[-1]
+
+    monkeypatch.setattr(db.GraphDatabase, 'driver', driver)
+    monkeypatch.setattr(db, '_driver', None)
+    for name, value in [('NEO4J_URI', 'neo4j://localhost'), ('NEO4J_USER', 'neo4j'), ('NEO4J_PASSWORD', 'secret'),
+                        ('NEO4J_MAX_POOL_SIZE', '7'), ('NEO4J_ACQUISITION_TIMEOUT', '2.5'),
+                        ('NEO4J_WARM_UP_CONNECTIONS', '3')]:
+        monkeypatch.setenv(name, value)
+    metrics.reset()
+    yield created
+    db._driver = None
+    metrics.reset()
+
+
+def test_one_driver_is_shared_and_configured_from_settings(drivers):
+    driver = db.get_driver()
+    assert db.get_driver() is driver
+    assert len(drivers) == 1
+    assert driver.settings == {'max_connection_pool_size': 7, 'connection_acquisition_timeout': 2.5,
+                               'max_connection_lifetime': 3600.0}
+    # The pool is warmed up with the configured number of sessions.
+    assert driver.sessions == 3
+    db.close_driver()
+    assert driver.closed
+    assert db.get_driver() is not driver
+
+
+def test_a_failed_connectivity_check_closes_the_driver(drivers, monkeypatch):
+    monkeypatch.setenv('NEO4J_URI', 'neo4j://down')
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            db.get_driver()
+    assert len(drivers) == 2
+    assert all(driver.closed for driver in drivers)
+    assert db._driver is None
+
+
+def test_queries_are_recorded_under_their_name(drivers):
+    assert db.run_query("MATCH (n) RETURN n", name='nodes') == [{'n': 1}, {'n': 2}]
+    db.run_write("CREATE (n)", name='create', profile=True)
+    queries = metrics.snapshot()['queries']
+    assert queries['nodes']['count'] == 1
+    assert queries['nodes']['rows'] == 2
+    assert queries['nodes']['server_ms'] == 7
+    assert queries['create']['count'] == 1
+    assert db.get_driver().last_session.queries[0][0] == "PROFILE CREATE (n)"
+
+
+def test_unnamed_queries_are_recorded_under_their_caller(drivers):
+    db.run_query("RETURN 1")
+    assert list(metrics.snapshot()['queries']) == [f'{__name__}.test_unnamed_queries_are_recorded_under_their_caller']
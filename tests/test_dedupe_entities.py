@@ -0,0 +1,67 @@
+import pytest
+
+pytest.importorskip('streamlit')
+pytest.importorskip('neo4j')
+np = pytest.importorskip('numpy')
+import dedupe_entities as dedupe
+
+
+def pairs_of(keys):
+    signatures = dedupe.minhash_signatures(keys)
+    pairs = dedupe.candidate_pairs(keys, signatures)
+    return {tuple(pair) for pair in pairs.tolist()}, pairs, signatures
+
+
+def test_names_are_normalized():
+    assert dedupe.normalize_name('Univ. of Patras') == 'university patras'
+    assert dedupe.normalize_name('Universität  Wien') == 'university wien'
+    assert dedupe.normalize_name('Center for Research') == 'centre research'
+    assert dedupe.normalize_name('東京大学') == '東京大学'
+
+
+def test_signatures_estimate_similarity():
+    signatures = dedupe.minhash_signatures(['university patras', 'university patras', 'royal botanic gardens'])
+    assert signatures.shape == (3, dedupe.NUM_HASHES)
+    assert (signatures[0] == signatures[1]).all()
+    assert (signatures[0] == signatures[2]).mean() < 0.2
+    assert dedupe.minhash_signatures([]).shape == (0, dedupe.NUM_HASHES)
+
+
+def test_candidates_share_a_block():
+    keys = ['university patras', 'university of patras', 'technical university crete', 'wageningen']
+    candidates, _, _ = pairs_of(keys)
+    assert (0, 1) in candidates
+    assert all(3 not in pair for pair in candidates)
+
+
+def test_oversized_blocks_are_skipped_but_exact_keys_pair():
+    # Zero-width signatures put every name in one oversized band block, so
+    # only the key and token blocks can pair.
+    keys = ['university crete', 'university patras', 'university wien', 'university bonn', 'same name', 'same name']
+    signatures = dedupe.minhash_signatures(keys)[:, :0]
+    pairs = dedupe.candidate_pairs(keys, signatures, bands=1, max_block_size=3)
+    candidates = {tuple(pair) for pair in pairs.tolist()}
+    assert candidates == {(4, 5)}
+
+
+def test_scores_respect_numbers_and_empty_names():
+    keys = ['laboratory 2', 'laboratory 3', 'laboratory 2', '', '']
+    signatures = dedupe.minhash_signatures(keys)
+    pairs = np.array([[0, 1], [0, 2], [3, 4]])
+    scores = dedupe.score_pairs(pairs, keys, signatures)
+    assert scores.tolist() == [0.0, 1.0, 0.0]
+
+
+def test_clusters_are_transitive():
+    pairs = np.array([[0, 1], [1, 2], [4, 5]])
+    assert sorted(sorted(members) for members in dedupe.clusters(6, pairs)) == [[0, 1, 2], [4, 5]]
+    assert dedupe.clusters(3, np.empty((0, 2), dtype=np.int64)) == []
+
+
+def test_merges_repoint_names_held_as_text():
+    query = dedupe._merge_query('Institution')
+    assert "MATCH (other:`CaseStudy` {`LeaderInstitution`: d.name})" in query
+    assert "SET other.`HostInstitution` = c.name" in query
+    # The references are rewritten before the duplicate is deleted.
+    assert query.index('LeaderInstitution') < query.index('DETACH DELETE d')
+    assert 'renamed' not in dedupe._merge_query('Researcher')
@@ -0,0 +1,52 @@
+import pytest
+
+pytest.importorskip('streamlit')
+pytest.importorskip('neo4j')
+pa = pytest.importorskip('pyarrow')
+pd = pytest.importorskip('pandas')
+import pyarrow.parquet as pq
+import export_graph
+from export_graph import _arrow_type, _convert, ChunkWriter
+
+
+class Native:
+    def to_native(self):
+        return 42
+
+
+def test_property_types_map_to_arrow():
+    assert _arrow_type('SDGs', ['String']) == pa.list_(pa.string())
+    assert _arrow_type('Funding', ['Long']) == pa.int64()
+    assert _arrow_type('createdAt', {'Long', 'Integer'}) == pa.string()
+    assert _arrow_type('location', ['Point']) == pa.string()
+    assert _arrow_type('name', None) == pa.string()
+
+
+def test_values_are_converted_for_their_column():
+    assert _convert(None, pa.string()) is None
+    assert _convert(['a', 3], pa.list_(pa.string())) == ['a', '3']
+    assert _convert('Not Available', pa.list_(pa.string())) == []
+    assert _convert(12, pa.string()) == '12'
+    assert _convert(Native(), pa.int64()) == 42
+
+
+def test_list_columns_are_lists_in_parquet_and_text_in_csv(tmp_path):
+    schema = pa.schema([('element_id', pa.string()), ('SDGs', pa.list_(pa.string()))])
+    records = [{'element_id': '1', 'SDGs': ['SDG 2', 'SDG 6']}, {'element_id': '2', 'SDGs': None}]
+    for fmt in export_graph.FORMATS:
+        writer = ChunkWriter(str(tmp_path / f'nodes.{fmt}'), schema, fmt)
+        writer.write(export_graph._rows(records[:1], schema))
+        writer.write(export_graph._rows(records[1:], schema))
+        assert writer.close() == 2
+    assert pq.read_table(tmp_path / 'nodes.parquet').to_pylist() == records
+    csv = pd.read_csv(tmp_path / 'nodes.csv', dtype=str)
+    assert csv['SDGs'].tolist()[0] == 'SDG 2; SDG 6'
+    assert pd.isna(csv['SDGs'].tolist()[1])
+
+
+def test_empty_exports_keep_their_columns(tmp_path):
+    schema = pa.schema([('element_id', pa.string()), ('name', pa.string())])
+    for fmt in export_graph.FORMATS:
+        assert ChunkWriter(str(tmp_path / f'empty.{fmt}'), schema, fmt).close() == 0
+    assert pq.read_table(tmp_path / 'empty.parquet').schema.names == ['element_id', 'name']
+    assert pd.read_csv(tmp_path / 'empty.csv').columns.tolist() == ['element_id', 'name']
@@ -0,0 +1,23 @@
+import pytest
+
+pytest.importorskip('streamlit')
+pytest.importorskip('neo4j')
+pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+import factsheet
+
+
+def data(**scores):
+    return {'case_study': {'id': 'cs1', 'name': 'Nestos basin', 'Country': 'Greece', **scores},
+            'project': {'name': 'NEXUS', 'FundedBy': 'ERC', **scores},
+            'lead': {'name': 'A. Researcher', **scores}, 'institution': {'name': 'University of Patras'}}
+
+
+def test_network_scores_are_not_rendered_or_hashed():
+    before = data()
+    after = data(degree=4, pageRank=0.2, betweenness=0.1, community=3, scoresUpdatedAt=1700000000000)
+    markdown = factsheet.render_markdown(after)
+    assert 'Page rank' not in markdown and 'Community' not in markdown
+    assert '**Country:** Greece' in markdown
+    assert factsheet.content_hash(before, 'html') == factsheet.content_hash(after, 'html')
+    assert factsheet.content_hash(before, 'html') != factsheet.content_hash(before, 'markdown')
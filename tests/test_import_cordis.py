@@ -0,0 +1,28 @@
+import pytest
+
+pytest.importorskip('streamlit')
+pytest.importorskip('neo4j')
+pd = pytest.importorskip('pandas')
+from import_cordis import to_rows
+
+
+def test_only_coordinators_are_imported_with_their_own_contribution():
+    chunk = pd.DataFrame([
+        {'projectAcronym': 'NEXUS', 'role': 'coordinator', 'name': 'University of Patras', 'country': 'EL',
+         'city': None, 'ecContribution': 500000.0},
+        {'projectAcronym': 'NEXUS', 'role': 'participant', 'name': 'Partner', 'country': 'ES',
+         'city': 'Madrid', 'ecContribution': 200000.0},
+        {'projectAcronym': None, 'role': 'coordinator', 'name': 'Orphan', 'country': 'FR',
+         'city': None, 'ecContribution': 1.0},
+    ])
+    assert to_rows(chunk, 'HORIZON 2020') == [{
+        'project': {'name': 'NEXUS', 'FundedBy': 'HORIZON 2020', 'FundingAmount': None,
+                    'CoordinatorContribution': 500000.0},
+        'coord': {'name': 'University of Patras', 'Country': 'EL'},
+    }]
+
+
+def test_project_totals_come_from_the_project_level_column():
+    chunk = pd.DataFrame([{'projectAcronym': 'NEXUS', 'name': 'University of Patras',
+                           'ecContribution': 500000.0, 'ecMaxContribution': 2500000.0}])
+    assert to_rows(chunk, 'HORIZON EUROPE')[0]['project']['FundingAmount'] == 2500000.0
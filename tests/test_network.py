@@ -0,0 +1,112 @@
+import itertools
+from collections import deque
+import pytest
+
+pytest.importorskip('streamlit')
+pytest.importorskip('neo4j')
+np = pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+import network
+
+
+def csr(edges, n):
+    src, dst = np.array(edges, dtype=np.int64).T
+    return network.build_adjacency(src, dst, n)
+
+
+def neighbour_lists(indptr, indices):
+    return [sorted(indices[indptr[i]:indptr[i + 1]].tolist()) for i in range(len(indptr) - 1)]
+
+
+def reference_betweenness(adjacency):
+    # Brute force: for every pair, the share of shortest paths through each node.
+    n = len(adjacency)
+
+    def bfs(source):
+        distance, paths = {source: 0}, {source: 1}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            for other in adjacency[node]:
+                if other not in distance:
+                    distance[other] = distance[node] + 1
+                    paths[other] = 0
+                    queue.append(other)
+                if distance[other] == distance[node] + 1:
+                    paths[other] += paths[node]
+        return distance, paths
+
+    searches = [bfs(node) for node in range(n)]
+    scores = np.zeros(n)
+    for s, t in itertools.combinations(range(n), 2):
+        distance_s, paths_s = searches[s]
+        if t not in distance_s:
+            continue
+        distance_t, paths_t = searches[t]
+        for v in range(n):
+            if v not in (s, t) and v in distance_s and v in distance_t and \
+                    distance_s[v] + distance_t[v] == distance_s[t]:
+                scores[v] += paths_s[v] * paths_t[v] / paths_s[t]
+    return scores * 2 / ((n - 1) * (n - 2))
+
+
+def test_adjacency_is_symmetric_without_loops_or_parallel_edges():
+    indptr, indices = csr([(0, 1), (1, 0), (1, 2), (2, 2), (0, 1)], 4)
+    assert neighbour_lists(indptr, indices) == [[1], [0, 2], [1], []]
+
+
+def test_neighbours_of_a_frontier():
+    indptr, indices = csr([(0, 1), (0, 2), (2, 3)], 4)
+    src, dst = network._neighbours(indptr, indices, np.array([0, 3]))
+    assert sorted(zip(src.tolist(), dst.tolist())) == [(0, 1), (0, 2), (3, 2)]
+
+
+def test_pagerank_is_a_distribution_led_by_hubs():
+    indptr, indices = csr([(0, i) for i in range(1, 6)] + [(6, 7)], 9)
+    rank = network.pagerank(indptr, indices)
+    assert rank.sum() == pytest.approx(1.0)
+    assert rank.argmax() == 0
+    assert rank[1] == pytest.approx(rank[5])
+    assert rank[6] == pytest.approx(rank[7])
+
+
+def test_pagerank_matches_the_power_method():
+    rng = np.random.default_rng(1)
+    n = 30
+    edges = rng.integers(0, n, size=(60, 2))
+    indptr, indices = network.build_adjacency(edges[:, 0], edges[:, 1], n)
+    matrix = np.zeros((n, n))
+    for node, neighbours in enumerate(neighbour_lists(indptr, indices)):
+        if neighbours:
+            matrix[neighbours, node] = 1 / len(neighbours)
+        else:
+            matrix[:, node] = 1 / n
+    rank = np.full(n, 1 / n)
+    for _ in range(500):
+        rank = (1 - network.DAMPING) / n + network.DAMPING * matrix @ rank
+    assert network.pagerank(indptr, indices) == pytest.approx(rank, abs=1e-8)
+
+
+def test_betweenness_on_a_path():
+    indptr, indices = csr([(0, 1), (1, 2), (2, 3), (3, 4)], 5)
+    assert network.betweenness(indptr, indices).tolist() == pytest.approx([0, 0.5, 4 / 6, 0.5, 0])
+
+
+def test_betweenness_matches_brute_force_when_every_node_is_a_source():
+    rng = np.random.default_rng(2)
+    n = 25
+    edges = rng.integers(0, n, size=(45, 2))
+    indptr, indices = network.build_adjacency(edges[:, 0], edges[:, 1], n)
+    expected = reference_betweenness(neighbour_lists(indptr, indices))
+    assert network.betweenness(indptr, indices, samples=n) == pytest.approx(expected)
+    assert network.betweenness(*csr([(0, 1)], 2)).tolist() == [0, 0]
+
+
+def test_communities_split_loosely_joined_cliques():
+    left = list(itertools.combinations(range(5), 2))
+    right = list(itertools.combinations(range(5, 10), 2))
+    indptr, indices = csr(left + right + [(4, 5)], 10)
+    labels = network.communities(indptr, indices)
+    assert len(set(labels[:5])) == 1 and len(set(labels[5:])) == 1
+    assert labels[0] != labels[9]
+    assert sorted(set(labels.tolist())) == [0, 1]
@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip('streamlit')
+pytest.importorskip('neo4j')
+pd = pytest.importorskip('pandas')
+import snapshot
+from browse import ALL_LABELS
+
+
+def make_snapshot():
+    nodes = [('p1', 'Project', {'name': 'Beta'}), ('p2', 'Project', {'name': 'Alpha'}),
+             ('cs1', 'CaseStudy', {'id': 'b', 'name': 'Basin'}), ('cs2', 'CaseStudy', {'id': 'a', 'name': 'Delta'}),
+             ('r1', 'Researcher', {'name': 'Ada'}), ('i1', 'Institution', {'name': 'Patras'})]
+    frame = pd.DataFrame({'label': [label for _, label, _ in nodes], 'props': [props for _, _, props in nodes]},
+                         index=pd.Index([eid for eid, _, _ in nodes], name='eid'))
+    edges = pd.DataFrame([('p1', 'HAS_CASE_STUDY', 'cs1', None), ('p2', 'HAS_CASE_STUDY', 'cs2', None)],
+                         columns=snapshot.EDGE_COLUMNS)
+    return snapshot.GraphSnapshot(frame, edges, 100, 0.0)
+
+
+def walk(graph, label, page_size):
+    pages, cursor = [], None
+    while True:
+        nodes, cursor = graph.node_page(label, cursor, page_size)
+        pages.append([node.get('name') for node in nodes])
+        if cursor is None:
+            return pages
+
+
+def test_all_pages_walk_labels_in_browse_order():
+    pages = walk(make_snapshot(), None, 4)
+    assert pages == [['Alpha', 'Beta', 'Delta', 'Basin'], ['Ada', 'Patras']]
+    assert ALL_LABELS[:4] == ['Project', 'CaseStudy', 'Researcher', 'Institution']
+
+
+def test_cursors_are_segment_and_key_like_the_database_path():
+    graph = make_snapshot()
+    nodes, cursor = graph.node_page(None, None, 3)
+    assert cursor == (1, 'a')
+    # A cursor from parse_node_page (Neo4j) continues where that page ended.
+    assert graph.node_page(None, (ALL_LABELS.index('CaseStudy'), 'b'), 10)[0] == [{'name': 'Ada'}, {'name': 'Patras'}]
+    assert graph.node_page('Project', (0, 'Alpha'), 10) == ([{'name': 'Beta'}], None)
+    assert graph.node_page('Sector', None, 10) == ([], None)
+
+
+def test_a_newer_cursor_does_not_change_the_snapshot_readers_hold():
+    graph = make_snapshot()
+    newer = graph.with_cursor(200)
+    assert newer is not graph and graph.cursor == 100 and newer.cursor == 200
+    assert newer.node_page(None, None, 2) == graph.node_page(None, None, 2)
@@ -0,0 +1,75 @@
+import pytest
+
+pytest.importorskip('streamlit')
+pytest.importorskip('neo4j')
+np = pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+from stats import StatsCube
+
+
+RECORDS = [
+    {'eid': 'cs1', 'project': 'p1', 'answers': {'Country': 'Greece', 'FundedBy': 'ERC',
+                                                'NexusSectors': ['Water', 'Energy'], 'SDGs': ['SDG 6', 'SDG 7'],
+                                                'Economics': ['Cost-benefit analysis']}},
+    {'eid': 'cs2', 'project': 'p1', 'answers': {'Country': 'Spain', 'FundedBy': 'ERC',
+                                                'NexusSectors': ['Water', 'Food'], 'SDGs': ['SDG 6'],
+                                                'Economics': 'Not Available'}},
+    {'eid': 'cs3', 'project': 'p2', 'answers': {'Country': 'Greece', 'FundedBy': 'Life',
+                                                'NexusSectors': ['Water'], 'SDGs': [],
+                                                'Economics': ['Cost-benefit analysis']}},
+]
+
+
+def cube_of(records):
+    cube = StatsCube(0)
+    cube.load(records)
+    return cube
+
+
+def used(cube):
+    return {key: int(cube.gram[i, i]) for key, i in cube.columns.items() if cube.gram[i, i]}
+
+
+def test_counts_skip_missing_answers():
+    cube = cube_of(RECORDS)
+    assert cube.total == 3
+    assert cube.counts('NexusSectors').to_dict() == {'Water': 3, 'Energy': 1, 'Food': 1}
+    assert cube.counts('Economics').to_dict() == {'Cost-benefit analysis': 2}
+    assert cube.counts('Scale').empty
+
+
+def test_crosstab_and_cooccurrence_are_blocks_of_the_gram_matrix():
+    cube = cube_of(RECORDS)
+    table = cube.crosstab('Country', 'NexusSectors')
+    assert table.loc['Greece'].to_dict() == {'Energy': 1, 'Food': 0, 'Water': 2}
+    assert table.loc['Spain'].to_dict() == {'Energy': 0, 'Food': 1, 'Water': 1}
+    sdgs = cube.cooccurrence('SDGs')
+    assert sdgs.loc['SDG 6', 'SDG 7'] == sdgs.loc['SDG 7', 'SDG 6'] == 1
+    assert sdgs.loc['SDG 6', 'SDG 6'] == 2
+
+
+def test_method_usage_by_funding_programme():
+    usage = cube_of(RECORDS).method_usage('FundedBy')
+    assert usage.loc[('Economics', 'Cost-benefit analysis')].to_dict() == {'ERC': 1, 'Life': 1}
+
+
+def test_incremental_updates_match_a_full_load():
+    cube = cube_of(RECORDS[:1])
+    cube.add('cs2', 'p1', RECORDS[1]['answers'])
+    cube.add('cs3', 'p2', RECORDS[2]['answers'])
+    assert used(cube) == used(cube_of(RECORDS))
+    changed = {**RECORDS[0]['answers'], 'Country': 'Italy'}
+    cube.add('cs1', 'p1', changed)
+    cube.remove('cs2')
+    cube.remove('missing')
+    assert used(cube) == used(cube_of([{**RECORDS[0], 'answers': changed}, RECORDS[2]]))
+    assert cube.total == 2
+
+
+def test_the_matrix_grows_for_new_values():
+    cube = cube_of([])
+    for i in range(100):
+        cube.add(f'cs{i}', 'p', {'Country': f'Country {i}', 'SDGs': ['SDG 1']})
+    assert len(cube.gram) >= 101
+    assert cube.counts('SDGs').to_dict() == {'SDG 1': 100}
+    assert cube.counts('Country').sum() == 100
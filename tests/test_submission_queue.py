@@ -0,0 +1,140 @@
+import sqlite3
+import datetime
+import pytest
+
+pytest.importorskip('streamlit')
+pytest.importorskip('neo4j')
+pytest.importorskip('pandas')
+import submission_queue
+import projects
+from projects import DuplicateProjectError
+from neo4j.exceptions import ConstraintError
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    path = tmp_path / 'submissions.sqlite3'
+    monkeypatch.setattr(submission_queue, 'QUEUE_PATH', str(path))
+    monkeypatch.setattr(submission_queue, 'start_worker', lambda: None)
+    return path
+
+
+def set_writer(monkeypatch, kind, writer):
+    monkeypatch.setitem(submission_queue.WRITERS, kind, writer)
+
+
+def rows(path):
+    connection = sqlite3.connect(path)
+    try:
+        return {key: {'status': status, 'attempts': attempts, 'error': error} for key, status, attempts, error in
+                connection.execute("SELECT idempotency_key, status, attempts, last_error FROM submissions")}
+    finally:
+        connection.close()
+
+
+def test_enqueued_items_survive_a_new_connection(queue, monkeypatch):
+    key = submission_queue.enqueue('project', {'project_info': {'start': datetime.date(2024, 1, 31)},
+                                               'coord_info': {}})
+    assert rows(queue)[key]['status'] == 'pending'
+    seen = []
+
+    def writer(items):
+        seen.extend(items)
+        return {item['key'] for item in items}
+
+    set_writer(monkeypatch, 'project', writer)
+    assert submission_queue.drain_once() == 1
+    assert seen[0]['key'] == key
+    assert seen[0]['payload']['project_info']['start'] == datetime.date(2024, 1, 31)
+    assert rows(queue)[key]['status'] == 'done'
+    assert submission_queue.drain_once() == 0
+
+
+def test_unwritten_case_studies_are_not_marked_done(queue, monkeypatch):
+    written = submission_queue.enqueue('case_study', {'project_name': 'Known'})
+    dropped = submission_queue.enqueue('case_study', {'project_name': 'Unknown'})
+    set_writer(monkeypatch, 'case_study', lambda items: {written})
+    submission_queue.drain_once()
+    state = rows(queue)
+    assert state[written]['status'] == 'done'
+    assert state[dropped]['status'] == 'pending'
+    assert state[dropped]['attempts'] == 1
+    assert "project not found: 'Unknown'" in state[dropped]['error']
+
+
+def test_a_failing_item_does_not_hold_back_its_batch(queue, monkeypatch):
+    good = submission_queue.enqueue('project', {'name': 'good'})
+    bad = submission_queue.enqueue('project', {'name': 'bad'})
+
+    def writer(items):
+        if any(item['payload']['name'] == 'bad' for item in items):
+            raise RuntimeError('boom')
+        return {item['key'] for item in items}
+
+    set_writer(monkeypatch, 'project', writer)
+    submission_queue.drain_once()
+    state = rows(queue)
+    assert state[good]['status'] == 'done'
+    assert state[bad]['status'] == 'pending'
+    assert state[bad]['error'] == 'RuntimeError: boom'
+
+
+def test_duplicates_fail_permanently_without_failing_their_batch(queue, monkeypatch):
+    first = submission_queue.enqueue('project', {'project_info': {'name': 'A'}, 'coord_info': {}})
+    duplicate = submission_queue.enqueue('project', {'project_info': {'name': 'taken'}, 'coord_info': {}})
+    last = submission_queue.enqueue('project', {'project_info': {'name': 'B'}, 'coord_info': {}})
+    batches = []
+
+    def write_projects(rows):
+        batches.append([row['project_info']['name'] for row in rows])
+        return [row['project_info']['name'] != 'taken' for row in rows]
+
+    monkeypatch.setattr(submission_queue, 'write_projects', write_projects)
+    submission_queue.drain_once()
+    state = rows(queue)
+    assert batches == [['A', 'taken', 'B']]
+    assert state[first]['status'] == state[last]['status'] == 'done'
+    assert state[duplicate]['status'] == 'failed'
+    assert state[duplicate]['error'] == "DuplicateProjectError: project already exists: 'taken'"
+    assert submission_queue.queue_status()['failed'] == 1
+
+
+def test_projects_are_written_in_one_transaction(monkeypatch):
+    calls = []
+
+    def run_write(query, parameters):
+        calls.append(parameters['rows'])
+        if len(calls) == 1:
+            raise ConstraintError('project_name_unique')
+        return [{'index': row['index'], 'written': row['project_info']['name'] != 'taken'}
+                for row in parameters['rows']]
+
+    error_code = 'Neo.ClientError.Schema.ConstraintValidationFailed'
+    monkeypatch.setattr(ConstraintError, 'code', error_code, raising=False)
+    monkeypatch.setattr(projects, 'run_write', run_write)
+    monkeypatch.setattr(projects.snapshot, 'notify', lambda: None)
+    batch = [{'project_info': {'name': name}, 'coord_info': {'name': 'Coordinator'}, 'submission_key': str(i)}
+             for i, name in enumerate(['A', 'taken', 'A', 'B'])]
+    assert projects.write_projects(batch) == [True, False, False, True]
+    # Retried once after a concurrent write; repeated names never reach the database.
+    assert len(calls) == 2
+    assert [row['index'] for row in calls[1]] == [0, 1, 3]
+    with pytest.raises(DuplicateProjectError):
+        projects.write_project({'name': 'taken'}, {'name': 'Coordinator'})
+
+
+def test_items_fail_after_max_attempts(queue, monkeypatch):
+    key = submission_queue.enqueue('project', {'name': 'flaky'})
+    monkeypatch.setattr(submission_queue, 'MAX_ATTEMPTS', 2)
+
+    def writer(items):
+        raise ConnectionError('down')
+
+    set_writer(monkeypatch, 'project', writer)
+    for _ in range(2):
+        submission_queue.drain_once()
+        connection = sqlite3.connect(queue)
+        with connection:
+            connection.execute("UPDATE submissions SET next_attempt_at = 0")
+        connection.close()
+    assert rows(queue)[key] == {'status': 'failed', 'attempts': 2, 'error': 'ConnectionError: down'}
@@ -0,0 +1,52 @@
+import pytest
+
+pytest.importorskip('streamlit')
+pytest.importorskip('neo4j')
+from typeahead import PrefixTrie, fold, TOP_K, MAX_DEPTH
+
+
+def test_fold_drops_accents_case_and_punctuation():
+    assert fold('Université  Paris-Saclay') == 'universite paris saclay'
+
+
+def test_any_word_start_matches_best_scores_first():
+    trie = PrefixTrie()
+    trie.add('University of Patras', 5)
+    trie.add('Patras Science Park', 9)
+    trie.add('National Technical University of Athens', 7)
+    assert trie.suggest('patr') == ['Patras Science Park', 'University of Patras']
+    assert trie.suggest('univ') == ['National Technical University of Athens', 'University of Patras']
+    assert trie.suggest('Univérsity of') == ['National Technical University of Athens', 'University of Patras']
+    assert trie.suggest('zzz') == []
+    assert len(trie) == 3
+
+
+def test_prefixes_longer_than_the_trie_are_filtered():
+    trie = PrefixTrie()
+    trie.add('Wageningen University', 1)
+    trie.add('Wageningen Research', 2)
+    prefix = 'wageningen u'
+    assert len(prefix) > MAX_DEPTH
+    assert trie.suggest(prefix) == ['Wageningen University']
+    assert trie.suggest('wageningen') == ['Wageningen Research', 'Wageningen University']
+
+
+def test_removal_refills_the_top_entries():
+    trie = PrefixTrie()
+    names = [f'Institute {i:02d}' for i in range(TOP_K + 5)]
+    for score, name in enumerate(names):
+        trie.add(name, score)
+    assert trie.suggest('inst') == names[::-1][:TOP_K]
+    trie.remove(names[-1])
+    assert trie.suggest('inst') == names[-2::-1][:TOP_K]
+    assert names[-1] not in trie.suggest('institute 1')
+
+
+def test_re_adding_a_name_updates_its_score():
+    trie = PrefixTrie()
+    trie.add('Alpha Lab', 1)
+    trie.add('Alpha Centre', 2)
+    trie.add('Alpha Lab', 3)
+    assert trie.suggest('alpha') == ['Alpha Lab', 'Alpha Centre']
+    trie.remove('Missing')
+    assert len(trie) == 2
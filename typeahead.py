@@ -0,0 +1,223 @@
+import re
+import time
+import heapq
+import threading
+import unicodedata
+from db import run_query, get_setting
+from changes import changes_since, feed_cursor, is_reset
+
+# Name suggestions for Institution and Researcher. The best-connected names
+# (the hot set) live in an in-process prefix trie kept current from the change
+# feed; prefixes with too few hits there fall back to the entity_names
+# full-text index. Neither path ever scans a label.
+LABELS = ['Institution', 'Researcher']
+HOT_SET_SIZE = int(get_setting('TYPEAHEAD_HOT_SET_SIZE', 20000))
+TOP_K = 10
+MAX_DEPTH = 6
+REFRESH_INTERVAL = float(get_setting('TYPEAHEAD_REFRESH_INTERVAL', 5))
+FULL_REFRESH_INTERVAL = float(get_setting('TYPEAHEAD_FULL_REFRESH_INTERVAL', 3600))
+LUCENE_SPECIAL = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+
+
+def fold(text):
+    text = ''.join(c for c in unicodedata.normalize('NFKD', str(text)) if not unicodedata.combining(c))
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+
+class PrefixTrie:
+    # Every word start of a folded name is a key, so "patr" finds "University
+    # of Patras". Trie nodes go MAX_DEPTH characters deep; each keeps its
+    # TOP_K best (-score, name) entries under '' so a short prefix is one walk,
+    # and the (key, name) pairs ending there under None, which longer
+    # prefixes filter.
+    def __init__(self):
+        self.root = {}
+        self.scores = {}
+
+    def _keys(self, name):
+        words = fold(name).split()
+        return {' '.join(words[i:]) for i in range(len(words))}
+
+    def _path(self, key, create=False):
+        node = self.root
+        path = [node]
+        for char in key[:MAX_DEPTH]:
+            child = node.get(char)
+            if child is None:
+                if not create:
+                    return path, None
+                child = node[char] = {}
+            node = child
+            path.append(node)
+        return path, node
+
+    def add(self, name, score=0):
+        if name in self.scores:
+            self.remove(name)
+        self.scores[name] = score
+        for key in self._keys(name):
+            path, node = self._path(key, create=True)
+            node.setdefault(None, set()).add((key, name))
+            for step in path:
+                top = step.setdefault('', [])
+                if all(entry[1] != name for entry in top):
+                    top.append((-score, name))
+                    top.sort()
+                    del top[TOP_K:]
+
+    def remove(self, name):
+        if self.scores.pop(name, None) is None:
+            return
+        paths = []
+        for key in self._keys(name):
+            path, node = self._path(key)
+            if node is not None:
+                node[None].discard((key, name))
+                paths.append(path)
+        for path in paths:
+            # Bottom-up, so a node that was full is refilled from children
+            # that are already up to date.
+            for step in reversed(path):
+                top = step.get('', [])
+                if any(entry[1] == name for entry in top):
+                    step[''] = [entry for entry in top if entry[1] != name]
+                    if len(top) == TOP_K:
+                        step[''] = self._collect(step)
+
+    def _collect(self, node):
+        candidates = {name for _, name in node.get(None, ())}
+        for char, child in node.items():
+            if char:
+                candidates.update(name for _, name in child.get('', []))
+        return heapq.nsmallest(TOP_K, ((-self.scores[name], name) for name in candidates if name in self.scores))
+
+    def suggest(self, prefix, limit=TOP_K):
+        key = fold(prefix)
+        _, node = self._path(key)
+        if node is None:
+            return []
+        if len(key) <= MAX_DEPTH:
+            return [name for _, name in node.get('', [])[:limit]]
+        matches = {name for candidate, name in node.get(None, ()) if candidate.startswith(key)}
+        return [name for _, name in heapq.nsmallest(limit, ((-self.scores[name], name) for name in matches))]
+
+    def __len__(self):
+        return len(self.scores)
+
+
+class EntityIndex:
+    def __init__(self, label):
+        self.label = label
+        self.trie = PrefixTrie()
+        self.names = {}
+        self.complete = False
+        self.cursor = None
+        self.loaded_at = 0.0
+        self.lock = threading.Lock()
+
+    def load(self):
+        cursor = feed_cursor()
+        records = run_query(f"""
+        MATCH (n:`{self.label}`) WHERE n.name IS NOT NULL
+        WITH n, COUNT {{ (n)--() }} AS degree ORDER BY degree DESC LIMIT $limit
+        RETURN elementId(n) AS eid, n.name AS name, degree
+        """, {'limit': HOT_SET_SIZE + 1})
+        trie = PrefixTrie()
+        names = {}
+        for record in records[:HOT_SET_SIZE]:
+            trie.add(record['name'], record['degree'])
+            names[record['eid']] = record['name']
+        with self.lock:
+            self.trie, self.names = trie, names
+            self.complete = len(records) <= HOT_SET_SIZE
+            self.cursor = cursor
+            self.loaded_at = time.time()
+
+    def apply_changes(self):
+        feed = changes_since(self.cursor, [self.label], [])
+        if is_reset(feed):
+            self.load()
+            return
+        with self.lock:
+            for node in feed['nodes']:
+                name = node['properties'].get('name')
+                old = self.names.get(node['elementId'])
+                score = self.trie.scores.get(old, 0)
+                if old is not None and old != name:
+                    self.trie.remove(old)
+                if name is not None and (old is not None or len(self.trie) < HOT_SET_SIZE):
+                    self.trie.add(name, score)
+                    self.names[node['elementId']] = name
+                elif name is not None:
+                    # The hot set is full; the full-text index covers the rest.
+                    self.complete = False
+            for tombstone in feed['tombstones']:
+                tombstone = tombstone['tombstone']
+                if tombstone['kind'] == 'node' and tombstone['elementId'] in self.names:
+                    self.trie.remove(self.names.pop(tombstone['elementId']))
+            self.cursor = feed['until']
+
+    def suggest(self, prefix, limit=TOP_K):
+        with self.lock:
+            names = self.trie.suggest(prefix, limit)
+            complete = self.complete
+        if len(names) < limit and not complete and fold(prefix):
+            for name in search_fulltext(self.label, prefix, limit):
+                if name not in names:
+                    names.append(name)
+        return names[:limit]
+
+
+def search_fulltext(label, prefix, limit=TOP_K):
+    # Every typed word must match as a prefix of some word in the name.
+    terms = [LUCENE_SPECIAL.sub(r'\\\1', word) + '*' for word in fold(prefix).split()]
+    return [record['name'] for record in run_query("""
+    CALL db.index.fulltext.queryNodes('entity_names', $query) YIELD node, score
+    WHERE $label IN labels(node)
+    RETURN node.name AS name ORDER BY score DESC LIMIT $limit
+    """, {'query': ' AND '.join(terms), 'label': label, 'limit': limit})]
+
+
+_indexes = {label: EntityIndex(label) for label in LABELS}
+_refresher = None
+_refresher_lock = threading.Lock()
+_wake = threading.Event()
+
+
+def refresh_once():
+    for index in _indexes.values():
+        if index.cursor is None or time.time() - index.loaded_at >= FULL_REFRESH_INTERVAL:
+            index.load()
+        else:
+            index.apply_changes()
+
+
+def _run_refresher():
+    while True:
+        try:
+            refresh_once()
+        except Exception:
+            pass
+        _wake.wait(REFRESH_INTERVAL)
+        _wake.clear()
+
+
+def start_refresher():
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None or not _refresher.is_alive():
+            _refresher = threading.Thread(target=_run_refresher, name='typeahead', daemon=True)
+            _refresher.start()
+
+
+def notify():
+    _wake.set()
+
+
+def suggest(label, prefix, limit=TOP_K):
+    index = _indexes[label]
+    if index.cursor is None:
+        # Not loaded yet: the full-text index alone still answers quickly.
+        return search_fulltext(label, prefix, limit) if fold(prefix) else []
+    return index.suggest(prefix, limit)
+